@@ -1,5 +1,7 @@
 """Provide executable sessions for project automation."""
 
+import os
+
 import nox
 from nox_poetry import Session, session
 
@@ -20,6 +22,19 @@ def testing(session: Session) -> None:
     session.run("pytest", *args)
 
 
+@session(python=python_versions[0])
+def benchmarking(session: Session) -> None:
+    """Run the interpreter benchmarks (against a baseline, if one exists)."""
+
+    args = session.posargs
+
+    if not args and os.path.exists("benchmarks/baseline.json"):
+        args = ["--compare", "benchmarks/baseline.json"]
+
+    session.install(".")
+    session.run("quenb", *args)
+
+
 @session
 def linting(session: Session) -> None:
     """Run linting checks (using flake8)."""
@@ -1,3 +1,23 @@
+from typing import Any
+
 from .__version__ import VERSION
 
 __version__ = ".".join(map(str, VERSION))
+
+# The library API is imported on first use, so that importing the package,
+# as the command line interface does, costs nothing.
+
+EXPORTS = {
+    "Program": "quendor.program",
+    "QuendorError": "quendor.errors",
+    "Story": "quendor.story",
+}
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    if name not in EXPORTS:
+        raise AttributeError(f"module 'quendor' has no attribute {name!r}")
+
+    import importlib
+
+    return getattr(importlib.import_module(EXPORTS[name]), name)
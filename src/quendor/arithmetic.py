@@ -0,0 +1,50 @@
+"""Module for Z-Machine arithmetic on 16-bit values."""
+
+from quendor.errors import DivisionByZeroError
+
+
+def signed(value: int) -> int:
+    """Interpret a 16-bit value as a signed number."""
+
+    return value - 0x10000 if value & 0x8000 else value
+
+
+def divide(first: int, second: int) -> int:
+    """Provide the signed quotient of two values, rounded towards zero."""
+
+    if second == 0:
+        raise DivisionByZeroError("Quendor found a division by zero.")
+
+    first, second = signed(first), signed(second)
+    quotient = abs(first) // abs(second)
+
+    return (-quotient if (first < 0) != (second < 0) else quotient) & 0xFFFF
+
+
+def remainder(first: int, second: int) -> int:
+    """Provide the signed remainder of two values."""
+
+    if second == 0:
+        raise DivisionByZeroError("Quendor found a division by zero.")
+
+    first, second = signed(first), signed(second)
+    result = abs(first) % abs(second)
+
+    return (-result if first < 0 else result) & 0xFFFF
+
+
+def shift(number: int, places: int) -> int:
+    """Provide the logical shift of a value."""
+
+    places = signed(places)
+
+    return (number << places if places >= 0 else number >> -places) & 0xFFFF
+
+
+def arithmetic_shift(number: int, places: int) -> int:
+    """Provide the arithmetic shift of a value."""
+
+    places = signed(places)
+    number = signed(number)
+
+    return (number << places if places >= 0 else number >> -places) & 0xFFFF
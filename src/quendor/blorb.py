@@ -0,0 +1,194 @@
+"""Module for blorb container abstraction."""
+
+from typing import Dict, Optional, Tuple, Union
+
+from quendor.errors import InvalidBlorbFileError
+from quendor.logging import logger
+
+
+class Blorb:
+    """
+    Abstraction for a blorb container.
+
+    A blorb file is an IFF FORM of type IFRS. The first chunk of the form
+    is always the resource index (RIdx), which lists every resource in the
+    container by usage and number along with the file offset of the chunk
+    that holds it. That index is the only thing read up front. Resources
+    are handed out as memoryview slices over the original data so that
+    asking for the executable never touches, or copies, any pictures or
+    sounds that happen to be bundled alongside it.
+    """
+
+    EXECUTABLE = "Exec"
+    PICTURE = "Pict"
+    SOUND = "Snd "
+
+    def __init__(self, data: Union[bytes, memoryview]) -> None:
+        self.data: memoryview = memoryview(data)
+        self.resources: Dict[Tuple[str, int], int] = {}
+        self._chunks: Optional[Dict[str, int]] = None
+
+        self._read_index()
+
+    def _read_index(self) -> None:
+        """
+        Read the resource index.
+
+        Each index entry is twelve bytes: a four character usage, the
+        resource number and the offset of the chunk within the file.
+
+        Raises:
+            InvalidBlorbFileError: if the RIdx chunk is missing or truncated
+        """
+
+        if bytes(self.data[12:16]) != b"RIdx":
+            raise InvalidBlorbFileError(
+                "Quendor did not find a resource index in the blorb file.",
+            )
+
+        length = self._long(16)
+        count = self._long(20)
+
+        if length < 4 + count * 12 or len(self.data) < 24 + count * 12:
+            raise InvalidBlorbFileError(
+                "Quendor found a truncated resource index in the blorb file.",
+            )
+
+        for entry in range(24, 24 + count * 12, 12):
+            usage = self._id(entry)
+            number = self._long(entry + 4)
+            self.resources[(usage, number)] = self._long(entry + 8)
+
+        logger.debug(f"blorb resources: {len(self.resources)}")
+
+    def _long(self, offset: int) -> int:
+        """Read a big-endian 32-bit value at an offset."""
+
+        end = offset + 4
+
+        return int.from_bytes(self.data[offset:end], "big")
+
+    def _id(self, offset: int) -> str:
+        """Read a four character chunk or usage ID at an offset."""
+
+        end = offset + 4
+
+        return bytes(self.data[offset:end]).decode("latin-1")
+
+    def chunk_at(self, offset: int) -> Tuple[str, memoryview]:
+        """
+        Provide the chunk that starts at an offset.
+
+        Args:
+            offset: the file offset of the chunk header
+
+        Returns:
+            The chunk type and a zero-copy view of the chunk body.
+
+        Raises:
+            InvalidBlorbFileError: if the chunk lies outside the file
+        """
+
+        length = self._long(offset + 4)
+        start = offset + 8
+        end = start + length
+
+        if offset < 12 or end > len(self.data):
+            raise InvalidBlorbFileError(
+                f"Quendor found a blorb chunk outside the file at {offset}.",
+            )
+
+        return self._id(offset), self.data[start:end]
+
+    def resource(self, usage: str, number: int) -> Optional[Tuple[str, memoryview]]:
+        """
+        Provide an indexed resource.
+
+        Args:
+            usage: the resource usage, such as Exec, Pict or Snd
+            number: the resource number
+
+        Returns:
+            The chunk type and body of the resource, or None if the index
+            does not list the resource.
+        """
+
+        offset = self.resources.get((usage, number))
+
+        if offset is None:
+            return None
+
+        return self.chunk_at(offset)
+
+    def executable(self) -> Tuple[str, memoryview]:
+        """
+        Provide the executable resource.
+
+        Returns:
+            The chunk type (ZCOD or GLUL) and body of the executable.
+
+        Raises:
+            InvalidBlorbFileError: if the blorb does not list an executable
+        """
+
+        executable = self.resource(self.EXECUTABLE, 0)
+
+        if executable is None:
+            raise InvalidBlorbFileError(
+                "Quendor did not find an executable in the blorb file.",
+            )
+
+        return executable
+
+    def picture(self, number: int) -> Optional[Tuple[str, memoryview]]:
+        """Provide a picture resource, if the blorb has one."""
+
+        return self.resource(self.PICTURE, number)
+
+    def sound(self, number: int) -> Optional[Tuple[str, memoryview]]:
+        """Provide a sound resource, if the blorb has one."""
+
+        return self.resource(self.SOUND, number)
+
+    def chunk(self, chunk_id: str) -> Optional[memoryview]:
+        """
+        Provide the first top-level chunk of a given type.
+
+        Chunks that are not resources, such as the IFmd metadata chunk,
+        are not listed in the index. For those, the chunk headers of the
+        form are walked once, skipping over every body, and the offsets
+        are remembered for any later requests.
+
+        Args:
+            chunk_id: the four character chunk type
+
+        Returns:
+            A view of the chunk body or None if the form has no such chunk.
+        """
+
+        if self._chunks is None:
+            self._chunks = {}
+            end = min(len(self.data), 8 + self._long(4))
+            offset = 12
+
+            while offset + 8 <= end:
+                self._chunks.setdefault(self._id(offset), offset)
+                offset += 8 + self._long(offset + 4)
+                offset += offset & 1
+
+        found = self._chunks.get(chunk_id)
+
+        if found is None:
+            return None
+
+        return self.chunk_at(found)[1]
+
+    def metadata(self) -> Optional[str]:
+        """Provide the IFmd (iFiction) metadata, if the blorb has any."""
+
+        metadata = self.chunk("IFmd")
+
+        if metadata is None:
+            return None
+
+        return bytes(metadata).decode("utf-8", errors="replace")
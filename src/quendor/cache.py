@@ -0,0 +1,271 @@
+"""Module for the on-disk cache of decoded and compiled zcode."""
+
+import functools
+import hashlib
+import importlib.util
+import marshal
+import os
+import re
+import stat
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from quendor import __version__
+from quendor.instruction import Instruction
+from quendor.logging import logger
+from quendor.program import Program
+
+MAGIC = b"QNDR\x01"
+
+
+@functools.lru_cache(maxsize=None)
+def code_digest() -> bytes:
+    """
+    Provide a digest of the code of the interpreter.
+
+    The instruction layout and the generated routine sources depend on the
+    decoder and the compiler, and on everything the routines call, from the
+    processor to the arithmetic and table helpers. Any of it can change
+    without any change of version, as it does in a development install, so
+    every module of the interpreter goes into the digest.
+
+    Returns:
+        The digest of the modules of the quendor package.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+
+    for module in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(module.name.encode("utf-8"))
+        digest.update(module.read_bytes())
+
+    return digest.digest()
+
+
+def cache_directory() -> Path:
+    """
+    Provide the directory that holds the cache files.
+
+    The directory is taken from $QUENDOR_CACHE if that is set. Otherwise
+    it is a quendor directory in the user cache directory.
+
+    Returns:
+        The path of the cache directory.
+    """
+
+    directory = os.environ.get("QUENDOR_CACHE")
+
+    if directory:
+        return Path(directory)
+
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+
+    return Path(os.path.expanduser(base)) / "quendor"
+
+
+def check_private(path: Path) -> None:
+    """
+    Make sure that nobody but the current user can have written a path.
+
+    Args:
+        path: the path of a file or directory
+
+    Raises:
+        PermissionError: if the path is a link, belongs to someone else or
+            can be written by others
+    """
+
+    status = os.lstat(path)
+    owner = status.st_uid == os.getuid() if hasattr(os, "getuid") else True
+    shared = status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+    if stat.S_ISLNK(status.st_mode) or not owner or shared:
+        raise PermissionError(f"{path} is not private to the user")
+
+
+class StoryCache:
+    """
+    Abstraction for the cache file of a story.
+
+    The decoded instructions and compiled routine sources that a session
+    builds up are written to a cache file when the session ends, and read
+    back when a later session of the same story starts. Much like a .pyc
+    file, the cache file is named after what identifies the story (the
+    release number, serial code and checksum from the header) and it
+    records what it was built from: the Python and Quendor versions, the
+    digest of the interpreter modules and the length and digest of the
+    story. A cache file that does not match
+    is ignored and later replaced, so editing or recompiling a story
+    invalidates its cache without any need to clear it by hand.
+
+    The cache file holds Python source that is executed once it is loaded,
+    so it is only ever read from a directory of the user's own that nobody
+    else can write to, and only if the file is theirs alone as well. The
+    directory is created that way when it does not exist yet.
+    """
+
+    def __init__(self, program: Program, directory: Optional[Path] = None) -> None:
+        self.program: Program = program
+        self.directory: Path = directory or cache_directory()
+        self._loaded: tuple = (0, 0, 0)
+
+        header = program.header
+        serial = re.sub(r"[^0-9A-Za-z]", "_", header.serial)
+
+        self.path: Path = self.directory / (
+            f"{header.release}.{serial}.{header.checksum:04x}.qcache"
+        )
+
+    def _stamp(self) -> tuple:
+        """Provide what the cache file must have been built from."""
+
+        story = self.program.story
+        digest = hashlib.blake2b(story, digest_size=16).digest()
+
+        return (
+            MAGIC,
+            importlib.util.MAGIC_NUMBER,
+            __version__,
+            code_digest(),
+            len(story),
+            digest,
+        )
+
+    def _sizes(self) -> tuple:
+        """Provide the number of entries in each of the program caches."""
+
+        cache = self.program.cache
+
+        return (
+            len(cache.get("instructions", {})),
+            len(cache.get("sources", {})),
+            len(cache.get("routines", {})),
+        )
+
+    def load(self) -> bool:
+        """
+        Load the cache file of the story into the program caches.
+
+        Returns:
+            True if a valid cache file was loaded.
+        """
+
+        try:
+            check_private(self.directory)
+            check_private(self.path)
+
+            with open(self.path, "rb") as cache_file:
+                stamp, instructions, sources, uncompilable = marshal.load(  # noqa: S302
+                    cache_file,
+                )
+        except (EOFError, OSError, TypeError, ValueError) as exc:
+            logger.debug(f"no story cache at {self.path}: {exc}")
+            return False
+
+        if stamp != self._stamp():
+            logger.debug(f"story cache at {self.path} is stale")
+            return False
+
+        cache = self.program.cache
+
+        cache.setdefault("instructions", {}).update(
+            (fields[0], Instruction(*fields)) for fields in instructions
+        )
+        cache.setdefault("sources", {}).update(sources)
+        cache.setdefault("routines", {}).update(
+            (address, None) for address in uncompilable
+        )
+
+        self._loaded = self._sizes()
+
+        logger.debug(f"story cache loaded from {self.path}")
+
+        return True
+
+    def save(self) -> bool:
+        """
+        Write the program caches to the cache file of the story.
+
+        Nothing is written when the caches have not grown since they were
+        loaded, nor into a directory that others can write to. The file is
+        written under a temporary name and moved into place, so a session
+        that starts while another one is saving never sees a partial file.
+
+        Returns:
+            True if the cache file was written.
+        """
+
+        if self._sizes() == self._loaded:
+            return False
+
+        cache = self.program.cache
+
+        instructions = [
+            (
+                instruction.address,
+                instruction.opcode,
+                instruction.operand_types,
+                instruction.operands,
+                instruction.store,
+                instruction.branch_on,
+                instruction.branch_target,
+                instruction.text,
+                instruction.text_length,
+                instruction.next,
+            )
+            for instruction in cache.get("instructions", {}).values()
+        ]
+
+        uncompilable = [
+            address
+            for address, routine in cache.get("routines", {}).items()
+            if routine is None
+        ]
+
+        tables = (self._stamp(), instructions, cache.get("sources", {}), uncompilable)
+
+        try:
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            check_private(self.directory)
+
+            self._write(tables)
+        except OSError as exc:
+            logger.debug(f"unable to write story cache to {self.path}: {exc}")
+            return False
+
+        self._loaded = self._sizes()
+
+        logger.debug(f"story cache written to {self.path}")
+
+        return True
+
+    def _write(self, tables: tuple) -> None:
+        """
+        Write the tables to the cache file, replacing it in one step.
+
+        They are written to a temporary file next to the cache file first,
+        which is removed again should the tables not make it into place.
+
+        Args:
+            tables: the tables to write
+
+        Raises:
+            BaseException: whatever kept the tables from being written, once
+                the temporary file is removed
+        """
+
+        cache_file = tempfile.NamedTemporaryFile(
+            dir=self.directory,
+            suffix=".tmp",
+            delete=False,
+        )
+
+        try:
+            with cache_file:
+                marshal.dump(tables, cache_file)
+
+            os.replace(cache_file.name, self.path)
+        except BaseException:
+            os.unlink(cache_file.name)
+            raise
@@ -0,0 +1,340 @@
+"""Module for the catalog of the zcode programs on the search path."""
+
+import hashlib
+import marshal
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from quendor import __version__
+from quendor.logging import logger
+from quendor.probe import probe
+
+MAGIC = b"QNDX\x01"
+
+SUFFIXES = (
+    ".z1",
+    ".z2",
+    ".z3",
+    ".z4",
+    ".z5",
+    ".z6",
+    ".z7",
+    ".z8",
+    ".zblorb",
+    ".zlb",
+)
+
+# A story can be asked for by its release and serial code, as 88-840726.
+
+RELEASE = re.compile(r"^(\d+)-(\w{6})$")
+
+
+class Entry(NamedTuple):
+    """What the catalog knows about a program file."""
+
+    path: str
+    mtime: int
+    size: int
+    file_format: str
+    version: int
+    release: int
+    serial: str
+    checksum: int
+    digest: str
+
+
+def search_path() -> List[str]:
+    """Provide the directories listed in $ZCODE_PATH, in order."""
+
+    return [
+        os.path.expanduser(directory)
+        for directory in os.environ.get("ZCODE_PATH", "").split(os.pathsep)
+        if directory
+    ]
+
+
+def index_path() -> Path:
+    """Provide the file that holds the catalog index."""
+
+    from quendor.cache import cache_directory
+
+    return cache_directory() / "catalog.qindex"
+
+
+def digest(path: str) -> str:
+    """Provide the digest of the contents of a file."""
+
+    hasher = hashlib.blake2b(digest_size=16)
+
+    with open(path, "rb") as program_file:
+        for block in iter(lambda: program_file.read(1 << 16), b""):
+            hasher.update(block)
+
+    return hasher.hexdigest()
+
+
+class Catalog:
+    """
+    Abstraction for the catalog of the programs in a set of directories.
+
+    The catalog holds the header metadata and a digest of the contents of
+    every program file below its directories. It is kept in an index file
+    between runs, so a program is found by name, or by release and serial
+    code, with a dictionary lookup and a single stat of the file found.
+
+    The directories are only walked when a lookup misses or finds a file
+    that changed. A walk stats every file but probes and digests only the
+    files whose modification time or size differ from the index, so it
+    costs next to nothing for a tree that has barely changed.
+
+    Names are file names and paths relative to a directory. Where several
+    files share a name, the one in the earliest directory wins.
+    """
+
+    def __init__(
+        self,
+        directories: Sequence[str],
+        path: Optional[Path] = None,
+    ) -> None:
+        self.directories: List[str] = [
+            os.path.abspath(directory) for directory in directories
+        ]
+        self.path: Path = path or index_path()
+        self.entries: Dict[str, Entry] = {}
+        self.names: Dict[str, str] = {}
+        self.releases: Dict[Tuple[int, str], str] = {}
+
+        self.load()
+
+    def load(self) -> bool:
+        """
+        Read the index file of the catalog.
+
+        Returns:
+            True if a valid index file was read.
+        """
+
+        try:
+            with open(self.path, "rb") as index_file:
+                stamp, entries = marshal.load(index_file)  # noqa: S302
+
+            if stamp != (MAGIC, __version__):
+                logger.debug(f"catalog index at {self.path} is stale")
+                return False
+
+            self.entries = {fields[0]: Entry(*fields) for fields in entries}
+        except (EOFError, OSError, TypeError, ValueError) as exc:
+            logger.debug(f"no catalog index at {self.path}: {exc}")
+            return False
+
+        self._index()
+
+        return True
+
+    def save(self) -> bool:
+        """
+        Write the index file of the catalog.
+
+        The file is written under a temporary name and moved into place, so
+        a catalog that loads while another one is saving never sees a
+        partial file.
+
+        Returns:
+            True if the index file was written.
+        """
+
+        entries = [tuple(entry) for entry in self.entries.values()]
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+            with tempfile.NamedTemporaryFile(
+                dir=self.path.parent,
+                suffix=".tmp",
+                delete=False,
+            ) as index_file:
+                marshal.dump(((MAGIC, __version__), entries), index_file)
+
+            os.replace(index_file.name, self.path)
+        except OSError as exc:
+            logger.debug(f"unable to write catalog index to {self.path}: {exc}")
+            return False
+
+        return True
+
+    def refresh(self) -> int:
+        """
+        Bring the catalog up to date with its directories.
+
+        Returns:
+            The number of entries that were added, changed or removed.
+        """
+
+        seen: Set[str] = set()
+        changed = 0
+
+        for directory in self.directories:
+            for item in _walk(directory):
+                seen.add(item.path)
+                changed += self._update(item)
+
+        stale = [
+            path
+            for path in self.entries
+            if path not in seen and self._directory(path) is not None
+        ]
+
+        for path in stale:
+            del self.entries[path]
+
+        changed += len(stale)
+
+        if changed:
+            logger.debug(f"catalog refreshed with {changed} changes")
+            self.save()
+
+        self._index()
+
+        return changed
+
+    def _update(self, item: os.DirEntry) -> bool:
+        """
+        Bring the entry of a file up to date, if the file changed.
+
+        Args:
+            item: the file
+
+        Returns:
+            True if the entry was added, changed or removed.
+        """
+
+        status = item.stat()
+        entry = self.entries.get(item.path)
+
+        if entry and (entry.mtime, entry.size) == (status.st_mtime_ns, status.st_size):
+            return False
+
+        result = probe(item.path)
+
+        if not result.valid:
+            return self.entries.pop(item.path, None) is not None
+
+        self.entries[item.path] = Entry(
+            item.path,
+            status.st_mtime_ns,
+            status.st_size,
+            result.file_format,
+            result.version,
+            result.release,
+            result.serial,
+            result.checksum,
+            digest(item.path),
+        )
+
+        return True
+
+    def find(self, name: str) -> Optional[str]:
+        """
+        Provide the path of a program, refreshing the catalog if need be.
+
+        Args:
+            name: a file name, a path relative to one of the directories,
+                or a release and serial code such as 88-840726
+
+        Returns:
+            The path of the program, or None if the catalog has no such
+            program.
+        """
+
+        path = self._lookup(name)
+
+        if path is not None and self._fresh(path):
+            return path
+
+        self.refresh()
+
+        return self._lookup(name)
+
+    def entry(self, name: str) -> Optional[Entry]:
+        """Provide the entry of a program, as found by name."""
+
+        path = self.find(name)
+
+        return self.entries.get(path) if path else None
+
+    def _lookup(self, name: str) -> Optional[str]:
+        """Provide the path the index has for a name."""
+
+        release = RELEASE.match(name)
+
+        if release:
+            return self.releases.get((int(release.group(1)), release.group(2)))
+
+        return self.names.get(name.replace(os.sep, "/"))
+
+    def _fresh(self, path: str) -> bool:
+        """Provide whether a file is as the index has it."""
+
+        entry = self.entries[path]
+
+        try:
+            status = os.stat(path)
+        except OSError:
+            return False
+
+        return (entry.mtime, entry.size) == (status.st_mtime_ns, status.st_size)
+
+    def _directory(self, path: str) -> Optional[str]:
+        """Provide the directory of the catalog a file is below, if any."""
+
+        for directory in self.directories:
+            if path.startswith(directory + os.sep):
+                return directory
+
+        return None
+
+    def _index(self) -> None:
+        """Build the lookups by name and by release from the entries."""
+
+        self.names, self.releases = {}, {}
+
+        for directory in self.directories:
+            for path in sorted(self.entries):
+                if self._directory(path) != directory:
+                    continue
+
+                entry = self.entries[path]
+                relative = os.path.relpath(path, directory).replace(os.sep, "/")
+
+                self.names.setdefault(relative, path)
+                self.names.setdefault(os.path.basename(path), path)
+                self.releases.setdefault((entry.release, entry.serial), path)
+
+
+def _walk(directory: str) -> Iterator[os.DirEntry]:
+    """
+    Provide every program file below a directory.
+
+    Links to directories are not followed, so a link back up the tree can
+    neither send the walk round in circles nor list a file twice.
+
+    Args:
+        directory: the directory to walk
+
+    Yields:
+        Each program file.
+    """
+
+    try:
+        items = list(os.scandir(directory))
+    except OSError:
+        return
+
+    for item in items:
+        if item.is_dir(follow_symlinks=False):
+            yield from _walk(item.path)
+        elif item.is_file() and item.name.lower().endswith(SUFFIXES):
+            yield item
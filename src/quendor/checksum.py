@@ -0,0 +1,53 @@
+"""Module for the checksum of zcode stories."""
+
+import functools
+from types import ModuleType
+from typing import Optional, Union
+
+from quendor.header import Header
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+@functools.lru_cache(maxsize=None)
+def _numpy() -> Optional[ModuleType]:
+    """Provide NumPy if it is installed, importing it once at most."""
+
+    try:
+        import numpy
+    except ImportError:
+        return None
+
+    return numpy
+
+
+def checksum(story: Buffer, length: int = 0) -> int:
+    """
+    Provide the checksum of a story, as the verify opcode computes it.
+
+    The checksum is the sum of every byte after the header, up to the
+    length of the story the header gives, modulo 0x10000. A story whose
+    header gives no length is summed to its end.
+
+    The bytes are summed in one bulk operation rather than one at a time:
+    by NumPy when it is installed and otherwise by the built in sum, which
+    runs over a bytes object without any Python code per byte.
+
+    Args:
+        story: the story image, as it was loaded
+        length: the length of the story, in bytes, from its header
+
+    Returns:
+        The checksum.
+    """
+
+    start = Header.SIZE
+    end = min(length, len(story)) if length else len(story)
+    body = memoryview(story)[start:end]
+    numpy = _numpy()
+
+    if numpy is not None:
+        total = numpy.frombuffer(body, dtype=numpy.uint8).sum(dtype=numpy.uint64)
+        return int(total) & 0xFFFF
+
+    return sum(body.tobytes()) & 0xFFFF
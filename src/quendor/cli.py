@@ -1,11 +1,10 @@
 """Command line interface module for Quendor."""
 
 import argparse
+import logging
 import sys
 import textwrap
 
-import logzero
-
 from quendor import __version__
 
 
@@ -40,6 +39,7 @@ def process_options(args: list) -> dict:
         "zcode",
         action="store",
         type=str,
+        nargs="?",
         help="z-code program to load",
     )
 
@@ -48,7 +48,7 @@ def process_options(args: list) -> dict:
         "--debug",
         action="store_const",
         dest="loglevel",
-        const=logzero.DEBUG,
+        const=logging.DEBUG,
         help="print debug logging",
     )
 
@@ -57,10 +57,28 @@ def process_options(args: list) -> dict:
         "--info",
         action="store_const",
         dest="loglevel",
-        const=logzero.INFO,
+        const=logging.INFO,
         help="print informative logging",
     )
 
+    parser.add_argument(
+        "-m",
+        "--mmap",
+        action="store_true",
+        help="memory-map the z-code program instead of reading it",
+    )
+
+    parser.add_argument(
+        "--probe",
+        action="store",
+        metavar="DIR",
+        help="report the version, release, serial and checksum of every"
+        " z-code program below DIR, reading only their headers",
+    )
+
+    add_diagnostic_options(parser)
+    add_serving_options(parser)
+
     parser.add_argument(
         "-v",
         "--version",
@@ -74,4 +92,74 @@ def process_options(args: list) -> dict:
 
     options = parser.parse_args(args)
 
+    if not options.zcode and not options.probe:
+        parser.error("the following arguments are required: zcode")
+
     return vars(options)
+
+
+def add_diagnostic_options(parser: argparse.ArgumentParser) -> None:
+    """Add the options for profiling and tracing a z-code program."""
+
+    parser.add_argument(
+        "-p",
+        "--profile",
+        action="store",
+        metavar="REPORT",
+        help="execute the z-code program under a profiler, writing a report"
+        " and a collapsed-stack file for flame graphs",
+    )
+
+    parser.add_argument(
+        "--profile-interval",
+        action="store",
+        type=float,
+        default=1.0,
+        metavar="MS",
+        help="milliseconds of CPU time between profile samples, or 0 to time"
+        " every instruction (default: 1)",
+    )
+
+    parser.add_argument(
+        "-t",
+        "--trace",
+        action="store",
+        type=int,
+        default=0,
+        metavar="COUNT",
+        help="keep a trace of the last COUNT instructions, dumped on a crash"
+        " or when the interpreter is sent SIGUSR1",
+    )
+
+
+def add_serving_options(parser: argparse.ArgumentParser) -> None:
+    """Add the options for serving sessions of a z-code program."""
+
+    parser.add_argument(
+        "-s",
+        "--serve",
+        action="store",
+        metavar="[HOST:]PORT",
+        help="serve sessions of the z-code program over TCP, one per"
+        " connection (host defaults to 127.0.0.1); the saves and transcripts"
+        " of a session last only as long as its connection",
+    )
+
+    parser.add_argument(
+        "-f",
+        "--fork",
+        action="store_true",
+        help="serve each connection from a child forked from a warm server"
+        " that has the z-code program loaded and decoded",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--workers",
+        action="store",
+        type=int,
+        default=0,
+        metavar="COUNT",
+        help="serve from COUNT worker processes that share the z-code program"
+        " in shared memory (default: serve from this process)",
+    )
@@ -0,0 +1,1020 @@
+"""Module for compiling hot zcode routines into Python functions."""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from quendor.arithmetic import arithmetic_shift, divide, remainder, shift, signed
+from quendor.errors import StackUnderflowError
+from quendor.instruction import Decoder, Instruction, VARIABLE, name
+from quendor.logging import logger
+from quendor.tables import copy_table, print_table, scan_table
+
+Routine = Callable[..., int]
+
+# A basic block of a routine: its address and its statements.
+
+Block = Tuple[int, List[str]]
+
+RETURNS = frozenset(("ret", "rtrue", "rfalse", "ret_popped", "print_ret"))
+
+# What the routine takes from the processor, looked up once per call, for
+# the names that the translation of a routine uses.
+
+PROLOGUE = {
+    "call": "processor.run_routine",
+    "decode": "processor.text.decode",
+    "write": "processor.streams.write",
+}
+
+
+class UncompilableRoutineError(Exception):
+    """Signal a routine that the compiler cannot translate."""
+
+
+class DeepCallsError(UncompilableRoutineError):
+    """Signal a routine whose calls nest too deeply to compile them all now."""
+
+
+class UncompiledCalleeError(UncompilableRoutineError):
+    """Signal a routine that calls a routine yet to be compiled."""
+
+    def __init__(self, address: int) -> None:
+        super().__init__(f"call to {address:05x}, not yet compiled")
+        self.address: int = address
+
+
+def underflow() -> int:
+    """
+    Report a compiled routine that pops its empty stack.
+
+    Raises:
+        StackUnderflowError: always
+    """
+
+    raise StackUnderflowError("Quendor found an empty stack in a compiled routine")
+
+
+NAMESPACE = {
+    "underflow": underflow,
+    "s": signed,
+    "divide": divide,
+    "remainder": remainder,
+    "shift": shift,
+    "arithmetic_shift": arithmetic_shift,
+    "copy_table": copy_table,
+    "scan_table": scan_table,
+    "print_table": print_table,
+}
+
+
+class Compiler:
+    """
+    Compiler of zcode routines into Python functions.
+
+    A routine is translated as a whole. Its instructions are found by
+    following every branch and jump from the start of the routine, the
+    branch and jump targets split them into basic blocks, and each basic
+    block becomes a straight run of Python statements with no dispatch
+    between instructions. A jump picks the block it goes to by a binary
+    search over the addresses of the blocks. The locals of the routine
+    become Python local variables and the evaluation stack becomes a
+    Python list.
+
+    The compiled function takes the processor and the call arguments and
+    returns the routine result. It never touches the frames of the
+    processor, so only routines that stay within their own frame can be
+    compiled. Printing goes straight to the output streams, and a routine
+    may call other routines, as long as they can be compiled too, so that
+    a call never has to wait for input. The routines it calls are compiled
+    first, however cold they are. Any routine that calls anything else,
+    reads or does anything else the compiler has no translation for is
+    left to the interpreter.
+    """
+
+    LIMIT = 1000
+    DEPTH = 32
+
+    def __init__(self, decoder: Decoder) -> None:
+        self.decoder: Decoder = decoder
+        self.memory = decoder.memory
+        self.version: int = decoder.version
+        self.globals: int = self.memory.header.globals
+        self.sources: Dict[int, str] = decoder.memory.program.cache.setdefault(
+            "sources",
+            {},
+        )
+        self.routines: Dict[int, Optional[Routine]] = (
+            decoder.memory.program.cache.setdefault("routines", {})
+        )
+        self.local_count: int = 0
+        self.position: int = 0
+        self.uses: Set[str] = set()
+        self.pending: Set[int] = set()
+
+    def compile(self, address: int) -> Optional[Routine]:  # noqa: A003
+        """
+        Compile the routine at an address.
+
+        Args:
+            address: the byte address of the routine header
+
+        The outcome is recorded with the compiled routines, as None if the
+        routine cannot be compiled, so that it is only ever looked at once.
+        A routine whose calls nested too deeply is not recorded, as it can
+        still be compiled once the routines it calls have been.
+
+        Args:
+            address: the byte address of the routine header
+
+        Returns:
+            The compiled routine, or None if it cannot be compiled, or not
+            yet.
+        """
+
+        self.pending.add(address)
+        routine: Optional[Routine] = None
+
+        try:
+            source = self.sources.get(address) or self._translate_calls(address)
+            routine = self.load(address, source)
+        except DeepCallsError as exc:
+            logger.debug(f"routine {address:05x} not compiled yet: {exc}")
+            self.sources.pop(address, None)
+            return None
+        except UncompilableRoutineError as exc:
+            logger.debug(f"routine {address:05x} not compiled: {exc}")
+            self.sources.pop(address, None)
+        else:
+            self.sources[address] = source
+        finally:
+            self.pending.discard(address)
+
+        self.routines[address] = routine
+
+        return routine
+
+    def _translate_calls(self, address: int) -> str:
+        """
+        Translate a routine, compiling the routines it calls first.
+
+        Each time the translation stops at a call to a routine that has
+        not been looked at yet, that routine is compiled and the routine
+        is translated again. A routine that is already being compiled
+        further up, as in recursion, cannot be waited for.
+
+        Args:
+            address: the byte address of the routine header
+
+        Returns:
+            The source of a function that executes the routine.
+
+        Raises:
+            UncompiledCalleeError: if the routine calls one of the routines
+                being compiled
+        """
+
+        while True:
+            try:
+                return self.translate(address)
+            except UncompiledCalleeError as exc:
+                if exc.address in self.pending:
+                    raise
+
+                self._compile_callee(exc)
+
+    def _compile_callee(self, callee: UncompiledCalleeError) -> None:
+        """
+        Compile the routine a translation stopped at, so it can carry on.
+
+        Args:
+            callee: what the translation stopped with
+
+        Raises:
+            DeepCallsError: if calls nest too deeply
+        """
+
+        if len(self.pending) > self.DEPTH:
+            raise DeepCallsError(f"calls nest deeper than {self.DEPTH}") from callee
+
+        self.compile(callee.address)
+
+        if callee.address not in self.routines:
+            raise DeepCallsError(
+                f"call to {callee.address:05x}, not yet compiled",
+            ) from callee
+
+    @staticmethod
+    def load(address: int, source: str) -> Routine:
+        """
+        Turn the source of a compiled routine into a function.
+
+        Args:
+            address: the byte address of the routine header
+            source: the Python source of the routine
+
+        Returns:
+            The compiled routine.
+
+        Raises:
+            UncompilableRoutineError: if the source is not valid Python, so
+                that the routine is left to the interpreter
+        """
+
+        namespace: Dict[str, Any] = dict(NAMESPACE)
+
+        try:
+            code = compile(source, f"<routine {address:05x}>", "exec")
+            exec(code, namespace)  # noqa: S102
+        except (RecursionError, SyntaxError, ValueError) as exc:
+            raise UncompilableRoutineError(f"translation is not valid: {exc}") from exc
+
+        return namespace[f"routine_{address:05x}"]
+
+    def translate(self, address: int) -> str:
+        """
+        Translate the routine at an address into Python source.
+
+        Args:
+            address: the byte address of the routine header
+
+        Returns:
+            The source of a function that executes the routine.
+
+        Raises:
+            UncompilableRoutineError: if the routine cannot be compiled
+        """
+
+        if address < self.memory.dynamic_size:
+            raise UncompilableRoutineError("routine is in dynamic memory")
+
+        count = self.memory.read_byte(address)
+        start = address + 1
+        initial = [0] * count
+
+        if self.version <= 4:
+            initial = [
+                self.memory.read_word(start + 2 * index) for index in range(count)
+            ]
+            start += 2 * count
+
+        self.local_count = count
+        self.position = 0
+        self.uses = set()
+        instructions, targets = self._discover(start)
+        blocks = self._blocks(instructions, targets)
+
+        lines = [
+            f"def routine_{address:05x}(processor, arguments):",
+            "    memory = processor.memory",
+            "    rb = memory.read_byte",
+            "    rw = memory.read_word",
+            "    wb = memory.write_byte",
+            "    ww = memory.write_word",
+            "    argc = len(arguments)",
+            "    stack = []",
+            "    count = 0",
+        ]
+        lines.extend(f"    {use} = {PROLOGUE[use]}" for use in sorted(self.uses))
+
+        if count:
+            local_names = ", ".join(f"l{index}" for index in range(1, count + 1))
+            lines.append(f"    values = {initial!r}")
+            lines.append(f"    values[0:argc] = arguments[0:{count}]")
+            lines.append(f"    {local_names}, = values")
+
+        lines.append(f"    block = {start}")
+        lines.append("    try:")
+        lines.append("        while True:")
+        lines.extend(blocks)
+        lines.append("    finally:")
+        lines.append("        processor.instructions += count")
+
+        return "\n".join(lines) + "\n"
+
+    def _discover(self, start: int) -> tuple:
+        """
+        Find every instruction of a routine that can be reached.
+
+        Args:
+            start: the address of the first instruction of the routine
+
+        Returns:
+            The instructions by address and the addresses that begin blocks.
+        """
+
+        instructions: Dict[int, Instruction] = {}
+        targets = {start}
+        pending = [start]
+
+        while pending:
+            jumps = self._trace(pending.pop(), instructions)
+            targets.update(jumps)
+            pending.extend(jumps)
+
+        return instructions, targets
+
+    def _trace(self, pc: int, instructions: Dict[int, Instruction]) -> List[int]:
+        """
+        Decode a straight run of instructions, up to a jump or a return.
+
+        Args:
+            pc: the address of the first instruction of the run
+            instructions: the instructions decoded so far, by address, which
+                the run is added to
+
+        Returns:
+            The addresses the instructions of the run can branch or jump to.
+
+        Raises:
+            UncompilableRoutineError: if the routine is too long
+        """
+
+        jumps: List[int] = []
+
+        while pc not in instructions:
+            instruction = self.decoder.decode(pc)
+            instructions[pc] = instruction
+
+            if len(instructions) > self.LIMIT:
+                raise UncompilableRoutineError("routine is too long")
+
+            found, continues = self._successors(instruction)
+            jumps.extend(found)
+
+            if not continues:
+                break
+
+            pc = instruction.next
+
+        return jumps
+
+    def _successors(self, instruction: Instruction) -> Tuple[List[int], bool]:
+        """
+        Provide where control can go after an instruction.
+
+        Args:
+            instruction: the instruction
+
+        Returns:
+            The addresses the instruction can branch or jump to, and whether
+            it can carry on to the next instruction.
+
+        Raises:
+            UncompilableRoutineError: if the instruction cannot be translated
+        """
+
+        opcode_name = self._name(instruction)
+
+        if not hasattr(self, f"_emit_{opcode_name}"):
+            raise UncompilableRoutineError(f"no translation for {opcode_name}")
+
+        jumps = [instruction.branch_target] if instruction.branch_target > 1 else []
+
+        if opcode_name == "jump":
+            jumps.append(self._jump_target(instruction))
+
+        return jumps, opcode_name != "jump" and opcode_name not in RETURNS
+
+    def _name(self, instruction: Instruction) -> str:
+        """Provide the name of an instruction for this version."""
+
+        if self.version <= 4 and instruction.opcode == 0x8F:
+            return "not"
+
+        if self.version <= 4 and instruction.opcode == 0xB9:
+            return "pop"
+
+        return name(instruction.opcode)
+
+    @staticmethod
+    def _jump_target(instruction: Instruction) -> int:
+        """Provide the address a jump instruction goes to."""
+
+        if instruction.variables:
+            raise UncompilableRoutineError("jump to a computed address")
+
+        return instruction.next + signed(instruction.operands[0]) - 2
+
+    def _blocks(self, instructions: Dict[int, Instruction], targets: set) -> List[str]:
+        """
+        Provide the source for the basic blocks of a routine.
+
+        Args:
+            instructions: the reachable instructions, by address
+            targets: the addresses that begin blocks
+
+        Returns:
+            The lines of source for the body of the dispatch loop.
+        """
+
+        bodies: List[Block] = []
+
+        for address in sorted(instructions):
+            if address in targets:
+                bodies.append((address, []))
+                self.position = 0
+
+            instruction = instructions[address]
+            self.position += 1
+            bodies[-1][1].extend(self._emit(instruction))
+            bodies[-1][1].extend(self._fall_through(instruction, instructions, targets))
+
+        return [f"            {line}" for line in self._dispatch(bodies)]
+
+    def _fall_through(
+        self,
+        instruction: Instruction,
+        instructions: Dict[int, Instruction],
+        targets: set,
+    ) -> List[str]:
+        """
+        Provide the statements that carry on from an instruction to the next.
+
+        Args:
+            instruction: the instruction
+            instructions: the reachable instructions, by address
+            targets: the addresses that begin blocks
+
+        Returns:
+            A transfer to the next block, if the next instruction begins one
+            and control can carry on to it, or nothing.
+
+        Raises:
+            UncompilableRoutineError: if control can run off the routine
+        """
+
+        opcode_name = self._name(instruction)
+
+        if opcode_name in RETURNS or opcode_name == "jump":
+            return []
+
+        if instruction.next not in instructions:
+            raise UncompilableRoutineError("routine runs past its end")
+
+        return self._goto(instruction.next) if instruction.next in targets else []
+
+    def _dispatch(self, bodies: Sequence[Block]) -> List[str]:
+        """
+        Provide the source that picks a basic block and executes it.
+
+        The blocks are picked by a binary search over their addresses, so
+        that a jump costs a handful of comparisons however many blocks the
+        routine has, and a jump back to the top of a long loop costs no
+        more than any other.
+
+        Args:
+            bodies: the address and statements of each block, by address
+
+        Returns:
+            The lines of source, indented from the dispatch loop.
+        """
+
+        if len(bodies) == 1:
+            return bodies[0][1]
+
+        middle = len(bodies) // 2
+        lines = [f"if block < {bodies[middle][0]}:"]
+        lines.extend(f"    {line}" for line in self._dispatch(bodies[:middle]))
+        lines.append("else:")
+        lines.extend(f"    {line}" for line in self._dispatch(bodies[middle:]))
+
+        return lines
+
+    def _emit(self, instruction: Instruction) -> List[str]:
+        """Provide the source for a single instruction."""
+
+        lines: List[str] = []
+        operands: List[str] = []
+
+        for kind, value in zip(  # noqa: B905
+            instruction.operand_types,
+            instruction.operands,
+        ):
+            operands.append(self._read(value) if kind == VARIABLE else str(value))
+
+        if any("pop" in operand for operand in operands):
+            temporaries = [f"t{index}" for index in range(len(operands))]
+            lines.append(f"{', '.join(temporaries)}, = {', '.join(operands)},")
+            operands = temporaries
+
+        emitter = getattr(self, f"_emit_{self._name(instruction)}")
+        lines.extend(emitter(instruction, operands))
+
+        return lines
+
+    # Variables.
+
+    def _local(self, number: int) -> str:
+        """Provide the name of a local variable."""
+
+        if number > self.local_count:
+            raise UncompilableRoutineError(f"local {number} does not exist")
+
+        return f"l{number}"
+
+    def _read(self, number: int) -> str:
+        """Provide an expression that reads a variable, popping the stack."""
+
+        if number == 0:
+            return "(stack.pop() if stack else underflow())"
+
+        if number < 16:
+            return self._local(number)
+
+        return f"rw({self.globals + 2 * (number - 16)})"
+
+    def _write(self, number: int, expression: str) -> str:
+        """Provide a statement that writes a variable, pushing the stack."""
+
+        if number == 0:
+            return f"stack.append(({expression}) & 0xFFFF)"
+
+        if number < 16:
+            return f"{self._local(number)} = ({expression}) & 0xFFFF"
+
+        return f"ww({self.globals + 2 * (number - 16)}, {expression})"
+
+    def _reference(self, instruction: Instruction) -> int:
+        """Provide the variable an instruction refers to by number."""
+
+        if instruction.operand_types[0] == VARIABLE:
+            raise UncompilableRoutineError("variable reference is computed")
+
+        return instruction.operands[0]
+
+    def _read_indirect(self, number: int) -> str:
+        """Provide an expression that reads a variable, peeking the stack."""
+
+        return (
+            "stack[-1 if stack else underflow()]" if number == 0 else self._read(number)
+        )
+
+    def _write_indirect(self, number: int, expression: str) -> str:
+        """Provide a statement that writes a variable, replacing the stack."""
+
+        if number == 0:
+            return f"stack[-1 if stack else underflow()] = ({expression}) & 0xFFFF"
+
+        return self._write(number, expression)
+
+    def _store(self, instruction: Instruction, expression: str) -> List[str]:
+        """Provide a statement that stores the result of an instruction."""
+
+        return [self._write(instruction.store, expression)]
+
+    def _goto(self, target: int) -> List[str]:
+        """
+        Provide the statements that transfer control to an address.
+
+        Every transfer out of a block first counts the instructions that
+        were executed in the block to get there.
+
+        Args:
+            target: the address, or 0 or 1 to return false or true
+
+        Returns:
+            The lines of source for the transfer.
+        """
+
+        if target in (0, 1):
+            return self._return(str(target))
+
+        return [f"count += {self.position}", f"block = {target}", "continue"]
+
+    def _return(self, expression: str) -> List[str]:
+        """Provide the statements that return from the routine."""
+
+        return [f"count += {self.position}", f"return {expression}"]
+
+    @staticmethod
+    def _signed(operand: str) -> str:
+        """Provide an expression for the signed value of an operand."""
+
+        if operand.isdigit():
+            return str(signed(int(operand)))
+
+        return f"s({operand})"
+
+    def _branch(self, instruction: Instruction, condition: str) -> List[str]:
+        """Provide the statements of a branch on a condition."""
+
+        test = condition if instruction.branch_on else f"not ({condition})"
+
+        return [f"if {test}:"] + [
+            f"    {line}" for line in self._goto(instruction.branch_target)
+        ]
+
+    # Instructions.
+
+    def _emit_je(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        first, *rest = operands
+
+        # A je with nothing to compare against never branches.
+
+        if not rest:
+            return self._branch(instruction, "False")
+
+        return self._branch(instruction, f"{first} in ({', '.join(rest)},)")
+
+    def _emit_jl(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        first, second = operands
+        return self._branch(
+            instruction,
+            f"{self._signed(first)} < {self._signed(second)}",
+        )
+
+    def _emit_jg(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        first, second = operands
+        return self._branch(
+            instruction,
+            f"{self._signed(first)} > {self._signed(second)}",
+        )
+
+    def _emit_jz(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return self._branch(instruction, f"{operands[0]} == 0")
+
+    def _emit_test(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        bitmap, flags = operands
+        return self._branch(instruction, f"{bitmap} & {flags} == {flags}")
+
+    def _emit_check_arg_count(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._branch(instruction, f"{operands[0]} <= argc")
+
+    def _emit_piracy(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._branch(instruction, "True")
+
+    def _emit_verify(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        # The story cannot change, so neither can the outcome.
+
+        return self._branch(instruction, str(self.memory.program.verified))
+
+    def _emit_jump(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._goto(self._jump_target(instruction))
+
+    def _emit_inc_chk(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._check(instruction, operands, "+", ">")
+
+    def _emit_dec_chk(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._check(instruction, operands, "-", "<")
+
+    def _check(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+        step: str,
+        comparison: str,
+    ) -> List[str]:
+        """Provide the source of an increment or decrement and check."""
+
+        reference = self._reference(instruction)
+        value = self._read_indirect(reference)
+
+        return [
+            f"v = s({value}) {step} 1",
+            self._write_indirect(reference, "v"),
+        ] + self._branch(instruction, f"v {comparison} {self._signed(operands[1])}")
+
+    def _emit_inc(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        reference = self._reference(instruction)
+        value = self._read_indirect(reference)
+        return [self._write_indirect(reference, f"{value} + 1")]
+
+    def _emit_dec(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        reference = self._reference(instruction)
+        value = self._read_indirect(reference)
+        return [self._write_indirect(reference, f"{value} - 1")]
+
+    def _emit_or(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return self._store(instruction, f"{operands[0]} | {operands[1]}")
+
+    def _emit_and(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return self._store(instruction, f"{operands[0]} & {operands[1]}")
+
+    def _emit_not(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return self._store(instruction, f"~{operands[0]}")
+
+    def _emit_add(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return self._store(instruction, f"{operands[0]} + {operands[1]}")
+
+    def _emit_sub(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return self._store(instruction, f"{operands[0]} - {operands[1]}")
+
+    def _emit_mul(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return self._store(instruction, f"{operands[0]} * {operands[1]}")
+
+    def _emit_div(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return self._store(instruction, f"divide({operands[0]}, {operands[1]})")
+
+    def _emit_mod(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return self._store(instruction, f"remainder({operands[0]}, {operands[1]})")
+
+    def _emit_log_shift(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._store(instruction, f"shift({operands[0]}, {operands[1]})")
+
+    def _emit_art_shift(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        expression = f"arithmetic_shift({operands[0]}, {operands[1]})"
+        return self._store(instruction, expression)
+
+    def _emit_store(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return [self._write_indirect(self._reference(instruction), operands[1])]
+
+    def _emit_load(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        value = self._read_indirect(self._reference(instruction))
+        return self._store(instruction, value)
+
+    def _emit_loadw(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        array, index = operands
+        return self._store(instruction, f"rw(({array} + 2 * {index}) & 0xFFFF)")
+
+    def _emit_loadb(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        array, index = operands
+        return self._store(instruction, f"rb(({array} + {index}) & 0xFFFF)")
+
+    def _emit_storew(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        array, index, value = operands
+        return [f"ww(({array} + 2 * {index}) & 0xFFFF, {value})"]
+
+    def _emit_storeb(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        array, index, value = operands
+        return [f"wb(({array} + {index}) & 0xFFFF, {value})"]
+
+    def _emit_copy_table(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        first, second, size = operands
+        return [f"copy_table(memory, {first}, {second}, s({size}))"]
+
+    def _emit_scan_table(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        value, table, count, *form = operands
+        entry = form[0] if form else 0x82
+        search = f"scan_table(memory, {value}, {table}, {count}, {entry})"
+
+        return (
+            [f"found = {search}"]
+            + self._store(instruction, "found")
+            + self._branch(instruction, "found")
+        )
+
+    def _emit_push(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return [f"stack.append({operands[0]})"]
+
+    def _emit_pull(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        if instruction.store >= 0:
+            raise UncompilableRoutineError("pull from a user stack")
+
+        reference = self._reference(instruction)
+        return [f"v = {self._read(0)}", self._write_indirect(reference, "v")]
+
+    def _emit_pop(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return [self._read(0)]
+
+    def _emit_nop(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return ["pass"]
+
+    def _emit_ret(self, instruction: Instruction, operands: Sequence[str]) -> List[str]:
+        return self._return(operands[0])
+
+    def _emit_rtrue(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._return("1")
+
+    def _emit_rfalse(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._return("0")
+
+    def _emit_call_vs(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._store(instruction, self._call(instruction, operands))
+
+    def _emit_call_vn(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return [self._call(instruction, operands)]
+
+    _emit_call_1s = _emit_call_2s = _emit_call_vs2 = _emit_call_vs
+    _emit_call_1n = _emit_call_2n = _emit_call_vn2 = _emit_call_vn
+
+    def _call(self, instruction: Instruction, operands: Sequence[str]) -> str:
+        """
+        Provide an expression that calls a routine and gives its result.
+
+        Args:
+            instruction: the call instruction
+            operands: the packed address of the routine and the arguments
+
+        Returns:
+            The expression.
+
+        Raises:
+            UncompilableRoutineError: if the routine is computed or cannot
+                be compiled
+            UncompiledCalleeError: if the routine has yet to be compiled
+        """
+
+        if instruction.operand_types[0] == VARIABLE:
+            raise UncompilableRoutineError("call to a computed routine")
+
+        packed = instruction.operands[0]
+
+        if packed == 0:
+            return "0"
+
+        address = self._unpack(packed)
+
+        if address not in self.routines:
+            raise UncompiledCalleeError(address)
+
+        if self.routines[address] is None:
+            raise UncompilableRoutineError(f"call to {address:05x}, not compiled")
+
+        self.uses.add("call")
+
+        return f"call({packed}, [{', '.join(operands[1:])}])"
+
+    def _unpack(self, packed: int) -> int:
+        """Provide the byte address of a packed routine address."""
+
+        header = self.memory.header
+
+        if self.version in (6, 7):
+            return packed * 4 + header.routines_offset * 8
+
+        return packed * header.length_scale
+
+    def _write_text(self, expression: str) -> List[str]:
+        """Provide a statement that prints text to the output streams."""
+
+        self.uses.add("write")
+
+        return [f"write({expression})"]
+
+    def _decode(self, address: str) -> str:
+        """Provide an expression for the text of the string at an address."""
+
+        self.uses.add("decode")
+
+        return f"decode({address})"
+
+    def _emit_print(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._write_text(self._decode(str(instruction.text)))
+
+    def _emit_print_ret(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        text = self._decode(str(instruction.text))
+        return self._write_text(f'{text} + "\\n"') + self._return("1")
+
+    def _emit_print_addr(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._write_text(self._decode(operands[0]))
+
+    def _emit_print_paddr(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        address = f"processor.unpack_string({operands[0]})"
+        return self._write_text(self._decode(address))
+
+    def _emit_print_obj(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        address = f"processor.objects.short_name({operands[0]})"
+        return self._write_text(self._decode(address))
+
+    def _emit_print_char(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._write_text(f"processor.text.zscii({operands[0]})")
+
+    def _emit_print_unicode(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._write_text(f"chr({operands[0]})")
+
+    def _emit_print_num(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._write_text(f"str(s({operands[0]}))")
+
+    def _emit_print_table(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._write_text(f"print_table(processor.text, {', '.join(operands)})")
+
+    def _emit_new_line(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._write_text('"\\n"')
+
+    def _emit_ret_popped(
+        self,
+        instruction: Instruction,
+        operands: Sequence[str],
+    ) -> List[str]:
+        return self._return(self._read(0))
@@ -0,0 +1,282 @@
+"""Module for dictionary lookup and tokenisation of player input."""
+
+import re
+from typing import Dict, FrozenSet, List, Pattern, Tuple
+
+from quendor.arithmetic import signed
+from quendor.memory import Memory
+from quendor.text import TextDecoder
+
+
+class Dictionary:
+    """
+    Index of a dictionary table.
+
+    A dictionary table starts with the word separators, followed by the
+    length of each entry and the number of entries. Each entry starts with
+    the encoded form of a word. A story dictionary is sorted so that it can
+    be searched, while a custom dictionary may be unsorted, which it says
+    with a negative number of entries.
+
+    Rather than searching the table in memory for every word, the table is
+    read once into a hash table from encoded word to entry address, and the
+    separators into a set. Where two entries encode the same word, the
+    first one is the one that is found, as it would be by a search.
+    """
+
+    def __init__(self, memory: Memory, address: int, word_length: int) -> None:
+        read_byte = memory.read_byte
+
+        count = read_byte(address)
+        separators = bytes(memory.read_bytes(address + 1, count))
+
+        self.address: int = address
+        self.separators: FrozenSet[int] = frozenset(separators)
+        self.words: Pattern[bytes] = re.compile(b"[^ ]+")
+
+        if separators:
+            escaped = re.escape(separators)
+            self.words = re.compile(b"[" + escaped + b"]|[^ " + escaped + b"]+")
+
+        header = address + 1 + count
+
+        self.entry_length: int = read_byte(header)
+        self.count: int = abs(signed(memory.read_word(header + 1)))
+        self.start: int = header + 3
+        self.length: int = self.start + self.count * self.entry_length - address
+
+        table = memory.read_bytes(self.start, self.count * self.entry_length)
+        step = self.entry_length
+
+        self.entries: Dict[bytes, int] = {}
+
+        for offset in range(0, len(table), step):
+            end = offset + word_length
+            self.entries.setdefault(bytes(table[offset:end]), self.start + offset)
+
+    def lookup(self, encoded: bytes) -> int:
+        """Provide the address of the entry for an encoded word, or 0."""
+
+        return self.entries.get(encoded, 0)
+
+    def split(self, codes: bytes) -> List[Tuple[int, int]]:
+        """
+        Split input into words.
+
+        Spaces end a word, and each separator is a word in its own right.
+
+        Args:
+            codes: the ZSCII codes of the input
+
+        Returns:
+            The offset and length of each word in the input.
+        """
+
+        return [
+            (match.start(), match.end() - match.start())
+            for match in self.words.finditer(codes)
+        ]
+
+
+class Tokenizer:
+    """
+    Abstraction for splitting player input into dictionary words.
+
+    The story dictionary, and any custom dictionary that sits in static
+    memory, cannot change, so each is indexed once per program and kept in
+    a cache shared by every session, keyed by table address. A custom
+    dictionary in dynamic memory is indexed per session and kept with the
+    bytes it was indexed from, and it is indexed again once they change.
+    """
+
+    def __init__(self, memory: Memory, text: TextDecoder) -> None:
+        self.memory: Memory = memory
+        self.text: TextDecoder = text
+        self.version: int = memory.header.version
+        self.word_length: int = 4 if self.version <= 3 else 6
+        self.dictionaries: Dict[int, Dictionary] = memory.program.cache.setdefault(
+            "dictionaries",
+            {},
+        )
+        self.dynamic_dictionaries: Dict[int, Tuple[bytes, Dictionary]] = {}
+        self.codes: Dict[str, int] = {
+            char: code for code, char in text.characters.items()
+        }
+        self.translation: Dict[int, int] = {
+            **dict.fromkeys((*range(32), *range(127, 256)), 63),
+            **{ord(char): code for char, code in self.codes.items()},
+            10: 13,
+        }
+        self.zchars: Dict[int, Tuple[int, ...]] = self._zchars()
+        self.escape: Tuple[int, int] = (5 if self.version >= 3 else 3, 6)
+
+    def _zchars(self) -> Dict[int, Tuple[int, ...]]:
+        """
+        Provide the Z-characters that encode each character of the alphabets.
+
+        Characters of the first alphabet are encoded as themselves, while
+        the others need a shift first. Anything else has to be escaped.
+
+        Returns:
+            The Z-characters for each ZSCII code in the alphabets.
+        """
+
+        shifts = ((), (4,), (5,)) if self.version >= 3 else ((), (2,), (3,))
+        zchars: Dict[int, Tuple[int, ...]] = {}
+
+        for alphabet in (2, 1, 0):
+            chars = self.text.alphabets[alphabet]
+            zchars.update(
+                (self.zscii(chars[index]), shifts[alphabet] + (index + 6,))
+                for index in range(2 if alphabet == 2 else 0, len(chars))
+            )
+
+        return zchars
+
+    def dictionary(self, address: int = 0) -> Dictionary:
+        """
+        Provide the index of a dictionary table.
+
+        Args:
+            address: the byte address of the table, or 0 for the story
+                dictionary
+
+        Returns:
+            The index of the dictionary.
+        """
+
+        address = address or self.memory.header.dictionary
+
+        if address >= self.memory.dynamic_size:
+            index = self.dictionaries.get(address)
+
+            if index is None:
+                index = Dictionary(self.memory, address, self.word_length)
+                self.dictionaries[address] = index
+
+            return index
+
+        cached = self.dynamic_dictionaries.get(address)
+
+        if cached is not None:
+            table, index = cached
+            end = address + len(table)
+
+            if self.memory.dynamic[address:end] == table:
+                return index
+
+        index = Dictionary(self.memory, address, self.word_length)
+        table = bytes(self.memory.read_bytes(address, index.length))
+        self.dynamic_dictionaries[address] = (table, index)
+
+        return index
+
+    def zscii(self, char: str) -> int:
+        """Provide the ZSCII code for a character, or that of "?"."""
+
+        code = ord(char)
+
+        if 32 <= code <= 126:
+            return code
+
+        if char == "\n":
+            return 13
+
+        return self.codes.get(char, 63)
+
+    def zscii_codes(self, text: str) -> bytes:
+        """
+        Provide the ZSCII codes for a run of text.
+
+        The run is translated as a whole, as zscii translates a character:
+        the printable ASCII range is left as it is, and anything that has
+        no ZSCII code becomes a "?".
+
+        Args:
+            text: the text
+
+        Returns:
+            The ZSCII codes.
+        """
+
+        return text.translate(self.translation).encode("latin-1", "replace")
+
+    def encode(self, codes: bytes) -> bytes:
+        """
+        Encode a word in the form used by dictionary entries.
+
+        The word is encoded as Z-characters, truncated or padded to the
+        length of a dictionary word, and packed three to a word with the
+        last one marked as the end of the string.
+
+        Args:
+            codes: the ZSCII codes of the word
+
+        Returns:
+            The encoded word.
+        """
+
+        limit = self.word_length // 2 * 3
+        zchars: List[int] = []
+        escape = self.escape
+
+        for code in codes:
+            zchars.extend(self.zchars.get(code) or escape + (code >> 5, code & 0x1F))
+
+        zchars = (zchars + [5] * limit)[:limit]
+        encoded = bytearray()
+
+        for index in range(0, limit, 3):
+            word = (zchars[index] << 10) | (zchars[index + 1] << 5) | zchars[index + 2]
+            encoded += word.to_bytes(2, "big")
+
+        encoded[-2] |= 0x80
+
+        return bytes(encoded)
+
+    def tokenise(
+        self,
+        text_buffer: int,
+        parse_buffer: int,
+        dictionary: int = 0,
+        skip: bool = False,
+    ) -> None:
+        """
+        Split the input in a text buffer into a parse buffer.
+
+        Each word of the input is looked up in the dictionary, and the
+        address of its entry, its length and its position in the text
+        buffer are written to the parse buffer.
+
+        Args:
+            text_buffer: the byte address of the text buffer
+            parse_buffer: the byte address of the parse buffer
+            dictionary: the byte address of the dictionary, or 0 for the
+                story dictionary
+            skip: whether to leave the entries of unknown words untouched
+        """
+
+        memory = self.memory
+
+        if self.version >= 5:
+            start = text_buffer + 2
+            codes = bytes(memory.read_bytes(start, memory.read_byte(text_buffer + 1)))
+        else:
+            start = text_buffer + 1
+            codes = bytes(memory.read_bytes(start, memory.read_byte(text_buffer)))
+            codes = codes.split(b"\0", 1)[0]
+
+        index = self.dictionary(dictionary)
+        words = index.split(codes)[: memory.read_byte(parse_buffer)]
+
+        memory.write_byte(parse_buffer + 1, len(words))
+
+        for number, (offset, length) in enumerate(words):
+            end = offset + length
+            entry = index.lookup(self.encode(codes[offset:end]))
+            block = parse_buffer + 2 + 4 * number
+
+            if entry or not skip:
+                memory.write_word(block, entry)
+                memory.write_byte(block + 2, length)
+                memory.write_byte(block + 3, offset + start - text_buffer)
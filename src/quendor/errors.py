@@ -1,47 +1,80 @@
 """Error repository module for Quendor-specific exceptions."""
 
-import inspect
 import ntpath
 import sys
 
-from termcolor import colored
-
 
 class QuendorError(Exception):
-    """Raise Quendor-specific execption."""
+    """
+    Raise Quendor-specific execption.
+
+    The error is an ordinary exception, so a program that embeds Quendor
+    can handle it. Where it was raised is kept, for the report the command
+    line interface exits with.
+    """
 
     def __init__(self, msg: str) -> None:
-        try:
-            source_name = inspect.currentframe().f_back.f_code.co_name  # type: ignore
-            source_file = ntpath.basename(
-                inspect.currentframe().f_back.f_code.co_filename,  # type: ignore
-            )
-            source_line = sys.exc_info()[-1].tb_lineno  # type: ignore
-        except AttributeError:
-            source_line = inspect.currentframe().f_back.f_lineno  # type: ignore
+        # The frame that raised the error is taken as it is rather than
+        # through inspect, which is slow to import and to call.
+
+        frame = sys._getframe(1)
+        traceback = sys.exc_info()[-1]
+
+        super().__init__(msg)
+
+        self.msg: str = msg
+        self.source_name: str = frame.f_code.co_name
+        self.source_file: str = ntpath.basename(frame.f_code.co_filename)
+        self.source_line: int = traceback.tb_lineno if traceback else frame.f_lineno
+
+    def report(self) -> str:
+        """Provide the error as it is shown to the user on a terminal."""
 
-        error = colored(type(self).__name__, "red", attrs=["bold"])
-        msg = colored(msg, "red", attrs=["bold"])
-        source_name = colored(source_name, "yellow")
-        source_file = colored(source_file, "yellow")
+        from termcolor import colored
 
-        self.args = (
+        return (
             "\nQuendor Problem: {0}\nOccurred in: {1} in {2} (line {3})\n{4}\n".format(
-                error,
-                source_name,
-                source_file,
-                source_line,
-                msg,
-            ),
+                colored(type(self).__name__, "red", attrs=["bold"]),
+                colored(self.source_name, "yellow"),
+                colored(self.source_file, "yellow"),
+                self.source_line,
+                colored(self.msg, "red", attrs=["bold"]),
+            )
         )
 
-        sys.exit(self)
+
+class DivisionByZeroError(QuendorError):
+    """Raise for a zcode program that divides by zero."""
+
+
+class IllegalMemoryAccessError(QuendorError):
+    """Raise for a memory access outside of what a region allows."""
+
+
+class InvalidBlorbFileError(QuendorError):
+    """Raise for a blorb file whose resources cannot be read."""
+
+
+class InvalidObjectError(QuendorError):
+    """Raise for an object or property that is not in the object table."""
 
 
 class InvalidZcodeProgramFormatError(QuendorError):
     """Raise for a program with an non-IFRS format."""
 
 
+class InvalidZcodeProgramHeaderError(QuendorError):
+    """Raise for a zcode program with a missing or truncated header."""
+
+
+class OutputStreamError(QuendorError):
+    """Raise for an output stream that cannot be selected or deselected."""
+
+
+class StackUnderflowError(QuendorError):
+    """Raise for a zcode program that pops from an empty stack."""
+
+
 class UnableToAccessZcodeProgramError(QuendorError):
     """Raise for a zcode program file that cannot be opened or read from."""
 
@@ -50,9 +83,17 @@ class UnableToLocateZcodeProgramError(QuendorError):
     """Raise for a zcode program file that cannot be located."""
 
 
+class UnimplementedOpcodeError(QuendorError):
+    """Raise for a zcode instruction that Quendor cannot execute."""
+
+
 class UnknownZCodeProgramFormatError(QuendorError):
     """Raise for a zcode program with an undetermined format."""
 
 
+class UnsupportedPythonVersionError(QuendorError):
+    """Raise for a feature the running version of Python cannot provide."""
+
+
 class UnsupportedZcodeProgramTypeError(QuendorError):
     """Raise for a zcode program that cannot be interpreted."""
@@ -0,0 +1,220 @@
+"""Module for starting sessions from a warm, pre-forking server."""
+
+import gc
+import os
+import signal
+import socket
+from typing import BinaryIO, Dict, Optional
+
+from quendor.cache import StoryCache
+from quendor.errors import QuendorError
+from quendor.logging import logger
+from quendor.processor import InputPendingError, Processor, Reader
+from quendor.program import Program
+from quendor.session import listen, private_files
+
+
+def rehearse(program: Program) -> None:
+    """
+    Run a story up to its first read, on a processor that is thrown away.
+
+    The processor shares the program caches, so what it decodes and
+    compiles on the way is left there for the sessions of the story.
+
+    Args:
+        program: the program of the story
+    """
+
+    def pending() -> str:
+        raise InputPendingError
+
+    try:
+        Processor(program, output=lambda text: None, reader=pending).run()
+    except QuendorError as exc:
+        logger.warning(f"{program.file} stopped before its first read: {exc}")
+
+
+class ForkServer:
+    """
+    Abstraction for a server that forks a ready session for each client.
+
+    The server loads and warms its stories once. The story cache of each
+    story is loaded, with its decoded instructions and the sources of its
+    compiled routines, and a throwaway processor runs the story up to its
+    first read, which decodes, and compiles the hot routines of, all that
+    the opening of the story executes. The routines in the cache are then
+    compiled, and a processor is built that has yet to execute anything.
+    What the warming found is saved to the story cache. Everything the
+    server holds is then moved into the permanent generation of the garbage
+    collector, so that collections in a child do not write to, and so copy,
+    the pages it shares with the server.
+
+    Each connection is handed to a child forked from the server, which
+    takes the processor of its story as it is and runs it on the
+    connection. The child shares the memory of the server copy-on-write,
+    so a session starts in the time it takes to fork, without importing,
+    reading or decoding anything.
+    """
+
+    def __init__(self, programs: Dict[str, Program]) -> None:
+        self.programs: Dict[str, Program] = programs
+        self.processors: Dict[str, Processor] = {}
+
+    def warm(self) -> None:
+        """Build a ready processor for each story and freeze the heap."""
+
+        for name, program in self.programs.items():
+            cache = StoryCache(program)
+            cache.load()
+            rehearse(program)
+
+            processor = Processor(program)
+
+            for address in list(program.cache.get("sources", {})):
+                if address not in processor.routines:
+                    processor.compiler.compile(address)
+
+            self.processors[name] = processor
+            cache.save()
+
+        gc.collect()
+        gc.freeze()
+
+    def serve(self, listener: socket.socket) -> None:
+        """
+        Fork a session for each connection to a listening socket.
+
+        This runs until it is interrupted. Children are left for the system
+        to reap, so none of them lingers once its session ends.
+
+        Args:
+            listener: the listening socket
+        """
+
+        previous = signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+        try:
+            while True:
+                client, _ = listener.accept()
+
+                with client:
+                    self.spawn(client, listener)
+        finally:
+            signal.signal(signal.SIGCHLD, previous)
+
+    def spawn(
+        self,
+        client: socket.socket,
+        listener: Optional[socket.socket] = None,
+    ) -> int:
+        """
+        Fork a child that runs a session on a connection.
+
+        The child never returns from this method; it exits once the session
+        ends, without running any of the clean up of the server.
+
+        Args:
+            client: the connection to the client
+            listener: the listening socket of the server, which the child
+                closes
+
+        Returns:
+            The process ID of the child.
+        """
+
+        pid = os.fork()
+
+        if pid:
+            return pid
+
+        status = 1
+
+        try:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+            if listener is not None:
+                listener.close()
+
+            status = self.play(client)
+        except Exception:
+            logger.exception("forked session failed")
+        finally:
+            os._exit(status)
+
+    def play(self, client: socket.socket) -> int:
+        """
+        Run a session on a connection, as a forked child.
+
+        The session keeps its files in a private directory, as served
+        sessions do, rather than next to the story all children share.
+
+        Args:
+            client: the connection to the client
+
+        Returns:
+            The exit status of the child.
+        """
+
+        reader = client.makefile("rb")
+        writer = client.makefile("wb")
+
+        def read_line() -> str:
+            writer.flush()
+            data = reader.readline()
+
+            if not data:
+                raise InputPendingError
+
+            return data.decode("utf-8", "replace").rstrip("\r\n")
+
+        processor = self.processors.get(self._choose(read_line, writer))
+        status = 1
+
+        if processor is not None:
+            processor.output = lambda text: writer.write(
+                text.replace("\n", "\r\n").encode("utf-8"),
+            )
+            processor.reader = read_line
+
+            with private_files(processor.program) as base:
+                processor.place(base)
+
+                try:
+                    processor.run()
+                    status = 0
+                except QuendorError as exc:
+                    writer.write(f"{type(exc).__name__}: {exc}\r\n".encode("utf-8"))
+                finally:
+                    writer.flush()
+
+        return status
+
+    def _choose(self, read_line: Reader, writer: BinaryIO) -> str:
+        """Provide the story a client asks for, asking only if there is a choice."""
+
+        if len(self.processors) == 1:
+            return next(iter(self.processors))
+
+        writer.write(f"Stories: {', '.join(self.processors)}\r\n>".encode("utf-8"))
+
+        try:
+            return read_line().strip()
+        except InputPendingError:
+            return ""
+
+
+def run_fork_server(programs: Dict[str, Program], host: str, port: int) -> None:
+    """
+    Serve sessions of programs from a warm fork server until interrupted.
+
+    Args:
+        programs: the programs to serve, by the name clients ask for them by
+        host: the address to listen on
+        port: the port to listen on
+    """
+
+    server = ForkServer(programs)
+    server.warm()
+
+    with listen(host, port) as listener:
+        server.serve(listener)
@@ -0,0 +1,84 @@
+"""Module for zcode program header abstraction."""
+
+from typing import Union
+
+from quendor.errors import InvalidZcodeProgramHeaderError
+
+
+class Header:
+    """
+    Abstraction for the header of a zcode program.
+
+    The header is the first 64 bytes of a zcode program. It holds the
+    Z-Machine version, the addresses of the various tables, the boundaries
+    between the memory regions and the information that identifies a
+    particular release of a story: the release number, the serial code
+    and the checksum.
+    """
+
+    SIZE = 64
+
+    __slots__ = (
+        "version",
+        "flags1",
+        "release",
+        "high_memory",
+        "initial_pc",
+        "dictionary",
+        "objects",
+        "globals",
+        "static_memory",
+        "flags2",
+        "serial",
+        "abbreviations",
+        "file_length",
+        "checksum",
+        "routines_offset",
+        "strings_offset",
+        "terminators",
+        "alphabet",
+        "extension",
+    )
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        if len(data) < self.SIZE:
+            raise InvalidZcodeProgramHeaderError(
+                f"Quendor found a {len(data)} byte header; 64 bytes are needed.",
+            )
+
+        header = bytes(data[: self.SIZE])
+
+        def word(offset: int) -> int:
+            return (header[offset] << 8) | header[offset + 1]
+
+        self.version: int = header[0x00]
+        self.flags1: int = header[0x01]
+        self.release: int = word(0x02)
+        self.high_memory: int = word(0x04)
+        self.initial_pc: int = word(0x06)
+        self.dictionary: int = word(0x08)
+        self.objects: int = word(0x0A)
+        self.globals: int = word(0x0C)
+        self.static_memory: int = word(0x0E)
+        self.flags2: int = word(0x10)
+        self.serial: str = header[0x12:0x18].decode("latin-1")
+        self.abbreviations: int = word(0x18)
+        self.file_length: int = word(0x1A) * self.length_scale
+        self.checksum: int = word(0x1C)
+        self.routines_offset: int = word(0x28)
+        self.strings_offset: int = word(0x2A)
+        self.terminators: int = word(0x2E)
+        self.alphabet: int = word(0x34)
+        self.extension: int = word(0x36)
+
+    @property
+    def length_scale(self) -> int:
+        """Provide the multiplier that turns the stored length into bytes."""
+
+        if self.version <= 3:
+            return 2
+
+        if self.version <= 5:
+            return 4
+
+        return 8
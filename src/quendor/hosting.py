@@ -0,0 +1,362 @@
+"""Module for hosting sessions across worker processes."""
+
+import asyncio
+import contextlib
+import multiprocessing
+import socket
+import sys
+import time
+from multiprocessing.connection import Connection
+from multiprocessing.reduction import recv_handle, send_handle
+from typing import Dict, List, NamedTuple, Optional, Set, TYPE_CHECKING, cast
+
+from quendor.errors import UnsupportedPythonVersionError
+from quendor.logging import logger, setup_logging
+from quendor.program import Program
+from quendor.session import Session, converse, listen
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+REPORT_INTERVAL = 1.0
+
+
+class SharedStory(NamedTuple):
+    """A story image held in a block of shared memory."""
+
+    name: str
+    path: str
+    block: str
+    size: int
+
+
+class WorkerLoad:
+    """The load of a worker process, as the worker last reported it."""
+
+    __slots__ = ("sessions", "rate", "instructions", "reported")
+
+    def __init__(self) -> None:
+        self.sessions: int = 0
+        self.rate: float = 0.0
+        self.instructions: int = 0
+        self.reported: float = time.monotonic()
+
+
+class Host:
+    """
+    Abstraction for sessions hosted across a pool of worker processes.
+
+    Each story is loaded once, by the host, into a block of shared memory.
+    The workers attach to those blocks and build their programs over views
+    of them, so a story is in memory once however many workers run it and
+    the memory of a worker grows with its sessions, not with the catalog.
+
+    The host accepts each connection itself and hands the socket over to a
+    worker, which runs the session to its end; a session is pinned to its
+    worker for life. The workers report how many sessions they hold and how
+    many instructions they executed, and each new session goes to the
+    worker executing the fewest instructions, so the sessions of a story
+    that gets hot are spread across the workers that have time for them.
+    Sessions that are already running are never moved.
+    """
+
+    def __init__(self, programs: Dict[str, Program], workers: int) -> None:
+        self.programs: Dict[str, Program] = programs
+        self.workers: int = max(workers, 1)
+        self.stories: List[SharedStory] = []
+        self.blocks: List["SharedMemory"] = []
+        self.processes: List[multiprocessing.Process] = []
+        self.connections: List[Connection] = []
+        self.loads: List[WorkerLoad] = []
+
+    def start(self) -> None:
+        """Load the stories into shared memory and start the workers."""
+
+        from multiprocessing.shared_memory import SharedMemory
+
+        for name, program in self.programs.items():
+            size = len(program.story)
+            block = SharedMemory(create=True, size=max(size, 1))
+            # The buffer of a block is only None once the block is closed.
+
+            buffer = cast(memoryview, block.buf)
+            buffer[0:size] = program.story
+
+            self.blocks.append(block)
+            self.stories.append(SharedStory(name, program.file, block.name, size))
+
+        for _ in range(self.workers):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=work,
+                args=(worker_connection, self.stories),
+                daemon=True,
+            )
+            process.start()
+            worker_connection.close()
+
+            self.processes.append(process)
+            self.connections.append(connection)
+            self.loads.append(WorkerLoad())
+
+    def stop(self) -> None:
+        """Stop the workers and release the shared memory of the stories."""
+
+        # A forked worker holds a copy of the host end of its connection, so
+        # it is told to stop rather than left to see the connection close.
+
+        for connection in self.connections:
+            with contextlib.suppress(OSError):
+                connection.send(None)
+
+            connection.close()
+
+        for process in self.processes:
+            process.join(timeout=5)
+
+            if process.is_alive():
+                process.terminate()
+
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+        self.processes, self.connections, self.loads = [], [], []
+        self.blocks, self.stories = [], []
+
+    async def serve(self, listener: socket.socket) -> None:
+        """
+        Hand each connection to a listening socket over to a worker.
+
+        This runs until it is cancelled.
+
+        Args:
+            listener: the listening socket
+        """
+
+        loop = asyncio.get_running_loop()
+        listener.setblocking(False)
+        loop.add_reader(listener.fileno(), self._accept, listener)
+
+        for index, connection in enumerate(self.connections):
+            loop.add_reader(connection.fileno(), self._report, index)
+
+        try:
+            await loop.create_future()
+        finally:
+            loop.remove_reader(listener.fileno())
+
+            for connection in self.connections:
+                loop.remove_reader(connection.fileno())
+
+    def _accept(self, listener: socket.socket) -> None:
+        """Hand a new connection over to the least busy worker."""
+
+        try:
+            client, _ = listener.accept()
+        except BlockingIOError:
+            return
+
+        index = self.choose()
+
+        with client:
+            self.connections[index].send("session")
+            send_handle(
+                self.connections[index],
+                client.fileno(),
+                self.processes[index].pid,
+            )
+
+        self.loads[index].sessions += 1
+
+    def choose(self) -> int:
+        """Provide the worker executing the fewest instructions."""
+
+        return min(
+            range(len(self.loads)),
+            key=lambda index: (self.loads[index].rate, self.loads[index].sessions),
+        )
+
+    def _report(self, index: int) -> None:
+        """Take in a report of the load of a worker."""
+
+        load = self.loads[index]
+
+        try:
+            sessions, instructions = self.connections[index].recv()
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(self.connections[index].fileno())
+            load.rate = float("inf")
+            logger.error(f"worker {index} stopped")
+            return
+
+        now = time.monotonic()
+        load.rate = (instructions - load.instructions) / max(now - load.reported, 1e-3)
+        load.instructions = instructions
+        load.sessions = sessions
+        load.reported = now
+
+
+def attach(story: SharedStory) -> "SharedMemory":
+    """Attach to the shared memory block of a story."""
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    return SharedMemory(name=story.block)
+
+
+def view(story: SharedStory, block: "SharedMemory") -> memoryview:
+    """Provide a read-only view of a story in its shared memory block."""
+
+    buffer = cast(memoryview, block.buf)
+
+    return buffer[: story.size].toreadonly()
+
+
+class Worker:
+    """
+    Abstraction for a worker process of a host.
+
+    The worker builds a program over a read-only view of the shared memory
+    block of each story and runs the sessions it is handed on an asyncio
+    event loop of its own.
+    """
+
+    def __init__(self, connection: Connection, stories: List[SharedStory]) -> None:
+        self.connection: Connection = connection
+        self.blocks: List["SharedMemory"] = [attach(story) for story in stories]
+        self.programs: Dict[str, Program] = {
+            story.name: Program.from_buffer(view(story, block), story.path)
+            for story, block in zip(stories, self.blocks)  # noqa: B905
+        }
+        self.sessions: Set[Session] = set()
+        self.finished: int = 0
+        self.stopped: Optional[asyncio.Future] = None
+
+    async def run(self) -> None:
+        """Run sessions until the host closes its connection."""
+
+        loop = asyncio.get_running_loop()
+        self.stopped = loop.create_future()
+        loop.add_reader(self.connection.fileno(), self._received)
+        reporter = asyncio.ensure_future(self._report())
+
+        try:
+            await self.stopped
+        finally:
+            loop.remove_reader(self.connection.fileno())
+            reporter.cancel()
+
+    def _received(self) -> None:
+        """Start a session on a connection handed over by the host."""
+
+        try:
+            message = self.connection.recv()
+            descriptor = recv_handle(self.connection) if message else -1
+        except (EOFError, OSError):
+            descriptor = -1
+
+        if descriptor < 0:
+            if self.stopped is not None and not self.stopped.done():
+                self.stopped.set_result(None)
+            return
+
+        asyncio.ensure_future(self._serve(socket.socket(fileno=descriptor)))
+
+    async def _serve(self, client: socket.socket) -> None:
+        """Run a session of the story the client asks for."""
+
+        reader, writer = await asyncio.open_connection(sock=client)
+        program = await self._choose(reader, writer)
+
+        if program is None:
+            writer.close()
+            return
+
+        session = await converse(program, reader, writer, self.sessions)
+        self.finished += session.processor.instructions
+
+    async def _choose(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> Optional[Program]:
+        """
+        Provide the program a client asks for, asking only if there is a choice.
+
+        Args:
+            reader: the stream the client writes to
+            writer: the stream to the client
+
+        Returns:
+            The program, or None if the client did not name one.
+        """
+
+        if len(self.programs) == 1:
+            return next(iter(self.programs.values()))
+
+        writer.write(f"Stories: {', '.join(self.programs)}\r\n>".encode("utf-8"))
+        await writer.drain()
+        name = (await reader.readline()).decode("utf-8", "replace").strip()
+
+        return self.programs.get(name)
+
+    async def _report(self) -> None:
+        """Report the load of the worker to the host at intervals."""
+
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL)
+
+            instructions = self.finished + sum(
+                session.processor.instructions for session in self.sessions
+            )
+
+            self.connection.send((len(self.sessions), instructions))
+
+
+def work(connection: Connection, stories: List[SharedStory]) -> None:
+    """Entry point of a worker process."""
+
+    setup_logging(0)
+
+    worker = Worker(connection, stories)
+
+    try:
+        asyncio.run(worker.run())
+    finally:
+        for program in worker.programs.values():
+            program.close()
+
+        for block in worker.blocks:
+            with contextlib.suppress(BufferError):
+                block.close()
+
+
+def run_host(programs: Dict[str, Program], host: str, port: int, workers: int) -> None:
+    """
+    Host sessions of programs across worker processes until interrupted.
+
+    Args:
+        programs: the programs to host, by the name clients ask for them by
+        host: the address to listen on
+        port: the port to listen on
+        workers: the number of worker processes
+
+    Raises:
+        UnsupportedPythonVersionError: before Python 3.8, which first has
+            the shared memory the workers share the stories through
+    """
+
+    if sys.version_info < (3, 8):
+        raise UnsupportedPythonVersionError(
+            "Hosting sessions across workers requires Python 3.8 or later.",
+        )
+
+    hosting = Host(programs, workers)
+    hosting.start()
+
+    try:
+        with listen(host, port) as listener:
+            asyncio.run(hosting.serve(listener))
+    finally:
+        hosting.stop()
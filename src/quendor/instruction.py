@@ -0,0 +1,496 @@
+"""Module for zcode instruction decoding."""
+
+from typing import Dict, Tuple
+
+from quendor.memory import Memory
+
+# Opcodes are identified by a single number that folds the operand count
+# into the opcode number, so that the dispatch loop can index one table.
+# Two operand opcodes are numbered from 0x00, one operand opcodes from
+# 0x80, zero operand opcodes from 0xB0, variable operand opcodes from 0xE0
+# and extended opcodes from 0x100.
+
+EXTENDED = 0x100
+
+LARGE_CONSTANT = 0
+SMALL_CONSTANT = 1
+VARIABLE = 2
+OMITTED = 3
+
+NAMES: Dict[int, str] = {
+    0x01: "je",
+    0x02: "jl",
+    0x03: "jg",
+    0x04: "dec_chk",
+    0x05: "inc_chk",
+    0x06: "jin",
+    0x07: "test",
+    0x08: "or",
+    0x09: "and",
+    0x0A: "test_attr",
+    0x0B: "set_attr",
+    0x0C: "clear_attr",
+    0x0D: "store",
+    0x0E: "insert_obj",
+    0x0F: "loadw",
+    0x10: "loadb",
+    0x11: "get_prop",
+    0x12: "get_prop_addr",
+    0x13: "get_next_prop",
+    0x14: "add",
+    0x15: "sub",
+    0x16: "mul",
+    0x17: "div",
+    0x18: "mod",
+    0x19: "call_2s",
+    0x1A: "call_2n",
+    0x1B: "set_colour",
+    0x1C: "throw",
+    0x80: "jz",
+    0x81: "get_sibling",
+    0x82: "get_child",
+    0x83: "get_parent",
+    0x84: "get_prop_len",
+    0x85: "inc",
+    0x86: "dec",
+    0x87: "print_addr",
+    0x88: "call_1s",
+    0x89: "remove_obj",
+    0x8A: "print_obj",
+    0x8B: "ret",
+    0x8C: "jump",
+    0x8D: "print_paddr",
+    0x8E: "load",
+    0x8F: "call_1n",
+    0xB0: "rtrue",
+    0xB1: "rfalse",
+    0xB2: "print",
+    0xB3: "print_ret",
+    0xB4: "nop",
+    0xB5: "save",
+    0xB6: "restore",
+    0xB7: "restart",
+    0xB8: "ret_popped",
+    0xB9: "catch",
+    0xBA: "quit",
+    0xBB: "new_line",
+    0xBC: "show_status",
+    0xBD: "verify",
+    0xBF: "piracy",
+    0xE0: "call_vs",
+    0xE1: "storew",
+    0xE2: "storeb",
+    0xE3: "put_prop",
+    0xE4: "aread",
+    0xE5: "print_char",
+    0xE6: "print_num",
+    0xE7: "random",
+    0xE8: "push",
+    0xE9: "pull",
+    0xEA: "split_window",
+    0xEB: "set_window",
+    0xEC: "call_vs2",
+    0xED: "erase_window",
+    0xEE: "erase_line",
+    0xEF: "set_cursor",
+    0xF0: "get_cursor",
+    0xF1: "set_text_style",
+    0xF2: "buffer_mode",
+    0xF3: "output_stream",
+    0xF4: "input_stream",
+    0xF5: "sound_effect",
+    0xF6: "read_char",
+    0xF7: "scan_table",
+    0xF8: "not",
+    0xF9: "call_vn",
+    0xFA: "call_vn2",
+    0xFB: "tokenise",
+    0xFC: "encode_text",
+    0xFD: "copy_table",
+    0xFE: "print_table",
+    0xFF: "check_arg_count",
+    0x100: "save",
+    0x101: "restore",
+    0x102: "log_shift",
+    0x103: "art_shift",
+    0x104: "set_font",
+    0x109: "save_undo",
+    0x10A: "restore_undo",
+    0x10B: "print_unicode",
+    0x10C: "check_unicode",
+    0x10D: "set_true_colour",
+}
+
+STORES = frozenset(
+    (
+        0x08,
+        0x09,
+        0x0F,
+        0x10,
+        0x11,
+        0x12,
+        0x13,
+        0x14,
+        0x15,
+        0x16,
+        0x17,
+        0x18,
+        0x19,
+        0x81,
+        0x82,
+        0x83,
+        0x84,
+        0x88,
+        0x8E,
+        0xE0,
+        0xE7,
+        0xEC,
+        0xF6,
+        0xF7,
+        0xF8,
+        0x100,
+        0x101,
+        0x102,
+        0x103,
+        0x104,
+        0x109,
+        0x10A,
+        0x10C,
+        0x113,
+        0x11D,
+    ),
+)
+
+BRANCHES = frozenset(
+    (
+        0x01,
+        0x02,
+        0x03,
+        0x04,
+        0x05,
+        0x06,
+        0x07,
+        0x0A,
+        0x80,
+        0x81,
+        0x82,
+        0xBD,
+        0xBF,
+        0xF7,
+        0xFF,
+        0x106,
+        0x118,
+        0x11B,
+    ),
+)
+
+TEXT = frozenset((0xB2, 0xB3))
+
+# A handful of opcodes changed shape between versions of the machine. For
+# those, these tables give the versions in which they store or branch.
+
+VERSION_STORES: Dict[int, range] = {
+    0x8F: range(1, 5),
+    0xB5: range(4, 5),
+    0xB6: range(4, 5),
+    0xB9: range(5, 9),
+    0xE4: range(5, 9),
+    0xE9: range(6, 7),
+}
+
+VERSION_BRANCHES: Dict[int, range] = {
+    0xB5: range(1, 4),
+    0xB6: range(1, 4),
+}
+
+
+def name(opcode: int) -> str:
+    """Provide the name of an opcode, as used in the Z-Machine standard."""
+
+    return NAMES.get(opcode, f"unknown_{opcode:03x}")
+
+
+def version_stores(opcode: int, version: int) -> bool:
+    """Determine whether an opcode stores a result in a given version."""
+
+    if opcode in VERSION_STORES:
+        return version in VERSION_STORES[opcode]
+
+    return opcode in STORES
+
+
+def version_branches(opcode: int, version: int) -> bool:
+    """Determine whether an opcode branches in a given version."""
+
+    if opcode in VERSION_BRANCHES:
+        return version in VERSION_BRANCHES[opcode]
+
+    return opcode in BRANCHES
+
+
+class Instruction:
+    """
+    Abstraction for a decoded zcode instruction.
+
+    An instruction is decoded once into this compact record and the record
+    is then reused every time the instruction executes. Operands are kept
+    as their raw values along with their types; when none of the operands
+    is a variable, the operand values can be used as they are.
+
+    The branch target is already resolved to an absolute address. The
+    special targets 0 and 1 mean return false and return true from the
+    current routine, as they do in the encoded branch offset.
+    """
+
+    __slots__ = (
+        "address",
+        "opcode",
+        "operand_types",
+        "operands",
+        "variables",
+        "store",
+        "branch_on",
+        "branch_target",
+        "text",
+        "text_length",
+        "next",
+    )
+
+    def __init__(  # noqa: CFQ002
+        self,
+        address: int,
+        opcode: int,
+        operand_types: Tuple[int, ...],
+        operands: Tuple[int, ...],
+        store: int,
+        branch_on: bool,
+        branch_target: int,
+        text: int,
+        text_length: int,
+        next_address: int,
+    ) -> None:
+        self.address: int = address
+        self.opcode: int = opcode
+        self.operand_types: Tuple[int, ...] = operand_types
+        self.operands: Tuple[int, ...] = operands
+        self.variables: bool = VARIABLE in operand_types
+        self.store: int = store
+        self.branch_on: bool = branch_on
+        self.branch_target: int = branch_target
+        self.text: int = text
+        self.text_length: int = text_length
+        self.next: int = next_address
+
+    def __repr__(self) -> str:
+        """Provide the address, name and operands of the instruction."""
+
+        return (
+            f"<Instruction {self.address:05x} {name(self.opcode)}"
+            f" {list(self.operands)} -> {self.next:05x}>"
+        )
+
+
+class Decoder:
+    """
+    Decoder for zcode instructions, with a cache keyed by address.
+
+    Instructions that live in static or high memory cannot change while
+    the program runs, so they are decoded once and the record is kept in
+    the cache. Instructions in dynamic memory are rare but legal; those
+    are decoded afresh each time because the program may have rewritten
+    them.
+
+    Since static and high memory are shared by every session of a program,
+    so is the cache: it is kept with the program rather than the decoder.
+    """
+
+    def __init__(self, memory: Memory) -> None:
+        self.memory: Memory = memory
+        self.version: int = memory.header.version
+        self.cache: Dict[int, Instruction] = memory.program.cache.setdefault(
+            "instructions",
+            {},
+        )
+
+    def decode(self, address: int) -> Instruction:
+        """
+        Provide the instruction at an address.
+
+        Args:
+            address: the byte address of the instruction
+
+        Returns:
+            The decoded instruction, from the cache where possible.
+        """
+
+        instruction = self.cache.get(address)
+
+        if instruction is not None:
+            return instruction
+
+        instruction = self._decode(address)
+
+        if address >= self.memory.dynamic_size:
+            self.cache[address] = instruction
+
+        return instruction
+
+    def _decode(self, address: int) -> Instruction:
+        """Decode the instruction at an address without the cache."""
+
+        opcode, types, pc = self._opcode(address)
+        operands, pc = self._operands(types, pc)
+        store = -1
+
+        if version_stores(opcode, self.version):
+            store = self.memory.read_byte(pc)
+            pc += 1
+
+        branch_on = False
+        branch_target = -1
+
+        if version_branches(opcode, self.version):
+            branch_on, branch_target, pc = self._branch(pc)
+
+        text = -1
+        text_length = 0
+
+        if opcode in TEXT:
+            text = pc
+            pc = self._text_end(pc)
+            text_length = pc - text
+
+        return Instruction(
+            address,
+            opcode,
+            types,
+            operands,
+            store,
+            branch_on,
+            branch_target,
+            text,
+            text_length,
+            pc,
+        )
+
+    def _opcode(self, pc: int) -> Tuple[int, Tuple[int, ...], int]:
+        """Provide the opcode, operand types and operand address of an instruction."""
+
+        read_byte = self.memory.read_byte
+        byte = read_byte(pc)
+        pc += 1
+
+        types: Tuple[int, ...]
+
+        if byte == 0xBE and self.version >= 5:
+            opcode = EXTENDED + read_byte(pc)
+            types = self._operand_types(read_byte(pc + 1))
+            pc += 2
+        elif byte < 0x80:
+            opcode = byte & 0x1F
+            types = (
+                VARIABLE if byte & 0x40 else SMALL_CONSTANT,
+                VARIABLE if byte & 0x20 else SMALL_CONSTANT,
+            )
+        elif byte < 0xC0:
+            opcode, types = self._short(byte)
+        else:
+            opcode, types, pc = self._variable(byte, pc)
+
+        return opcode, types, pc
+
+    def _variable(self, byte: int, pc: int) -> Tuple[int, Tuple[int, ...], int]:
+        """Provide the opcode, operand types and operand address of a variable form."""
+
+        read_byte = self.memory.read_byte
+        opcode = byte & 0x1F if byte < 0xE0 else byte
+        type_bytes = [read_byte(pc)]
+
+        if opcode in (0xEC, 0xFA):
+            type_bytes.append(read_byte(pc + 1))
+
+        return opcode, self._operand_types(*type_bytes), pc + len(type_bytes)
+
+    @staticmethod
+    def _short(byte: int) -> Tuple[int, Tuple[int, ...]]:
+        """Provide the opcode and operand types of a short form instruction."""
+
+        kind = (byte >> 4) & 0x03
+
+        if kind == OMITTED:
+            return 0xB0 | (byte & 0x0F), ()
+
+        return 0x80 | (byte & 0x0F), (kind,)
+
+    def _operands(self, types: Tuple[int, ...], pc: int) -> Tuple[Tuple[int, ...], int]:
+        """Provide the operand values of an instruction and the address after them."""
+
+        read_byte = self.memory.read_byte
+        operands = []
+
+        for kind in types:
+            if kind == LARGE_CONSTANT:
+                operands.append((read_byte(pc) << 8) | read_byte(pc + 1))
+                pc += 2
+            else:
+                operands.append(read_byte(pc))
+                pc += 1
+
+        return tuple(operands), pc
+
+    def _branch(self, pc: int) -> Tuple[bool, int, int]:
+        """Provide the branch condition, branch target and the address after them."""
+
+        read_byte = self.memory.read_byte
+        branch = read_byte(pc)
+
+        if branch & 0x40:
+            offset = branch & 0x3F
+            pc += 1
+        else:
+            offset = ((branch & 0x3F) << 8) | read_byte(pc + 1)
+
+            if offset & 0x2000:
+                offset -= 0x4000
+
+            pc += 2
+
+        return (
+            bool(branch & 0x80),
+            offset if offset in (0, 1) else pc + offset - 2,
+            pc,
+        )
+
+    def _text_end(self, pc: int) -> int:
+        """Provide the address after the inline text that starts at an address."""
+
+        read_byte = self.memory.read_byte
+
+        while not read_byte(pc) & 0x80:
+            pc += 2
+
+        return pc + 2
+
+    @staticmethod
+    def _operand_types(*type_bytes: int) -> Tuple[int, ...]:
+        """
+        Provide the operand types packed into one or more type bytes.
+
+        Each type byte holds four types. The first omitted type ends the
+        list; any types after it are ignored.
+
+        Args:
+            type_bytes: the operand type bytes of an instruction
+
+        Returns:
+            The operand types, up to the first omitted type.
+        """
+
+        types = tuple(
+            (byte >> shift) & 0x03 for byte in type_bytes for shift in (6, 4, 2, 0)
+        )
+
+        if OMITTED in types:
+            return types[: types.index(OMITTED)]
+
+        return types
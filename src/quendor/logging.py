@@ -1,6 +1,12 @@
 """Logging module for the Quendor interpreter."""
 
-import logzero
+import logging
+
+# This is the logger that logzero sets up. Taking it from the standard
+# library lets the interpreter log without importing logzero, which is
+# only imported once logging is set up.
+
+logger = logging.getLogger("logzero_default")
 
 
 def setup_logging(log_level: int) -> None:
@@ -20,8 +26,10 @@ def setup_logging(log_level: int) -> None:
         log_level: the level of logging to display.
     """
 
+    import logzero
+
     if not log_level:
-        log_level = logzero.ERROR
+        log_level = logging.ERROR
 
     log_format = (
         "%(color)s[%(levelname)1.7s %(module)s:%(lineno)d]" "%(end_color)s %(message)s"
@@ -0,0 +1,161 @@
+"""Module for Z-Machine memory abstraction."""
+
+from typing import Callable, Optional, Union
+
+from quendor.errors import IllegalMemoryAccessError
+from quendor.header import Header
+from quendor.program import Program
+
+Watcher = Callable[[int, int], None]
+
+
+class Memory:
+    """
+    Abstraction for the memory map of a running zcode program.
+
+    Z-Machine memory is split into three regions. Dynamic memory runs from
+    the start of the program up to the static memory base given in the
+    header and it is the only region a program may write to. Static and
+    high memory follow it and are read-only for the life of the program.
+
+    Each session gets its own copy of dynamic memory as a bytearray. The
+    rest of memory is not copied at all; reads past dynamic memory go
+    straight to the story view of the program, which is the same read-only
+    buffer for every session built from that program. The per-session cost
+    is therefore just the size of dynamic memory.
+
+    A single range of dynamic memory can be watched, so that whatever
+    keeps its own view of that range, such as the object table, learns
+    of every write into it. The watcher is given the address and length
+    of each write.
+    """
+
+    def __init__(self, program: Program) -> None:
+        self.program: Program = program
+        self.header: Header = program.header
+        self.static: memoryview = program.story
+        self.dynamic_size: int = self.header.static_memory
+        self.size: int = len(self.static)
+
+        if not 64 <= self.dynamic_size <= self.size:
+            raise IllegalMemoryAccessError(
+                f"Quendor found an invalid static memory base: {self.dynamic_size}",
+            )
+
+        self.dynamic: bytearray = bytearray(self.static[: self.dynamic_size])
+        self.watch_start: int = 0
+        self.watch_end: int = 0
+        self.watcher: Optional[Watcher] = None
+
+    def watch(self, start: int, end: int, watcher: Watcher) -> None:
+        """
+        Watch a range of dynamic memory for writes.
+
+        Args:
+            start: the byte address of the start of the range
+            end: the byte address just past the end of the range
+            watcher: what to call with the address and length of each write
+        """
+
+        self.watch_start = start
+        self.watch_end = end
+        self.watcher = watcher
+
+    def changed(self, address: int, length: int) -> None:
+        """Tell the watcher of a write that was made without write_byte."""
+
+        if (
+            self.watcher
+            and address < self.watch_end
+            and address + length > self.watch_start
+        ):
+            self.watcher(address, length)
+
+    def reset(self) -> None:
+        """Restore dynamic memory to its state when the program was loaded."""
+
+        self.dynamic[:] = self.static[: self.dynamic_size]
+        self.changed(0, self.dynamic_size)
+
+    def read_byte(self, address: int) -> int:
+        """Read a byte from any region of memory."""
+
+        if address < self.dynamic_size:
+            return self.dynamic[address]
+
+        try:
+            return self.static[address]
+        except IndexError:
+            raise IllegalMemoryAccessError(
+                f"Quendor cannot read beyond the end of memory: {address}",
+            ) from None
+
+    def read_word(self, address: int) -> int:
+        """Read a big-endian word from any region of memory."""
+
+        if address + 1 < self.dynamic_size:
+            dynamic = self.dynamic
+            return (dynamic[address] << 8) | dynamic[address + 1]
+
+        return (self.read_byte(address) << 8) | self.read_byte(address + 1)
+
+    def read_bytes(self, address: int, length: int) -> Union[bytes, memoryview]:
+        """
+        Read a run of bytes from any region of memory.
+
+        A run that lies entirely in static or high memory is returned as
+        a view of the shared story, without copying it.
+
+        Args:
+            address: the byte address of the start of the run
+            length: the number of bytes in the run
+
+        Returns:
+            The bytes, or a view of them.
+
+        Raises:
+            IllegalMemoryAccessError: if the run lies outside of memory
+        """
+
+        end = address + length
+        dynamic_size = self.dynamic_size
+
+        if end > self.size or address < 0 or length < 0:
+            raise IllegalMemoryAccessError(
+                f"Quendor cannot read {length} bytes at {address}",
+            )
+
+        if address >= dynamic_size:
+            return self.static[address:end]
+
+        if end <= dynamic_size:
+            return bytes(self.dynamic[address:end])
+
+        return bytes(self.dynamic[address:]) + bytes(self.static[dynamic_size:end])
+
+    def write_byte(self, address: int, value: int) -> None:
+        """Write a byte into dynamic memory."""
+
+        if not 0 <= address < self.dynamic_size:
+            raise IllegalMemoryAccessError(
+                f"Quendor cannot write outside of dynamic memory: {address}",
+            )
+
+        self.dynamic[address] = value & 0xFF
+
+        if self.watch_start <= address < self.watch_end:
+            self.watcher(address, 1)  # type: ignore
+
+    def write_word(self, address: int, value: int) -> None:
+        """Write a big-endian word into dynamic memory."""
+
+        if not 0 <= address < self.dynamic_size - 1:
+            raise IllegalMemoryAccessError(
+                f"Quendor cannot write outside of dynamic memory: {address}",
+            )
+
+        self.dynamic[address] = (value >> 8) & 0xFF
+        self.dynamic[address + 1] = value & 0xFF
+
+        if self.watch_start <= address + 1 and address < self.watch_end:
+            self.watcher(address, 2)  # type: ignore
@@ -0,0 +1,546 @@
+"""Module for the object tree of a zcode program."""
+
+from array import array
+from typing import Dict, List, Set, Tuple
+
+from quendor.errors import InvalidObjectError
+from quendor.memory import Memory
+
+Properties = Dict[int, Tuple[int, int]]
+
+
+class ObjectTable:
+    """
+    Abstraction for the object table of a running zcode program.
+
+    The object table lives in dynamic memory, where each object entry packs
+    the attributes, the parent, sibling and child links and the address of
+    the property table of the object. Rather than unpack an entry every time
+    a program looks at an object, the table is read once into columns: the
+    links go into arrays indexed by object number and the attributes of each
+    object into a single integer used as a bitset. Object 0 is nothing, so
+    it is there with no links and no attributes.
+
+    The property table of an object is indexed the first time it is used,
+    mapping each property number to the address and size of its data, with
+    a map from each property number to the next for get_next_prop.
+
+    Changes made through the table are written to both the columns and
+    memory. Memory watches the object entries and property tables for any
+    other writes, such as storeb or a restore. A write to an object entry
+    reads that entry again. A write to property data changes nothing, but
+    a write to the bytes that lay out a property table drops the property
+    indexes, so they are rebuilt when next used.
+    """
+
+    def __init__(self, memory: Memory) -> None:
+        self.memory: Memory = memory
+        self.version: int = memory.header.version
+        self.address: int = memory.header.objects
+
+        if self.version <= 3:
+            self.defaults: int = 31
+            self.entry_length: int = 9
+            self.attribute_bytes: int = 4
+        else:
+            self.defaults = 63
+            self.entry_length = 14
+            self.attribute_bytes = 6
+
+        self.entries: int = self.address + 2 * self.defaults
+        self.attribute_count: int = 8 * self.attribute_bytes
+        self.count: int = 0
+        self.parent: array = array("H")
+        self.sibling: array = array("H")
+        self.child: array = array("H")
+        self.attributes: List[int] = []
+        self.property_tables: array = array("H")
+        self.properties: Dict[int, Properties] = {}
+        self.following: Dict[int, Dict[int, int]] = {}
+        self.layout: Set[int] = set()
+
+        self.load()
+
+    def load(self) -> None:
+        """Read every object entry of the table into the columns."""
+
+        read_word = self.memory.read_word
+
+        # The table does not record how many objects it holds. By convention
+        # the entries end where the first property table starts.
+
+        self.count = 0
+        end = self.memory.dynamic_size
+        limit = 255 if self.version <= 3 else 0xFFFF
+        entry = self.entries
+
+        while entry + self.entry_length <= end and self.count < limit:
+            property_table = read_word(entry + self.entry_length - 2)
+
+            if property_table < entry + self.entry_length:
+                break
+
+            end = min(end, property_table)
+            self.count += 1
+            entry += self.entry_length
+
+        size = self.count + 1
+
+        self.parent = array("H", bytes(2 * size))
+        self.sibling = array("H", bytes(2 * size))
+        self.child = array("H", bytes(2 * size))
+        self.attributes = [0] * size
+        self.property_tables = array("H", bytes(2 * size))
+
+        for number in range(1, size):
+            self._read_entry(number)
+
+        self._reindex()
+
+        # Every session of a program starts from the same memory, so where
+        # its property tables end is only worked out once per program.
+
+        cache = self.memory.program.cache
+
+        if "objects_end" not in cache:
+            cache["objects_end"] = self._end()
+
+        self.memory.watch(self.entries, cache["objects_end"], self._written)
+
+    def _entry(self, number: int) -> int:
+        """Provide the address of the entry of an object."""
+
+        return self.entries + (number - 1) * self.entry_length
+
+    def _read_entry(self, number: int) -> None:
+        """Read the entry of an object from memory into the columns."""
+
+        entry = self._entry(number)
+        memory = self.memory
+        links = entry + self.attribute_bytes
+
+        self.attributes[number] = int.from_bytes(
+            memory.read_bytes(entry, self.attribute_bytes),
+            "big",
+        )
+
+        if self.version <= 3:
+            self.parent[number] = memory.read_byte(links)
+            self.sibling[number] = memory.read_byte(links + 1)
+            self.child[number] = memory.read_byte(links + 2)
+        else:
+            self.parent[number] = memory.read_word(links)
+            self.sibling[number] = memory.read_word(links + 2)
+            self.child[number] = memory.read_word(links + 4)
+
+        self.property_tables[number] = memory.read_word(links + self.link_length * 3)
+
+    @property
+    def link_length(self) -> int:
+        """Provide the number of bytes in an object link."""
+
+        return 1 if self.version <= 3 else 2
+
+    def _end(self) -> int:
+        """
+        Provide the address just past the last property table.
+
+        The property lists are walked without being indexed, so that no
+        index is built before its object is used.
+
+        Returns:
+            The address, which is never past the end of dynamic memory.
+        """
+
+        end = self._entry(self.count + 1)
+
+        for number in range(1, self.count + 1):
+            address = self._first_property(number)
+            size = 1
+
+            while size:
+                _, data, size = self._property_at(address)
+                address = data + size
+
+            end = max(end, address)
+
+        return min(end, self.memory.dynamic_size)
+
+    def _reindex(self) -> None:
+        """Drop the property indexes, so that each is rebuilt when next used."""
+
+        self.properties = {}
+        self.following = {}
+        self.layout = set()
+
+    def _written(self, address: int, length: int) -> None:
+        """
+        Bring the columns up to date after a write to the object table.
+
+        Args:
+            address: the byte address of the start of the write
+            length: the number of bytes written
+        """
+
+        end = address + length
+
+        self._reread(address, end)
+
+        if self._laid_out(address, end):
+            self._reindex()
+
+    def _reread(self, address: int, end: int) -> None:
+        """
+        Read the object entries a write covers into the columns again.
+
+        A property table of an object that moves drops the property indexes.
+
+        Args:
+            address: the byte address of the start of the write
+            end: the byte address just past the end of the write
+        """
+
+        entries_end = self._entry(self.count + 1)
+
+        if address >= entries_end or end <= self.entries:
+            return
+
+        first = max(address, self.entries) - self.entries
+        last = min(end, entries_end) - 1 - self.entries
+
+        for number in range(
+            first // self.entry_length + 1,
+            last // self.entry_length + 2,
+        ):
+            table = self.property_tables[number]
+            self._read_entry(number)
+
+            if self.property_tables[number] != table:
+                self._reindex()
+
+    def _laid_out(self, address: int, end: int) -> bool:
+        """
+        Provide whether a write covers bytes that lay out a property table.
+
+        Only such a write can change an index, so a write over property
+        data, however long, keeps them all. The check goes over whichever
+        is shorter, the write or the bytes of the indexed property tables.
+
+        Args:
+            address: the byte address of the start of the write
+            end: the byte address just past the end of the write
+
+        Returns:
+            True if the write covers a byte of an indexed layout.
+        """
+
+        layout = self.layout
+
+        if end - address <= len(layout):
+            return any(byte in layout for byte in range(address, end))
+
+        return any(address <= byte < end for byte in layout)
+
+    def check(self, number: int) -> int:
+        """
+        Check that an object number is in the table.
+
+        Args:
+            number: the object number
+
+        Returns:
+            The object number.
+
+        Raises:
+            InvalidObjectError: if the object is not in the table
+        """
+
+        if not 0 <= number <= self.count:
+            raise InvalidObjectError(f"Quendor found no object {number}")
+
+        return number
+
+    # Links.
+
+    def _write_link(self, number: int, offset: int, value: int) -> None:
+        """Write a link of an object entry into memory."""
+
+        if number == 0:
+            return
+
+        address = self._entry(number) + self.attribute_bytes + offset * self.link_length
+        dynamic = self.memory.dynamic
+
+        if self.version <= 3:
+            dynamic[address] = value
+        else:
+            dynamic[address] = value >> 8
+            dynamic[address + 1] = value & 0xFF
+
+        (self.parent, self.sibling, self.child)[offset][number] = value
+
+    def remove(self, number: int) -> None:
+        """Detach an object from its parent."""
+
+        number = self.check(number)
+        parent = self.parent[number]
+
+        if number == 0 or parent == 0:
+            return
+
+        sibling = self.sibling[number]
+
+        if self.child[parent] == number:
+            self._write_link(parent, 2, sibling)
+        else:
+            previous = self._older_sibling(number)
+
+            if previous:
+                self._write_link(previous, 1, sibling)
+
+        self._write_link(number, 0, 0)
+        self._write_link(number, 1, 0)
+
+    def _older_sibling(self, number: int) -> int:
+        """Provide the child of the parent of an object just before it, or 0."""
+
+        previous = self.child[self.parent[number]]
+
+        while previous and self.sibling[previous] != number:
+            previous = self.sibling[previous]
+
+        return previous
+
+    def insert(self, number: int, destination: int) -> None:
+        """Make an object the first child of another object."""
+
+        self.remove(number)
+
+        destination = self.check(destination)
+
+        if number == 0 or destination == 0:
+            return
+
+        self._write_link(number, 1, self.child[destination])
+        self._write_link(number, 0, destination)
+        self._write_link(destination, 2, number)
+
+    # Attributes.
+
+    def has_attribute(self, number: int, attribute: int) -> bool:
+        """Provide whether an object has an attribute."""
+
+        number = self.check(number)
+
+        if not 0 <= attribute < self.attribute_count:
+            return False
+
+        shift = self.attribute_count - 1 - attribute
+
+        return bool(self.attributes[number] >> shift & 1)
+
+    def set_attribute(self, number: int, attribute: int, value: bool) -> None:
+        """Give an attribute to, or take an attribute from, an object."""
+
+        number = self.check(number)
+
+        if number == 0 or not 0 <= attribute < self.attribute_count:
+            return
+
+        bit = 1 << (self.attribute_count - 1 - attribute)
+        attributes = self.attributes[number]
+        attributes = attributes | bit if value else attributes & ~bit
+        entry = self._entry(number)
+        end = entry + self.attribute_bytes
+
+        self.attributes[number] = attributes
+        self.memory.dynamic[entry:end] = attributes.to_bytes(
+            self.attribute_bytes,
+            "big",
+        )
+
+    # Properties.
+
+    def short_name(self, number: int) -> int:
+        """Provide the address of the short name of an object."""
+
+        return self.property_tables[self.check(number)] + 1
+
+    def _first_property(self, number: int) -> int:
+        """Provide the address of the first property of an object."""
+
+        table = self.property_tables[number]
+
+        return table + 1 + 2 * self.memory.read_byte(table)
+
+    def _property_at(self, address: int) -> Tuple[int, int, int]:
+        """
+        Provide the property whose size byte is at an address.
+
+        Args:
+            address: the address of the size byte of the property
+
+        Returns:
+            The number, the address of the data and the size of the data of
+            the property. A size of 0 is the end of the property list, with
+            its data starting just past the zero byte.
+        """
+
+        read_byte = self.memory.read_byte
+        size_byte = read_byte(address)
+        data = address + 1
+
+        if size_byte == 0:
+            property_number, size = 0, 0
+        elif self.version <= 3:
+            property_number, size = size_byte & 0x1F, (size_byte >> 5) + 1
+        elif size_byte & 0x80:
+            property_number, size = size_byte & 0x3F, read_byte(data) & 0x3F or 64
+            data += 1
+        else:
+            property_number, size = size_byte & 0x3F, 2 if size_byte & 0x40 else 1
+
+        return property_number, data, size
+
+    def index(self, number: int) -> Properties:
+        """
+        Provide the property index of an object.
+
+        Args:
+            number: the object number
+
+        Returns:
+            The address and size of the data of each property of the object.
+        """
+
+        properties = self.properties.get(number)
+
+        if properties is None:
+            properties, self.following[number] = self._walk(number)
+            self.properties[number] = properties
+
+        return properties
+
+    def _walk(self, number: int) -> Tuple[Properties, Dict[int, int]]:
+        """
+        Walk the property list of an object, noting the bytes that lay it out.
+
+        Args:
+            number: the object number
+
+        Returns:
+            The address and size of the data of each property, and the number
+            of the property after each property, with 0 for the first.
+        """
+
+        properties: Properties = {}
+        following: Dict[int, int] = {}
+
+        if number == 0:
+            return properties, {0: 0}
+
+        previous = 0
+        address = self._first_property(number)
+        size = 1
+
+        self.layout.add(self.property_tables[number])
+
+        while size:
+            property_number, data, size = self._property_at(address)
+            self.layout.update(range(address, data))
+
+            if size:
+                properties.setdefault(property_number, (data, size))
+                following.setdefault(previous, property_number)
+                previous = property_number
+                address = data + size
+
+        following.setdefault(previous, 0)
+
+        return properties, following
+
+    def get(self, number: int, property_number: int) -> int:
+        """Provide the value of a property, or its default value."""
+
+        location = self.index(self.check(number)).get(property_number)
+
+        if location is None:
+            return self.memory.read_word(self.address + 2 * (property_number - 1))
+
+        data, size = location
+
+        if size == 1:
+            return self.memory.read_byte(data)
+
+        return self.memory.read_word(data)
+
+    def put(self, number: int, property_number: int, value: int) -> None:
+        """
+        Change the value of a property of an object.
+
+        Args:
+            number: the object number
+            property_number: the property number
+            value: the new value
+
+        Raises:
+            InvalidObjectError: if the object does not have the property
+        """
+
+        location = self.index(self.check(number)).get(property_number)
+
+        if location is None:
+            raise InvalidObjectError(
+                f"Quendor found no property {property_number} of object {number}",
+            )
+
+        data, size = location
+
+        if size == 1:
+            self.memory.write_byte(data, value)
+        else:
+            self.memory.write_word(data, value)
+
+    def address_of(self, number: int, property_number: int) -> int:
+        """Provide the address of the data of a property, or 0."""
+
+        return self.index(self.check(number)).get(property_number, (0, 0))[0]
+
+    def next_property(self, number: int, property_number: int) -> int:
+        """
+        Provide the number of the property after a property of an object.
+
+        Args:
+            number: the object number
+            property_number: the property number, or 0 for the first one
+
+        Returns:
+            The next property number, or 0 after the last property.
+
+        Raises:
+            InvalidObjectError: if the object does not have the property
+        """
+
+        self.index(self.check(number))
+
+        following = self.following[number].get(property_number)
+
+        if following is None:
+            raise InvalidObjectError(
+                f"Quendor found no property {property_number} of object {number}",
+            )
+
+        return following
+
+    def size_of(self, address: int) -> int:
+        """Provide the size of the property data at an address."""
+
+        if address == 0:
+            return 0
+
+        size_byte = self.memory.read_byte(address - 1)
+
+        if self.version > 3 and size_byte & 0x80:
+            return size_byte & 0x3F or 64
+
+        return (size_byte >> (5 if self.version <= 3 else 6)) + 1
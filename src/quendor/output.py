@@ -0,0 +1,348 @@
+"""Module for the output streams of the Z-Machine."""
+
+import re
+from typing import Callable, List, Set, Tuple
+
+from quendor.errors import IllegalMemoryAccessError, OutputStreamError
+from quendor.memory import Memory
+
+Output = Callable[[str], object]
+Encoder = Callable[[str], bytes]
+Table = Tuple[int, List[str]]
+
+# A run of text is wrapped one word at a time: each match is the spaces
+# before a word, the word, and the line ending after it, if any.
+
+WORDS = re.compile(r"( *)([^ \n]*)(\n?)")
+
+SCREEN, TRANSCRIPT, MEMORY, COMMANDS = 1, 2, 3, 4
+
+
+def wrap(text: str, width: int, column: int = 0) -> Tuple[str, int]:
+    """
+    Word wrap text to a width, starting part of the way into a line.
+
+    A word that does not fit on what is left of a line is moved onto the
+    next line, and the spaces before it are dropped. A word that does not
+    fit on a line of its own is left as it is.
+
+    Args:
+        text: the text
+        width: the number of characters that fit on a line
+        column: the number of characters already on the first line
+
+    Returns:
+        The wrapped text, and the number of characters on its last line.
+    """
+
+    pieces: List[str] = []
+
+    for spaces, word, newline in WORDS.findall(text):
+        if word and column and column + len(spaces) + len(word) > width:
+            pieces.append("\n")
+            spaces, column = "", 0
+
+        pieces.append(spaces + word + newline)
+        column = 0 if newline else column + len(spaces) + len(word)
+
+    return "".join(pieces), column
+
+
+class Streams:
+    """
+    Abstraction for the output streams of a session.
+
+    A program prints to the screen (stream 1), the transcript (stream 2), a
+    table in memory (stream 3) and the command script (stream 4), in any
+    combination. Printing only adds the text to a buffer per stream, and
+    nothing is written out until the streams are flushed, which happens
+    when the program reads input and when the processor stops. A program
+    that prints a character at a time therefore costs one write per turn,
+    not one per character.
+
+    Text for the lower window is kept in runs, one per stretch of printing
+    with the same buffering, and the runs are word wrapped as they are
+    flushed, from the column the last one ended at. A width of 0 leaves the
+    text as it is.
+
+    A plain text screen cannot show the upper window, so its text is laid
+    out on rows of its own instead. Text for it is kept along with where
+    the cursor was when it was printed, and only placed on the rows, cut
+    to the width of the screen, as it is flushed. The rows are the upper
+    text, for whoever embeds Quendor to show as they wish.
+
+    While a table is selected, text goes to that table and nowhere else.
+    It is gathered like any other text and written to memory in one piece,
+    as ZSCII, when the table is deselected.
+
+    The transcript and the command script are appended to their files as
+    they are flushed, so neither file is held open between turns.
+    Without a base path to keep them at, as for a program loaded from
+    bytes, there are no such files and their text is dropped as it is
+    flushed.
+    """
+
+    def __init__(
+        self,
+        memory: Memory,
+        encode: Encoder,
+        screen: Output,
+        base: str = "",
+        width: int = 0,
+    ) -> None:
+        self.memory: Memory = memory
+        self.encode: Encoder = encode
+        self.screen: Output = screen
+        self.base: str = base
+        self.transcript_path: str = self.path("scr")
+        self.commands_path: str = self.path("rec")
+        self.width: int = width
+        self.selected: Set[int] = {SCREEN}
+        self.window: int = 0
+        self.buffering: bool = True
+        self.column: int = 0
+        self.pending: List[str] = []
+        self.runs: List[Tuple[bool, str]] = []
+        self.height: int = 0
+        self.cursor: Tuple[int, int] = (0, 0)
+        self.upper_pending: List[str] = []
+        self.placed: List[Tuple[int, int, str]] = []
+        self.rows: List[str] = []
+        self.transcript: List[str] = []
+        self.commands: List[str] = []
+        self.tables: List[Table] = []
+
+    def path(self, suffix: str) -> str:
+        """
+        Provide the path of a file kept at the base path, with a suffix.
+
+        Args:
+            suffix: the suffix of the file, without its dot
+
+        Returns:
+            The path, or an empty string if there is no base path to keep
+            files at.
+        """
+
+        return f"{self.base}.{suffix}" if self.base else ""
+
+    def write(self, text: str) -> None:
+        """Print text to every stream that is selected."""
+
+        if self.tables:
+            self.tables[-1][1].append(text)
+            return
+
+        if self.window:
+            self.upper_pending.append(text)
+            return
+
+        if SCREEN in self.selected:
+            self.pending.append(text)
+
+        if self.transcribing:
+            self.transcript.append(text)
+
+    def command(self, line: str) -> None:
+        """Record a line of input in the command script, if it is selected."""
+
+        if COMMANDS in self.selected:
+            self.commands.append(line + "\n")
+
+    @property
+    def transcribing(self) -> bool:
+        """Provide whether the transcript is selected."""
+
+        return bool(self.memory.read_byte(0x11) & 1)
+
+    def select(self, stream: int, table: int = 0) -> None:
+        """
+        Select or deselect an output stream.
+
+        Args:
+            stream: the number of the stream, negative to deselect it
+            table: the byte address of the table for stream 3
+
+        Raises:
+            OutputStreamError: if more tables are selected than can be
+                nested, or a table is deselected that was never selected
+        """
+
+        if stream == MEMORY:
+            if len(self.tables) == 16:
+                raise OutputStreamError("Quendor cannot nest more than 16 tables")
+
+            self.tables.append((table, []))
+        elif stream == -MEMORY:
+            if not self.tables:
+                raise OutputStreamError("Quendor has no table to deselect")
+
+            self._close_table(*self.tables.pop())
+        elif abs(stream) == TRANSCRIPT:
+            flags = self.memory.read_byte(0x11) & 0xFE
+            self.memory.write_byte(0x11, flags | (stream > 0))
+        elif stream > 0:
+            self.selected.add(stream)
+        else:
+            self.selected.discard(-stream)
+
+    def _close_table(self, table: int, text: List[str]) -> None:
+        """
+        Write the text printed to a table into memory.
+
+        The table is given the number of characters in its first word,
+        followed by the characters themselves.
+
+        Args:
+            table: the byte address of the table
+            text: the text printed to the table
+
+        Raises:
+            IllegalMemoryAccessError: if the table is not in dynamic memory
+        """
+
+        codes = self.encode("".join(text))
+        end = table + 2 + len(codes)
+
+        if end > self.memory.dynamic_size:
+            raise IllegalMemoryAccessError(
+                f"Quendor cannot print {len(codes)} characters to a table at {table}",
+            )
+
+        self.memory.dynamic[table:end] = len(codes).to_bytes(2, "big") + codes
+        self.memory.changed(table, end - table)
+
+    @property
+    def upper(self) -> str:
+        """Provide the text of the upper window, as it was last flushed."""
+
+        return "\n".join(row.rstrip() for row in self.rows[: self.height])
+
+    def split_window(self, lines: int) -> None:
+        """Give the upper window a number of lines from now on."""
+
+        self._seal()
+        self.height = lines
+
+    def set_window(self, window: int) -> None:
+        """Print to the lower window (0) or the upper window from now on."""
+
+        self._seal()
+        self.window = 1 if window else 0
+
+        if self.window:
+            self.cursor = (0, 0)
+
+    def set_cursor(self, line: int, column: int) -> None:
+        """Print to the upper window from a line and column from now on."""
+
+        if self.window:
+            self._seal()
+            self.cursor = (line - 1, column - 1)
+
+    def erase_window(self, window: int) -> None:
+        """Clear a window, or both windows for -1 or -2."""
+
+        self._seal()
+
+        if window <= 0:
+            self.column = 0
+
+        if window != 0:
+            self.placed.clear()
+            self.rows.clear()
+            self.cursor = (0, 0)
+
+        if window == -1:
+            self.height = 0
+
+    def buffer_mode(self, buffering: bool) -> None:
+        """Word wrap the lower window (True) or not (False) from now on."""
+
+        self._seal()
+        self.buffering = buffering
+
+    def _seal(self) -> None:
+        """End the run of screen text being printed."""
+
+        if self.pending:
+            self.runs.append((self.buffering, "".join(self.pending)))
+            self.pending.clear()
+
+        if self.upper_pending:
+            text = "".join(self.upper_pending)
+            line, column = self.cursor
+            end = text.rfind("\n")
+
+            self.placed.append((line, column, text))
+            self.cursor = (
+                line + text.count("\n"),
+                len(text) - end - 1 if end >= 0 else column + len(text),
+            )
+            self.upper_pending.clear()
+
+    def flush(self) -> None:
+        """Write out everything printed to the screen and the files."""
+
+        self._seal()
+
+        if self.runs:
+            self.screen("".join(self._layout(*run) for run in self.runs))
+            self.runs.clear()
+
+        for line, column, text in self.placed:
+            self._place(line, column, text)
+
+        self.placed.clear()
+
+        for path, lines in (
+            (self.transcript_path, self.transcript),
+            (self.commands_path, self.commands),
+        ):
+            if lines and path:
+                with open(path, "a", encoding="utf-8") as stream_file:
+                    stream_file.write("".join(lines))
+
+            lines.clear()
+
+    def _place(self, line: int, column: int, text: str) -> None:
+        """
+        Put text on the rows of the upper window, over what was there.
+
+        Args:
+            line: the row the text starts on, counting from 0
+            column: the column the text starts at, counting from 0
+            text: the text
+        """
+
+        for offset, piece in enumerate(text.split("\n")):
+            start = 0 if offset else column
+
+            while len(self.rows) <= line + offset:
+                self.rows.append("")
+
+            row = self.rows[line + offset].ljust(start)
+            end = start + len(piece)
+            row = row[:start] + piece + row[end:]
+            self.rows[line + offset] = row[: self.width] if self.width else row
+
+    def _layout(self, wrapped: bool, text: str) -> str:
+        """
+        Provide the text of a run of lower window text, as it is written out.
+
+        Args:
+            wrapped: whether the run is to be word wrapped
+            text: the text of the run
+
+        Returns:
+            The text, wrapped to the width of the screen if need be.
+        """
+
+        if wrapped and self.width:
+            text, self.column = wrap(text, self.width, self.column)
+            return text
+
+        end = text.rfind("\n")
+        self.column = len(text) - end - 1 if end >= 0 else self.column + len(text)
+
+        return text
@@ -0,0 +1,206 @@
+"""Module for probing zcode program files without loading them."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional, TextIO, Tuple
+
+from quendor.errors import (
+    InvalidBlorbFileError,
+    InvalidZcodeProgramFormatError,
+    QuendorError,
+    UnknownZCodeProgramFormatError,
+)
+from quendor.header import Header
+
+
+class Probe(NamedTuple):
+    """What the header of a program file says about the program."""
+
+    path: str
+    file_format: str
+    version: int = 0
+    release: int = 0
+    serial: str = ""
+    checksum: int = 0
+    glulx: bool = False
+    problem: str = ""
+
+    @property
+    def valid(self) -> bool:
+        """Provide whether the file holds a zcode program Quendor can load."""
+
+        return not self.glulx and not self.problem
+
+
+def probe(path: str) -> Probe:
+    """
+    Probe a program file, reading nothing but its headers.
+
+    An unblorbed program has its 64 byte header read. A blorb has its
+    resource index read, to find the executable, and then the header of
+    that executable. No other part of the file is read, however large it
+    is. A file that cannot be read or is not a zcode program is reported
+    as such rather than raised.
+
+    Args:
+        path: the program file
+
+    Returns:
+        The probe of the file.
+    """
+
+    try:
+        with open(path, "rb") as program_file:
+            return _probe_file(path, program_file)
+    except OSError as exc:
+        return Probe(path, "", problem=exc.strerror or str(exc))
+    except QuendorError as exc:
+        return Probe(path, "", problem=str(exc).splitlines()[0])
+
+
+def _probe_file(path: str, program_file: BinaryIO) -> Probe:
+    """Probe an open program file."""
+
+    start = program_file.read(Header.SIZE)
+    program_format = "ZCODE"
+
+    if start[0:4].upper() == b"GLUL":
+        return Probe(path, "GLULX", glulx=True)
+
+    if start[0:4] == b"FORM":
+        if start[8:12] != b"IFRS":
+            raise InvalidZcodeProgramFormatError(
+                "Quendor did not find an IFRS format type.",
+            )
+
+        program_format = "BLORB"
+        chunk_id, start = _executable(program_file)
+
+        if chunk_id != "ZCOD":
+            return Probe(path, program_format, glulx=chunk_id == "GLUL")
+    elif not start or not 1 <= start[0] <= 8:
+        raise UnknownZCodeProgramFormatError(
+            "Quendor cannot determine the file format.",
+        )
+
+    header = Header(start)
+
+    return Probe(
+        path,
+        program_format,
+        header.version,
+        header.release,
+        header.serial,
+        header.checksum,
+    )
+
+
+def _executable(program_file: BinaryIO) -> Tuple[str, bytes]:
+    """
+    Read the type and the header of the executable chunk of a blorb.
+
+    Only the resource index and the chunk header of the executable are
+    read, along with as much of the executable as its header takes.
+
+    Args:
+        program_file: the open blorb file
+
+    Returns:
+        The chunk type (ZCOD or GLUL) and the start of the executable.
+
+    Raises:
+        InvalidBlorbFileError: if the blorb does not list an executable
+    """
+
+    program_file.seek(12)
+    index = program_file.read(12)
+
+    if index[0:4] != b"RIdx" or len(index) < 12:
+        raise InvalidBlorbFileError(
+            "Quendor did not find a resource index in the blorb file.",
+        )
+
+    count = int.from_bytes(index[8:12], "big")
+    entries = program_file.read(count * 12)
+    offset: Optional[int] = None
+
+    for entry in range(0, len(entries) - 11, 12):
+        end = entry + 12
+        record = entries[entry:end]
+
+        if record[0:4] == b"Exec" and int.from_bytes(record[4:8], "big") == 0:
+            offset = int.from_bytes(record[8:12], "big")
+            break
+
+    if offset is None:
+        raise InvalidBlorbFileError(
+            "Quendor did not find an executable in the blorb file.",
+        )
+
+    program_file.seek(offset)
+    chunk = program_file.read(8 + Header.SIZE)
+
+    return chunk[0:4].decode("latin-1"), chunk[8:]
+
+
+def probe_all(paths: Iterable[str], threads: int = 16) -> Iterator[Probe]:
+    """
+    Probe many program files at once.
+
+    Probing waits on the disk far more than it computes, so the files are
+    probed from a pool of threads, which keeps that many reads in flight.
+
+    Args:
+        paths: the program files
+        threads: the number of files to probe at once
+
+    Yields:
+        The probe of each file, in the order of the paths.
+    """
+
+    with ThreadPoolExecutor(max_workers=max(threads, 1)) as executor:
+        yield from executor.map(probe, paths)
+
+
+def scan(directory: str) -> Iterator[str]:
+    """Provide every file below a directory, in a stable order."""
+
+    for root, directories, files in os.walk(directory):
+        directories.sort()
+
+        for name in sorted(files):
+            yield os.path.join(root, name)
+
+
+def report(probes: Iterable[Probe], report_file: TextIO) -> int:
+    """
+    Write a line for each probe, as tab-separated columns.
+
+    Args:
+        probes: the probes
+        report_file: the file to write to
+
+    Returns:
+        The number of files that hold a zcode program Quendor can load.
+    """
+
+    valid = 0
+
+    report_file.write("format\tversion\trelease\tserial\tchecksum\tstatus\tpath\n")
+
+    for result in probes:
+        if result.glulx:
+            status = "glulx"
+        elif result.problem:
+            status = f"invalid: {result.problem}"
+        else:
+            status = "ok"
+            valid += 1
+
+        report_file.write(
+            f"{result.file_format or '-'}\t{result.version}\t{result.release}\t"
+            f"{result.serial or '-'}\t{result.checksum:04x}\t{status}\t"
+            f"{result.path}\n",
+        )
+
+    return valid
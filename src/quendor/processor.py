@@ -0,0 +1,1455 @@
+"""Module for zcode program execution."""
+
+import os
+import random
+import sys
+from array import array
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from quendor.arithmetic import arithmetic_shift, divide, remainder, shift, signed
+from quendor.compiler import Compiler, Routine
+from quendor.dictionary import Tokenizer
+from quendor.errors import StackUnderflowError, UnimplementedOpcodeError
+from quendor.header import Header
+from quendor.instruction import Decoder, Instruction, NAMES, VARIABLE, name
+from quendor.logging import logger
+from quendor.memory import Memory
+from quendor.objects import ObjectTable
+from quendor.output import Output, Streams
+from quendor.program import Program
+from quendor.quetzal import Quetzal, QuetzalError
+from quendor.tables import copy_table, print_table, scan_table
+from quendor.text import TextDecoder
+from quendor.tracer import OPERANDS, Trace
+from quendor.undo import UndoRing
+
+Handler = Callable[[Instruction], None]
+Reader = Callable[[], str]
+
+
+class InputPendingError(Exception):
+    """Signal a reader that has no input yet for a session to continue with."""
+
+
+class Frame:
+    """
+    Abstraction for a routine call frame.
+
+    Each frame holds the local variables of a routine, the evaluation stack
+    that the routine pushes and pops, the number of arguments it was given
+    and where to go, and where to store the result, when it returns. A
+    store of -1 means the result is thrown away. The routine is the byte
+    address of the routine the frame belongs to, or 0 where that is not
+    known, such as for the frame the program starts in.
+    """
+
+    __slots__ = ("return_pc", "store", "locals", "arg_count", "stack", "routine")
+
+    def __init__(
+        self,
+        return_pc: int,
+        store: int,
+        local_vars: List[int],
+        arg_count: int,
+        routine: int = 0,
+    ) -> None:
+        self.return_pc: int = return_pc
+        self.store: int = store
+        self.locals: List[int] = local_vars
+        self.arg_count: int = arg_count
+        self.stack: List[int] = []
+        self.routine: int = routine
+
+    def copy(self) -> "Frame":
+        """Provide a copy of the frame that shares nothing with it."""
+
+        frame = Frame(
+            self.return_pc,
+            self.store,
+            list(self.locals),
+            self.arg_count,
+            self.routine,
+        )
+        frame.stack = list(self.stack)
+
+        return frame
+
+
+class Processor:
+    """
+    Abstraction for the Z-Machine processor.
+
+    The processor executes one session of a program. Instructions are
+    decoded through a caching decoder, so each instruction in static or
+    high memory is only ever parsed once, and the dispatch loop hands each
+    decoded record to the handler for its opcode.
+
+    Handlers are methods named op_ followed by the name of the opcode they
+    implement, as the opcode is named in the Z-Machine standard.
+
+    Routines that are called often enough are handed to the compiler. A
+    routine it manages to compile is from then on executed as a Python
+    function instead of through the dispatch loop. A threshold of 0 keeps
+    everything in the dispatch loop.
+
+    A processor with a trace records the last instructions it executed in
+    a ring buffer. Tracing is chosen once, when the processor is created,
+    by putting a traced dispatch loop in the place of run, so the loop of
+    an untraced processor does not check for a trace at all. A traced
+    processor compiles nothing, as the instructions of a compiled routine
+    never pass through the dispatch loop to be recorded.
+
+    A reader that has no input yet may raise InputPendingError. The read
+    instruction is then left waiting, unexecuted, and run returns, so that
+    whoever drives the processor can run it again once there is input.
+
+    Everything the program prints goes through its output streams, which
+    hold on to the text until the program reads input or the processor
+    stops. Only then is it written out, to the output the processor was
+    given, in one piece.
+    """
+
+    def __init__(  # noqa: CFQ002
+        self,
+        program: Program,
+        threshold: int = 20,
+        output: Optional[Output] = None,
+        reader: Optional[Reader] = None,
+        trace: int = 0,
+        width: int = 0,
+    ) -> None:
+        self.program: Program = program
+        self.memory: Memory = Memory(program)
+        self.header: Header = self.memory.header
+        self.version: int = self.header.version
+        self.decoder: Decoder = Decoder(self.memory)
+        self.text: TextDecoder = TextDecoder(self.memory)
+        self.reader: Reader = reader or read_line
+        self.tokenizer: Tokenizer = Tokenizer(self.memory, self.text)
+        self.streams: Streams = Streams(
+            self.memory,
+            self.tokenizer.zscii_codes,
+            output or sys.stdout.write,
+            os.path.splitext(program.file)[0],
+            width,
+        )
+        self.objects: ObjectTable = ObjectTable(self.memory)
+        self.quetzal: Quetzal = Quetzal(self)
+        self.save_path: str = self.streams.path("qzl")
+        self.undo: UndoRing = UndoRing(self.memory)
+        self.random: random.Random = random.Random()  # noqa: S311
+        self.globals: int = self.header.globals
+        self.frames: List[Frame] = []
+        self.frame: Frame = Frame(0, -1, [], 0)
+        self.pc: int = 0
+        self.running: bool = False
+        self.instructions: int = 0
+        self.handlers: List[Handler] = self._handlers()
+        self.compiler: Compiler = Compiler(self.decoder)
+        self.threshold: int = 0 if trace > 0 else threshold
+        self.calls: Counter = Counter()
+        self.routines: Dict[int, Optional[Routine]] = program.cache.setdefault(
+            "routines",
+            {},
+        )
+        self.waiting: Optional[Instruction] = None
+        self.terminator: int = 13
+        self.trace: Optional[Trace] = None
+
+        if trace > 0:
+            self.trace = Trace(trace)
+            self.run = self.run_traced  # type: ignore
+
+        self.restart()
+
+    def _handlers(self) -> List[Handler]:
+        """
+        Provide the dispatch table, indexed by opcode.
+
+        Opcodes without a handler dispatch to a method that reports the
+        instruction as unimplemented.
+
+        Returns:
+            A handler for every possible opcode.
+        """
+
+        handlers: List[Handler] = [self.unimplemented] * 0x200
+
+        for opcode, opcode_name in NAMES.items():
+            handlers[opcode] = getattr(self, f"op_{opcode_name}", self.unimplemented)
+
+        # A few opcodes were repurposed by later versions of the machine.
+
+        if self.version <= 4:
+            handlers[0x8F] = self.op_not
+            handlers[0xB9] = self.op_pop
+
+        return handlers
+
+    def restart(self) -> None:
+        """Put the processor and memory back into their starting state."""
+
+        self.memory.reset()
+        self._prepare_header()
+
+        # Version 6 starts in a main routine, which the processor calls,
+        # while other versions start at an address outside any routine.
+
+        self.frame = Frame(0, -1, [], 0)
+        self.frames = [self.frame]
+
+        if self.version == 6:
+            self.frames = []
+            self.call(self.header.initial_pc, [], -1)
+        else:
+            self.pc = self.header.initial_pc
+
+    def _prepare_header(self) -> None:
+        """Fill in the header fields that belong to the interpreter."""
+
+        self.memory.write_byte(0x1E, 6)
+        self.memory.write_byte(0x1F, ord("Q"))
+        self.memory.write_byte(0x32, 1)
+        self.memory.write_byte(0x33, 1)
+
+        if self.version >= 4:
+            self.memory.write_byte(0x20, 255)
+            self.memory.write_byte(0x21, self.streams.width or 80)
+
+    @property
+    def output(self) -> Output:
+        """Provide what the text printed to the screen is written out to."""
+
+        return self.streams.screen
+
+    @output.setter
+    def output(self, output: Output) -> None:
+        """Write the text printed to the screen out to something else."""
+
+        self.streams.screen = output
+
+    def place(self, base: str) -> None:
+        """
+        Keep the save file, transcript and command script somewhere else.
+
+        They are kept next to the program by default, which suits a single
+        player but not sessions served side by side, which each need files
+        of their own. A program that was not loaded from a file has nothing
+        to keep them next to, so it saves and transcribes nothing until it
+        is given a place.
+
+        Args:
+            base: the path of the files, without their suffixes
+        """
+
+        self.streams.base = base
+        self.save_path = self.streams.path("qzl")
+        self.streams.transcript_path = self.streams.path("scr")
+        self.streams.commands_path = self.streams.path("rec")
+
+    def unpack_routine(self, packed: int) -> int:
+        """Provide the byte address of a packed routine address."""
+
+        if self.version in (6, 7):
+            return packed * 4 + self.header.routines_offset * 8
+
+        return packed * self.packing
+
+    @property
+    def packing(self) -> int:
+        """Provide the multiplier that turns a packed address into bytes."""
+
+        if self.version <= 3:
+            return 2
+
+        return 4 if self.version <= 5 else 8
+
+    def unpack_string(self, packed: int) -> int:
+        """Provide the byte address of a packed string address."""
+
+        if self.version in (6, 7):
+            return packed * 4 + self.header.strings_offset * 8
+
+        return self.unpack_routine(packed)
+
+    def run(self) -> None:
+        """Execute instructions until the program stops the processor."""
+
+        cache = self.decoder.cache
+        decode = self.decoder.decode
+        handlers = self.handlers
+        count = 0
+
+        self.running = True
+
+        try:
+            while self.running:
+                instruction = cache.get(self.pc) or decode(self.pc)
+                self.pc = instruction.next
+                handlers[instruction.opcode](instruction)
+                count += 1
+        finally:
+            self.instructions += count
+            self.streams.flush()
+
+    def run_traced(self) -> None:
+        """
+        Execute instructions, recording each one in the trace.
+
+        Should the program stop with an error, the trace is dumped to
+        standard error before the error is passed on.
+        """
+
+        trace: Trace = self.trace  # type: ignore
+        pcs, opcodes, depths = trace.pcs, trace.opcodes, trace.depths
+        counts, operands = trace.counts, trace.operands
+        size = trace.size
+        position = trace.position
+        cache = self.decoder.cache
+        decode = self.decoder.decode
+        handlers = self.handlers
+        written = 0
+        count = 0
+        failed = True
+
+        self.running = True
+
+        try:
+            while self.running:
+                instruction = cache.get(self.pc) or decode(self.pc)
+                values = instruction.operands
+                base = position * OPERANDS
+                end = base + len(values)
+
+                pcs[position] = instruction.address
+                opcodes[position] = instruction.opcode
+                depths[position] = len(self.frame.stack)
+                counts[position] = len(values)
+                operands[base:end] = array("H", values)
+                position = (position + 1) % size
+                written += 1
+
+                self.pc = instruction.next
+                handlers[instruction.opcode](instruction)
+                count += 1
+
+            failed = False
+        finally:
+            trace.position = position
+            trace.total += written
+            self.instructions += count
+            self.streams.flush()
+
+            if failed:
+                trace.dump(sys.stderr)
+
+    def step(self) -> Instruction:
+        """Execute a single instruction and provide what was executed."""
+
+        instruction = self.decoder.decode(self.pc)
+        self.pc = instruction.next
+        self.handlers[instruction.opcode](instruction)
+        self.instructions += 1
+
+        return instruction
+
+    def interrupt(self, packed: int) -> int:
+        """
+        Call a routine and run it to completion, outside the dispatch loop.
+
+        This is how a timed read calls its routine while it waits. What
+        the routine prints is written out as soon as it has returned.
+
+        Args:
+            packed: the packed address of the routine
+
+        Returns:
+            The result of the routine, or 0 if it stopped the program.
+        """
+
+        try:
+            return self._run_nested(packed, [])
+        finally:
+            self.streams.flush()
+
+    def run_routine(self, packed: int, arguments: Sequence[int]) -> int:
+        """
+        Call a routine and run it to completion, providing its result.
+
+        This is how a compiled routine calls another routine. The routine
+        is run in its compiled form where it has one, and otherwise in a
+        dispatch loop of its own.
+
+        Args:
+            packed: the packed address of the routine
+            arguments: the values passed to the routine
+
+        Returns:
+            The result of the routine, or 0 if it stopped the program.
+        """
+
+        if packed == 0:
+            return 0
+
+        routine = (
+            self._compiled(self.unpack_routine(packed)) if self.threshold else None
+        )
+
+        if routine is not None:
+            return routine(self, arguments)
+
+        return self._run_nested(packed, arguments)
+
+    def _run_nested(self, packed: int, arguments: Sequence[int]) -> int:
+        """
+        Interpret a routine to completion in a dispatch loop of its own.
+
+        The result is pushed onto the stack of the current frame, so that
+        it can be taken from there once the routine has returned.
+
+        Args:
+            packed: the packed address of the routine
+            arguments: the values passed to the routine
+
+        Returns:
+            The result of the routine, or 0 if it stopped the program.
+        """
+
+        depth = len(self.frames)
+        running = self.running
+
+        self.running = True
+        self.call(packed, arguments, 0)
+
+        while len(self.frames) > depth and self.running:
+            self.step()
+
+        stopped = not self.running
+        self.running = running and not stopped
+
+        if stopped or len(self.frames) != depth:
+            return 0
+
+        return self.frame.stack.pop()
+
+    def timer(self) -> Tuple[int, int]:
+        """
+        Provide the time and routine of the read instruction that is waiting.
+
+        Operands on the stack are peeked at rather than popped, as the read
+        has yet to execute.
+
+        Returns:
+            The tenths of a second between calls of the routine and the
+            packed address of the routine, or zeros for an untimed read.
+        """
+
+        instruction = self.waiting
+
+        if instruction is None or self.version < 4:
+            return 0, 0
+
+        values = [
+            self.read_indirect(value) if kind == VARIABLE else value
+            for kind, value in zip(  # noqa: B905
+                instruction.operand_types,
+                instruction.operands,
+            )
+        ]
+
+        first = 1 if name(instruction.opcode) == "read_char" else 2
+        tenths, routine = (values[first:] + [0, 0])[:2]
+
+        return (tenths, routine) if tenths and routine else (0, 0)
+
+    def operands(self, instruction: Instruction) -> Sequence[int]:
+        """Provide the values of the operands of an instruction."""
+
+        if not instruction.variables:
+            return instruction.operands
+
+        read = self.read_variable
+
+        return [
+            read(value) if kind == VARIABLE else value
+            for kind, value in zip(  # noqa: B905
+                instruction.operand_types,
+                instruction.operands,
+            )
+        ]
+
+    def read_variable(self, number: int) -> int:
+        """
+        Read a variable.
+
+        Variable 0 is the top of the stack, which is popped. Variables 1
+        to 15 are the locals of the current routine and the rest are the
+        global variables.
+
+        Args:
+            number: the variable number
+
+        Returns:
+            The value of the variable.
+
+        Raises:
+            StackUnderflowError: if the stack is read while it is empty
+        """
+
+        if number == 0:
+            try:
+                return self.frame.stack.pop()
+            except IndexError:
+                raise StackUnderflowError(
+                    f"Quendor found an empty stack at {self.pc:05x}",
+                ) from None
+
+        if number < 16:
+            return self.frame.locals[number - 1]
+
+        return self.memory.read_word(self.globals + 2 * (number - 16))
+
+    def write_variable(self, number: int, value: int) -> None:
+        """Write a variable, where writing variable 0 pushes the stack."""
+
+        if number == 0:
+            self.frame.stack.append(value & 0xFFFF)
+        elif number < 16:
+            self.frame.locals[number - 1] = value & 0xFFFF
+        else:
+            self.memory.write_word(self.globals + 2 * (number - 16), value)
+
+    def read_indirect(self, number: int) -> int:  # noqa: DAR401
+        """Read a variable by reference, where the stack is peeked at."""
+
+        if number == 0:
+            try:
+                return self.frame.stack[-1]
+            except IndexError:
+                raise StackUnderflowError(
+                    f"Quendor found an empty stack at {self.pc:05x}",
+                ) from None
+
+        return self.read_variable(number)
+
+    def write_indirect(self, number: int, value: int) -> None:
+        """Write a variable by reference, where the stack is overwritten."""
+
+        if number == 0:
+            self.frame.stack[-1] = value & 0xFFFF
+        else:
+            self.write_variable(number, value)
+
+    def store(self, instruction: Instruction, value: int) -> None:
+        """Store the result of an instruction."""
+
+        self.write_variable(instruction.store, value)
+
+    def branch(self, instruction: Instruction, condition: bool) -> None:
+        """Take the branch of an instruction if its condition is met."""
+
+        if condition is instruction.branch_on:
+            target = instruction.branch_target
+
+            if target > 1:
+                self.pc = target
+            else:
+                self.return_from(target)
+
+    def call(self, packed: int, arguments: Sequence[int], store: int) -> None:
+        """
+        Call a routine.
+
+        A call to address 0 does nothing but return false. Otherwise the
+        routine header gives the number of locals and, up to version 4,
+        their initial values. The arguments then overwrite the first of
+        those locals.
+
+        Args:
+            packed: the packed address of the routine
+            arguments: the values passed to the routine
+            store: the variable for the result, or -1 to discard it
+        """
+
+        if packed == 0:
+            if store >= 0:
+                self.write_variable(store, 0)
+
+            return
+
+        address = self.unpack_routine(packed)
+
+        routine = self._compiled(address) if self.threshold else None
+
+        if routine is not None:
+            self._call_compiled(routine, arguments, store)
+            return
+
+        routine_address = address
+        count = self.memory.read_byte(address)
+        address += 1
+
+        if self.version <= 4:
+            read_word = self.memory.read_word
+            local_vars = [read_word(address + 2 * index) for index in range(count)]
+            address += 2 * count
+        else:
+            local_vars = [0] * count
+
+        local_vars[: len(arguments)] = arguments[:count]
+
+        self.frame = Frame(
+            self.pc,
+            store,
+            local_vars,
+            len(arguments),
+            routine_address,
+        )
+        self.frames.append(self.frame)
+        self.pc = address
+
+    def _compiled(self, address: int) -> Optional[Routine]:
+        """
+        Provide the compiled form of a routine, once the routine is hot.
+
+        A routine that could not be compiled is remembered as None, so the
+        compiler only ever looks at a routine once. A routine that has been
+        compiled before, such as by an earlier session whose work was saved
+        in the story cache, does not have to get hot again.
+
+        Args:
+            address: the byte address of the routine
+
+        Returns:
+            The compiled routine, or None to interpret the routine.
+        """
+
+        if address in self.routines:
+            return self.routines[address]
+
+        self.calls[address] += 1
+
+        if (
+            self.calls[address] < self.threshold
+            and address not in self.compiler.sources
+        ):
+            return None
+
+        # A routine the compiler could not get to yet has to get hot again
+        # before it is looked at once more.
+
+        try:
+            return self.compiler.compile(address)
+        finally:
+            if address not in self.routines:
+                self.calls[address] = 0
+
+    def _call_compiled(
+        self,
+        routine: Routine,
+        arguments: Sequence[int],
+        store: int,
+    ) -> None:
+        """
+        Call a compiled routine.
+
+        The routine runs to completion as a Python call. It does not get a
+        frame of its own, so the result is stored straight into the frame
+        of the caller.
+
+        Args:
+            routine: the compiled routine
+            arguments: the values passed to the routine
+            store: the variable for the result, or -1 to discard it
+        """
+
+        value = routine(self, arguments)
+
+        if store >= 0:
+            self.write_variable(store, value)
+
+    def return_from(self, value: int) -> None:
+        """Return from the current routine with a value."""
+
+        frame = self.frames.pop()
+
+        if not self.frames:
+            logger.debug("returned from the main routine")
+            self.running = False
+            return
+
+        self.frame = self.frames[-1]
+        self.pc = frame.return_pc
+
+        if frame.store >= 0:
+            self.write_variable(frame.store, value)
+
+    def unimplemented(self, instruction: Instruction) -> None:
+        """Report an instruction that cannot be executed."""
+
+        raise UnimplementedOpcodeError(
+            f"Quendor cannot execute {name(instruction.opcode)}"
+            + f" at {instruction.address:05x}",
+        )
+
+    # Branching and comparison.
+
+    def op_je(self, instruction: Instruction) -> None:
+        """Branch if the first operand equals any of the others."""
+
+        first, *rest = self.operands(instruction)
+        self.branch(instruction, first in rest)
+
+    def op_jl(self, instruction: Instruction) -> None:
+        """Branch if the first operand is less than the second."""
+
+        first, second = self.operands(instruction)
+        self.branch(instruction, signed(first) < signed(second))
+
+    def op_jg(self, instruction: Instruction) -> None:
+        """Branch if the first operand is greater than the second."""
+
+        first, second = self.operands(instruction)
+        self.branch(instruction, signed(first) > signed(second))
+
+    def op_jz(self, instruction: Instruction) -> None:
+        """Branch if the operand is zero."""
+
+        self.branch(instruction, self.operands(instruction)[0] == 0)
+
+    def op_dec_chk(self, instruction: Instruction) -> None:
+        """Decrement a variable and branch if it is now less than a value."""
+
+        reference, value = self.operands(instruction)
+        result = signed(self.read_indirect(reference)) - 1
+        self.write_indirect(reference, result)
+        self.branch(instruction, result < signed(value))
+
+    def op_inc_chk(self, instruction: Instruction) -> None:
+        """Increment a variable and branch if it is now more than a value."""
+
+        reference, value = self.operands(instruction)
+        result = signed(self.read_indirect(reference)) + 1
+        self.write_indirect(reference, result)
+        self.branch(instruction, result > signed(value))
+
+    def op_test(self, instruction: Instruction) -> None:
+        """Branch if all of the flags in the second operand are set."""
+
+        bitmap, flags = self.operands(instruction)
+        self.branch(instruction, bitmap & flags == flags)
+
+    def op_jump(self, instruction: Instruction) -> None:
+        """Jump unconditionally by a signed offset."""
+
+        self.pc += signed(self.operands(instruction)[0]) - 2
+
+    def op_check_arg_count(self, instruction: Instruction) -> None:
+        """Branch if the current routine was given at least n arguments."""
+
+        count = self.operands(instruction)[0]
+        self.branch(instruction, count <= self.frame.arg_count)
+
+    def op_piracy(self, instruction: Instruction) -> None:
+        """Branch, since every copy is considered genuine."""
+
+        self.branch(instruction, True)
+
+    def op_verify(self, instruction: Instruction) -> None:
+        """Branch if the story matches the checksum in its header."""
+
+        self.branch(instruction, self.program.verified)
+
+    # Arithmetic and logic.
+
+    def op_or(self, instruction: Instruction) -> None:
+        """Store the bitwise or of two operands."""
+
+        first, second = self.operands(instruction)
+        self.store(instruction, first | second)
+
+    def op_and(self, instruction: Instruction) -> None:
+        """Store the bitwise and of two operands."""
+
+        first, second = self.operands(instruction)
+        self.store(instruction, first & second)
+
+    def op_add(self, instruction: Instruction) -> None:
+        """Store the sum of two operands."""
+
+        first, second = self.operands(instruction)
+        self.store(instruction, (first + second) & 0xFFFF)
+
+    def op_sub(self, instruction: Instruction) -> None:
+        """Store the difference of two operands."""
+
+        first, second = self.operands(instruction)
+        self.store(instruction, (first - second) & 0xFFFF)
+
+    def op_mul(self, instruction: Instruction) -> None:
+        """Store the product of two operands."""
+
+        first, second = self.operands(instruction)
+        self.store(instruction, (first * second) & 0xFFFF)
+
+    def op_div(self, instruction: Instruction) -> None:
+        """Store the quotient of two operands, rounded towards zero."""
+
+        first, second = self.operands(instruction)
+        self.store(instruction, divide(first, second))
+
+    def op_mod(self, instruction: Instruction) -> None:
+        """Store the remainder of two operands, with the sign of the first."""
+
+        first, second = self.operands(instruction)
+        self.store(instruction, remainder(first, second))
+
+    def op_inc(self, instruction: Instruction) -> None:
+        """Increment a variable."""
+
+        reference = self.operands(instruction)[0]
+        self.write_indirect(reference, self.read_indirect(reference) + 1)
+
+    def op_dec(self, instruction: Instruction) -> None:
+        """Decrement a variable."""
+
+        reference = self.operands(instruction)[0]
+        self.write_indirect(reference, self.read_indirect(reference) - 1)
+
+    def op_not(self, instruction: Instruction) -> None:
+        """Store the bitwise complement of the operand."""
+
+        self.store(instruction, ~self.operands(instruction)[0] & 0xFFFF)
+
+    def op_log_shift(self, instruction: Instruction) -> None:
+        """Store the logical shift of a number by a number of places."""
+
+        number, places = self.operands(instruction)
+        self.store(instruction, shift(number, places))
+
+    def op_art_shift(self, instruction: Instruction) -> None:
+        """Store the arithmetic shift of a number by a number of places."""
+
+        number, places = self.operands(instruction)
+        self.store(instruction, arithmetic_shift(number, places))
+
+    def op_random(self, instruction: Instruction) -> None:
+        """
+        Store a random number between 1 and a range.
+
+        A negative range seeds the generator instead and zero reseeds it
+        unpredictably. Both store 0.
+
+        Args:
+            instruction: the decoded random instruction
+        """
+
+        limit = signed(self.operands(instruction)[0])
+
+        if limit > 0:
+            self.store(instruction, self.random.randint(1, limit))
+            return
+
+        self.random.seed(-limit if limit else None)
+        self.store(instruction, 0)
+
+    # Variables, memory and the stack.
+
+    def op_store(self, instruction: Instruction) -> None:
+        """Write a value into a variable, without pushing the stack."""
+
+        reference, value = self.operands(instruction)
+        self.write_indirect(reference, value)
+
+    def op_load(self, instruction: Instruction) -> None:
+        """Store the value of a variable, without popping the stack."""
+
+        self.store(instruction, self.read_indirect(self.operands(instruction)[0]))
+
+    def op_loadw(self, instruction: Instruction) -> None:
+        """Store a word from an array."""
+
+        array, index = self.operands(instruction)
+        self.store(instruction, self.memory.read_word((array + 2 * index) & 0xFFFF))
+
+    def op_loadb(self, instruction: Instruction) -> None:
+        """Store a byte from an array."""
+
+        array, index = self.operands(instruction)
+        self.store(instruction, self.memory.read_byte((array + index) & 0xFFFF))
+
+    def op_storew(self, instruction: Instruction) -> None:
+        """Write a word into an array."""
+
+        array, index, value = self.operands(instruction)
+        self.memory.write_word((array + 2 * index) & 0xFFFF, value)
+
+    def op_storeb(self, instruction: Instruction) -> None:
+        """Write a byte into an array."""
+
+        array, index, value = self.operands(instruction)
+        self.memory.write_byte((array + index) & 0xFFFF, value)
+
+    def op_copy_table(self, instruction: Instruction) -> None:
+        """Copy a table of bytes, or zero it."""
+
+        first, second, size = self.operands(instruction)
+        copy_table(self.memory, first, second, signed(size))
+
+    def op_scan_table(self, instruction: Instruction) -> None:
+        """Store the address of a value in a table, branching if it is found."""
+
+        value, table, count, *form = self.operands(instruction)
+        entry = form[0] if form else 0x82
+        address = scan_table(self.memory, value, table, count, entry)
+
+        self.store(instruction, address)
+        self.branch(instruction, address != 0)
+
+    def op_push(self, instruction: Instruction) -> None:
+        """Push a value onto the stack."""
+
+        self.frame.stack.append(self.operands(instruction)[0])
+
+    def op_pull(self, instruction: Instruction) -> None:
+        """Pop a value off the stack into a variable."""
+
+        value = self.read_variable(0)
+
+        if instruction.store >= 0:
+            self.store(instruction, value)
+        else:
+            self.write_indirect(self.operands(instruction)[0], value)
+
+    def op_pop(self, instruction: Instruction) -> None:
+        """Throw away the value on the top of the stack."""
+
+        self.read_variable(0)
+
+    def op_nop(self, instruction: Instruction) -> None:
+        """Do nothing."""
+
+    # Routines.
+
+    def op_call_vs(self, instruction: Instruction) -> None:
+        """Call a routine with up to three arguments and store the result."""
+
+        routine, *arguments = self.operands(instruction)
+        self.call(routine, arguments, instruction.store)
+
+    def op_call_vn(self, instruction: Instruction) -> None:
+        """Call a routine with up to three arguments and discard the result."""
+
+        routine, *arguments = self.operands(instruction)
+        self.call(routine, arguments, -1)
+
+    op_call_1s = op_call_2s = op_call_vs2 = op_call_vs
+    op_call_1n = op_call_2n = op_call_vn2 = op_call_vn
+
+    def op_ret(self, instruction: Instruction) -> None:
+        """Return a value from the current routine."""
+
+        self.return_from(self.operands(instruction)[0])
+
+    def op_rtrue(self, instruction: Instruction) -> None:
+        """Return true from the current routine."""
+
+        self.return_from(1)
+
+    def op_rfalse(self, instruction: Instruction) -> None:
+        """Return false from the current routine."""
+
+        self.return_from(0)
+
+    def op_ret_popped(self, instruction: Instruction) -> None:
+        """Return the value on the top of the stack."""
+
+        self.return_from(self.read_variable(0))
+
+    def op_catch(self, instruction: Instruction) -> None:
+        """Store the current frame, so that a later throw can return to it."""
+
+        self.store(instruction, len(self.frames))
+
+    def op_throw(self, instruction: Instruction) -> None:
+        """Return a value from the routine whose frame was caught."""
+
+        value, frame = self.operands(instruction)
+        del self.frames[frame:]
+        self.return_from(value)
+
+    # Objects.
+
+    def op_get_parent(self, instruction: Instruction) -> None:
+        """Store the parent of an object."""
+
+        number = self.operands(instruction)[0]
+        self.store(instruction, self.objects.parent[self.objects.check(number)])
+
+    def op_get_sibling(self, instruction: Instruction) -> None:
+        """Store the sibling of an object and branch if there is one."""
+
+        number = self.operands(instruction)[0]
+        sibling = self.objects.sibling[self.objects.check(number)]
+        self.store(instruction, sibling)
+        self.branch(instruction, sibling != 0)
+
+    def op_get_child(self, instruction: Instruction) -> None:
+        """Store the first child of an object and branch if there is one."""
+
+        number = self.operands(instruction)[0]
+        child = self.objects.child[self.objects.check(number)]
+        self.store(instruction, child)
+        self.branch(instruction, child != 0)
+
+    def op_jin(self, instruction: Instruction) -> None:
+        """Branch if an object is a child of another object."""
+
+        number, parent = self.operands(instruction)
+        objects = self.objects
+        self.branch(instruction, objects.parent[objects.check(number)] == parent)
+
+    def op_remove_obj(self, instruction: Instruction) -> None:
+        """Detach an object from its parent."""
+
+        self.objects.remove(self.operands(instruction)[0])
+
+    def op_insert_obj(self, instruction: Instruction) -> None:
+        """Make an object the first child of another object."""
+
+        number, destination = self.operands(instruction)
+        self.objects.insert(number, destination)
+
+    def op_test_attr(self, instruction: Instruction) -> None:
+        """Branch if an object has an attribute."""
+
+        number, attribute = self.operands(instruction)
+        self.branch(instruction, self.objects.has_attribute(number, attribute))
+
+    def op_set_attr(self, instruction: Instruction) -> None:
+        """Give an attribute to an object."""
+
+        number, attribute = self.operands(instruction)
+        self.objects.set_attribute(number, attribute, True)
+
+    def op_clear_attr(self, instruction: Instruction) -> None:
+        """Take an attribute from an object."""
+
+        number, attribute = self.operands(instruction)
+        self.objects.set_attribute(number, attribute, False)
+
+    def op_get_prop(self, instruction: Instruction) -> None:
+        """Store the value of a property of an object."""
+
+        number, property_number = self.operands(instruction)
+        self.store(instruction, self.objects.get(number, property_number))
+
+    def op_get_prop_addr(self, instruction: Instruction) -> None:
+        """Store the address of the data of a property of an object."""
+
+        number, property_number = self.operands(instruction)
+        self.store(instruction, self.objects.address_of(number, property_number))
+
+    def op_get_next_prop(self, instruction: Instruction) -> None:
+        """Store the number of the property after a property of an object."""
+
+        number, property_number = self.operands(instruction)
+        self.store(instruction, self.objects.next_property(number, property_number))
+
+    def op_get_prop_len(self, instruction: Instruction) -> None:
+        """Store the size of the property data at an address."""
+
+        self.store(instruction, self.objects.size_of(self.operands(instruction)[0]))
+
+    def op_put_prop(self, instruction: Instruction) -> None:
+        """Change the value of a property of an object."""
+
+        number, property_number, value = self.operands(instruction)
+        self.objects.put(number, property_number, value)
+
+    def op_print_obj(self, instruction: Instruction) -> None:
+        """Print the short name of an object."""
+
+        number = self.operands(instruction)[0]
+        self.streams.write(self.text.decode(self.objects.short_name(number)))
+
+    # Text.
+
+    def op_print(self, instruction: Instruction) -> None:
+        """Print the string that follows the instruction."""
+
+        self.streams.write(self.text.decode(instruction.text))
+
+    def op_print_ret(self, instruction: Instruction) -> None:
+        """Print the string that follows the instruction and return true."""
+
+        self.streams.write(self.text.decode(instruction.text) + "\n")
+        self.return_from(1)
+
+    def op_print_addr(self, instruction: Instruction) -> None:
+        """Print the string at a byte address."""
+
+        self.streams.write(self.text.decode(self.operands(instruction)[0]))
+
+    def op_print_paddr(self, instruction: Instruction) -> None:
+        """Print the string at a packed address."""
+
+        address = self.unpack_string(self.operands(instruction)[0])
+        self.streams.write(self.text.decode(address))
+
+    def op_print_char(self, instruction: Instruction) -> None:
+        """Print a ZSCII character."""
+
+        self.streams.write(self.text.zscii(self.operands(instruction)[0]))
+
+    def op_print_unicode(self, instruction: Instruction) -> None:
+        """Print a Unicode character."""
+
+        self.streams.write(chr(self.operands(instruction)[0]))
+
+    def op_check_unicode(self, instruction: Instruction) -> None:
+        """Store that a Unicode character can be both printed and read."""
+
+        self.store(instruction, 3)
+
+    def op_print_table(self, instruction: Instruction) -> None:
+        """Print a rectangle of ZSCII characters from a table."""
+
+        self.streams.write(print_table(self.text, *self.operands(instruction)))
+
+    def op_print_num(self, instruction: Instruction) -> None:
+        """Print a signed number."""
+
+        self.streams.write(str(signed(self.operands(instruction)[0])))
+
+    def op_new_line(self, instruction: Instruction) -> None:
+        """Print a new line."""
+
+        self.streams.write("\n")
+
+    # Streams and windows.
+
+    def op_output_stream(self, instruction: Instruction) -> None:
+        """Select or deselect an output stream."""
+
+        stream, *table = self.operands(instruction)
+        self.streams.select(signed(stream), *table[:1])
+
+    def op_input_stream(self, instruction: Instruction) -> None:
+        """Select an input stream, which is always the reader."""
+
+        self.operands(instruction)
+
+    def op_split_window(self, instruction: Instruction) -> None:
+        """Split the screen into an upper and a lower window."""
+
+        self.streams.split_window(self.operands(instruction)[0])
+
+    def op_set_window(self, instruction: Instruction) -> None:
+        """Print to a window from now on."""
+
+        self.streams.set_window(self.operands(instruction)[0])
+
+    def op_erase_window(self, instruction: Instruction) -> None:
+        """Clear a window, or the whole screen."""
+
+        self.streams.erase_window(signed(self.operands(instruction)[0]))
+
+    def op_erase_line(self, instruction: Instruction) -> None:
+        """Clear the rest of the line the cursor is on."""
+
+        self.operands(instruction)
+
+    def op_set_cursor(self, instruction: Instruction) -> None:
+        """Move the cursor of the upper window."""
+
+        line, column, *_ = self.operands(instruction)
+        self.streams.set_cursor(signed(line), signed(column))
+
+    def op_buffer_mode(self, instruction: Instruction) -> None:
+        """Turn word wrapping of the lower window on or off."""
+
+        self.streams.buffer_mode(bool(self.operands(instruction)[0]))
+
+    def op_set_text_style(self, instruction: Instruction) -> None:
+        """Print in a text style from now on, which plain text cannot show."""
+
+        self.operands(instruction)
+
+    def op_set_colour(self, instruction: Instruction) -> None:
+        """Print in colours from now on, which plain text cannot show."""
+
+        self.operands(instruction)
+
+    def op_set_true_colour(self, instruction: Instruction) -> None:
+        """Print in true colours from now on, which plain text cannot show."""
+
+        self.operands(instruction)
+
+    def op_set_font(self, instruction: Instruction) -> None:
+        """Store the font printed in, which can only ever be the normal font."""
+
+        font = self.operands(instruction)[0]
+        self.store(instruction, 1 if font in (0, 1) else 0)
+
+    def op_show_status(self, instruction: Instruction) -> None:
+        """Update the status line, which a plain text screen does not have."""
+
+    # Input.
+
+    def op_aread(self, instruction: Instruction) -> None:
+        """
+        Read a line of input into a text buffer and tokenise it.
+
+        Up to version 4, the text is stored after the length byte and ends
+        with a zero byte. Later versions store the length of the text after
+        the length byte, followed by the text, and store the character that
+        ended the input.
+
+        Args:
+            instruction: the read instruction
+        """
+
+        line = self._input(instruction)
+
+        if line is None:
+            return
+
+        text_buffer, parse_buffer = self.operands(instruction)[:2]
+        memory = self.memory
+        tokenizer = self.tokenizer
+
+        line = line.lower()
+        codes = bytes(tokenizer.zscii(char) for char in line)
+
+        if self.version >= 5:
+            codes = codes[: memory.read_byte(text_buffer)]
+            memory.write_byte(text_buffer + 1, len(codes))
+            start = text_buffer + 2
+        else:
+            codes = codes[: memory.read_byte(text_buffer) - 1] + b"\0"
+            start = text_buffer + 1
+
+        for offset, code in enumerate(codes):
+            memory.write_byte(start + offset, code)
+
+        if parse_buffer:
+            tokenizer.tokenise(text_buffer, parse_buffer)
+
+        terminator, self.terminator = self.terminator, 13
+
+        if self.version >= 5:
+            self.store(instruction, terminator)
+
+    def op_read_char(self, instruction: Instruction) -> None:
+        """Read a single character of input."""
+
+        line = self._input(instruction)
+
+        if line is None:
+            return
+
+        self.operands(instruction)
+
+        terminator, self.terminator = self.terminator, 13
+        self.store(instruction, self.tokenizer.zscii(line[0]) if line else terminator)
+
+    def _input(self, instruction: Instruction) -> Optional[str]:
+        """
+        Provide a line of input for a read instruction.
+
+        Args:
+            instruction: the read instruction
+
+        Returns:
+            The line, or None when the reader has no input yet, in which
+            case the processor stops with the instruction waiting.
+        """
+
+        self.streams.flush()
+
+        try:
+            line = self.reader()
+        except InputPendingError:
+            self.pc = instruction.address
+            self.running = False
+            self.waiting = instruction
+            return None
+
+        self.waiting = None
+        self.streams.command(line)
+
+        return line
+
+    def op_tokenise(self, instruction: Instruction) -> None:
+        """Tokenise a text buffer against the story or a custom dictionary."""
+
+        text_buffer, parse_buffer, *rest = self.operands(instruction)
+        dictionary, skip = (list(rest) + [0, 0])[:2]
+
+        self.tokenizer.tokenise(text_buffer, parse_buffer, dictionary, bool(skip))
+
+    def op_encode_text(self, instruction: Instruction) -> None:
+        """Encode a word from a text buffer in the form of a dictionary word."""
+
+        text, length, start, coded = self.operands(instruction)
+        codes = bytes(self.memory.read_bytes(text + start, length))
+
+        for offset, byte in enumerate(self.tokenizer.encode(codes)):
+            self.memory.write_byte(coded + offset, byte)
+
+    # Saving and restoring.
+
+    def save(self, path: str, pc: int) -> bool:
+        """
+        Save the session to a Quetzal file.
+
+        Args:
+            path: the path of the save file
+            pc: the address of the store or branch byte of the save
+
+        Returns:
+            True if the session was saved.
+        """
+
+        if not path:
+            logger.debug("unable to save: no place to keep the save file")
+            return False
+
+        try:
+            with open(path, "wb") as save_file:
+                self.quetzal.save(save_file, pc)
+        except OSError as exc:
+            logger.debug(f"unable to save to {path}: {exc}")
+            return False
+
+        return True
+
+    def restore(self, path: str) -> bool:
+        """
+        Restore the session from a Quetzal file.
+
+        The session continues from the save instruction that wrote the file,
+        which now reports that the session was restored.
+
+        Args:
+            path: the path of the save file
+
+        Returns:
+            True if the session was restored.
+        """
+
+        if not path:
+            logger.debug("unable to restore: no place to keep the save file")
+            return False
+
+        try:
+            with open(path, "rb") as save_file:
+                pc = self.quetzal.restore(save_file)
+        except (OSError, QuetzalError) as exc:
+            logger.debug(f"unable to restore from {path}: {exc}")
+            return False
+
+        self._prepare_header()
+        self._resume(pc)
+
+        return True
+
+    def _resume(self, pc: int) -> None:
+        """
+        Continue from a save instruction, reporting that it was restored.
+
+        Up to version 3 the save instruction branches, and its branch data
+        follows the one byte opcode. Later versions store a result instead.
+
+        Args:
+            pc: the address of the store or branch byte of the save
+        """
+
+        if self.version <= 3:
+            instruction = self.decoder.decode(pc - 1)
+            self.pc = instruction.next
+            self.branch(instruction, True)
+        else:
+            self.pc = pc + 1
+            self.write_variable(self.memory.read_byte(pc), 2)
+
+    def op_save(self, instruction: Instruction) -> None:
+        """Save the session, and branch or store 1 on success."""
+
+        if self.operands(instruction):
+            self.store(instruction, 0)
+            return
+
+        if self.version <= 3:
+            self.branch(instruction, self.save(self.save_path, instruction.address + 1))
+        elif self.version == 4:
+            saved = self.save(self.save_path, instruction.address + 1)
+            self.store(instruction, int(saved))
+        else:
+            saved = self.save(self.save_path, instruction.next - 1)
+            self.store(instruction, int(saved))
+
+    def op_restore(self, instruction: Instruction) -> None:
+        """Restore the session, and branch false or store 0 on failure."""
+
+        if self.operands(instruction) or not self.restore(self.save_path):
+            if self.version <= 3:
+                self.branch(instruction, False)
+            else:
+                self.store(instruction, 0)
+
+    def op_save_undo(self, instruction: Instruction) -> None:
+        """Add the session to the undo history and store 1 on success."""
+
+        frames = [frame.copy() for frame in self.frames]
+        saved = self.undo.save(frames, instruction.next - 1)
+        self.store(instruction, int(saved))
+
+    def op_restore_undo(self, instruction: Instruction) -> None:
+        """Put the session back to the newest undo state, or store 0."""
+
+        snapshot = self.undo.restore()
+
+        if snapshot is None:
+            self.store(instruction, 0)
+            return
+
+        self.frames = snapshot.frames
+        self.frame = self.frames[-1]
+        self._prepare_header()
+        self._resume(snapshot.pc)
+
+    # Execution control.
+
+    def op_quit(self, instruction: Instruction) -> None:
+        """Stop execution of the program."""
+
+        self.running = False
+
+    def op_restart(self, instruction: Instruction) -> None:
+        """Restart the program."""
+
+        self.restart()
+
+
+def read_line() -> str:
+    """
+    Read a line of input from standard input, without its line ending.
+
+    Returns:
+        The line.
+
+    Raises:
+        InputPendingError: once standard input has ended, as no more input
+            is ever to come
+    """
+
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+
+    if not line:
+        raise InputPendingError
+
+    return line.rstrip("\r\n")
@@ -0,0 +1,340 @@
+"""Module for profiling the execution of zcode programs."""
+
+import os
+import signal
+import threading
+import time
+from collections import Counter, defaultdict
+from types import FrameType
+from typing import DefaultDict, Dict, List, Optional, Sequence, TextIO, Tuple
+
+from quendor.compiler import Routine
+from quendor.instruction import name
+from quendor.logging import logger
+from quendor.processor import Processor
+
+Stack = Tuple[int, ...]
+
+LOOPS = (Processor.run.__code__, Processor.run_traced.__code__)
+
+
+def label(address: int) -> str:
+    """Provide the name of a routine in a profile."""
+
+    return f"{address:05x}" if address else "main"
+
+
+class Profiler:
+    """
+    Abstraction for a profile of the execution of a session.
+
+    The profile holds how often each opcode and each routine was found
+    executing and for how long. Routines are kept as call stacks of routine
+    addresses, which give the time of each routine on its own as well as
+    together with the routines it calls, and which are written out as
+    collapsed stacks for flame graphs. Frames restored from a save file do
+    not know their routine and are counted under main.
+
+    A profiler with an interval samples the session: a timer interrupts
+    the processor after each interval of CPU time and the profiler looks
+    at the instruction and the frames the processor is on. The dispatch
+    loop of the processor is left alone, so sampling costs next to nothing
+    and can be left on. A profiler without an interval runs a dispatch loop
+    of its own that times every instruction, which gives exact counts at
+    several times the cost.
+    """
+
+    def __init__(self, processor: Processor, interval: float = 0.001) -> None:
+        self.processor: Processor = processor
+        self.interval: float = interval
+        self.counts: Counter = Counter()
+        self.times: DefaultDict[int, float] = defaultdict(float)
+        self.stack_counts: Counter = Counter()
+        self.stack_times: DefaultDict[Stack, float] = defaultdict(float)
+        self.compiled: Dict[Routine, int] = {}
+        self.instructions: int = 0
+        self.seconds: float = 0.0
+        self.inner: float = 0.0
+
+    @property
+    def sampling(self) -> bool:
+        """Provide whether the session can be sampled rather than timed."""
+
+        return (
+            self.interval > 0
+            and hasattr(signal, "setitimer")
+            and threading.current_thread() is threading.main_thread()
+        )
+
+    def run(self) -> None:
+        """Execute the session until it stops, profiling as it goes."""
+
+        if self.interval > 0 and not self.sampling:
+            logger.warning("sampling is not available, timing every instruction")
+
+        instructions = self.processor.instructions
+        start = time.perf_counter()
+
+        try:
+            if self.sampling:
+                self._run_sampled()
+            else:
+                self._run_timed()
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.instructions += self.processor.instructions - instructions
+
+    def _stack(self) -> Stack:
+        """Provide the routines of the frames the processor is on."""
+
+        return tuple(frame.routine for frame in self.processor.frames)
+
+    def _run_sampled(self) -> None:
+        """Execute the session while a timer samples it."""
+
+        previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+        try:
+            self.processor.run()
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, previous)
+
+    def _sample(self, signum: int, frame: Optional[FrameType]) -> None:
+        """
+        Record what the processor is executing when the timer goes off.
+
+        The Python frames are walked back to the dispatch loop, which holds
+        the instruction being executed. A compiled routine on the way there
+        is the routine being executed.
+
+        Args:
+            signum: the number of the timer signal
+            frame: the Python frame that was interrupted
+        """
+
+        compiled = 0
+
+        while frame is not None and frame.f_code not in LOOPS:
+            if frame.f_code.co_filename.startswith("<routine "):
+                compiled = int(frame.f_code.co_name[8:], 16)
+
+            frame = frame.f_back
+
+        instruction = frame.f_locals.get("instruction") if frame else None
+
+        if instruction is None:
+            return
+
+        stack = self._stack() + ((compiled,) if compiled else ())
+
+        self.counts[instruction.opcode] += 1
+        self.times[instruction.opcode] += self.interval
+        self.stack_counts[stack] += 1
+        self.stack_times[stack] += self.interval
+
+    def _run_timed(self) -> None:
+        """Execute the session in a dispatch loop that times each instruction."""
+
+        processor = self.processor
+        cache = processor.decoder.cache
+        decode = processor.decoder.decode
+        handlers = processor.handlers
+        clock = time.perf_counter
+        counts, times = self.counts, self.times
+        stack_counts, stack_times = self.stack_counts, self.stack_times
+        frame = None
+        stack: Stack = ()
+        count = 0
+
+        # Calls to compiled routines are timed as routines of their own.
+
+        processor._call_compiled = self._call_compiled  # type: ignore
+        processor.running = True
+
+        try:
+            while processor.running:
+                if processor.frame is not frame:
+                    frame = processor.frame
+                    stack = self._stack()
+
+                instruction = cache.get(processor.pc) or decode(processor.pc)
+                processor.pc = instruction.next
+                self.inner = 0.0
+                start = clock()
+                handlers[instruction.opcode](instruction)
+                elapsed = clock() - start
+                count += 1
+
+                counts[instruction.opcode] += 1
+                times[instruction.opcode] += elapsed
+                stack_counts[stack] += 1
+                stack_times[stack] += elapsed - self.inner
+        finally:
+            processor.instructions += count
+            processor.streams.flush()
+            del processor._call_compiled  # type: ignore
+
+    def _call_compiled(
+        self,
+        routine: Routine,
+        arguments: Sequence[int],
+        store: int,
+    ) -> None:
+        """
+        Call a compiled routine, timing it as a routine of its own.
+
+        Args:
+            routine: the compiled routine
+            arguments: the values passed to the routine
+            store: the variable for the result, or -1 to discard it
+        """
+
+        start = time.perf_counter()
+
+        try:
+            Processor._call_compiled(self.processor, routine, arguments, store)
+        finally:
+            elapsed = time.perf_counter() - start
+            stack = self._stack() + (self._address(routine),)
+
+            self.inner += elapsed
+            self.stack_counts[stack] += 1
+            self.stack_times[stack] += elapsed
+
+    def _address(self, routine: Routine) -> int:
+        """Provide the address of a compiled routine."""
+
+        if routine not in self.compiled:
+            self.compiled.update(
+                (function, address)
+                for address, function in self.processor.routines.items()
+                if function is not None
+            )
+
+        return self.compiled.get(routine, 0)
+
+    def routines(self) -> Dict[int, List[float]]:
+        """
+        Provide the count and times of each routine.
+
+        Returns:
+            The count, the time spent in the routine itself and the time
+            spent in the routine together with the routines it calls, for
+            each routine address. The count is of the instructions found
+            executing in the routine, or of the calls to it once compiled.
+        """
+
+        table: Dict[int, List[float]] = {}
+
+        for stack, seconds in self.stack_times.items():
+            if not stack:
+                continue
+
+            for address in set(stack):
+                table.setdefault(address, [0, 0.0, 0.0])[2] += seconds
+
+            own = table[stack[-1]]
+            own[0] += self.stack_counts[stack]
+            own[1] += seconds
+
+        return table
+
+    def report(self, report_file: TextIO) -> None:
+        """Write the opcodes and routines of the profile, most costly first."""
+
+        if self.sampling:
+            mode = f"sampled every {self.interval * 1000:.3f} ms"
+        else:
+            mode = "timing every instruction"
+
+        total = sum(self.times.values()) or 1.0
+
+        report_file.write(
+            f"Quendor profile of {self.processor.program.file}\n"
+            f"{self.instructions:,} instructions in {self.seconds:.3f}s, {mode}\n\n"
+            f"{'Opcode':<20}{'Count':>14}{'Seconds':>14}{'Share':>9}\n",
+        )
+
+        for opcode, seconds in sorted(self.times.items(), key=lambda item: -item[1]):
+            report_file.write(
+                f"{name(opcode):<20}{self.counts[opcode]:>14,}"
+                f"{seconds:>14.6f}{seconds / total:>9.1%}\n",
+            )
+
+        report_file.write(
+            f"\n{'Routine':<20}{'Count':>14}{'Self':>14}{'Cumulative':>14}\n",
+        )
+
+        routines = self.routines()
+
+        for address in sorted(routines, key=lambda key: -routines[key][2]):
+            count, own, cumulative = routines[address]
+
+            report_file.write(
+                f"{label(address):<20}{int(count):>14,}"
+                f"{own:>14.6f}{cumulative:>14.6f}\n",
+            )
+
+    def collapse(self, stacks_file: TextIO) -> None:
+        """Write the call stacks of the profile, in microseconds, for flame graphs."""
+
+        for stack, seconds in sorted(self.stack_times.items()):
+            microseconds = round(seconds * 1_000_000)
+
+            if stack and microseconds:
+                stacks_file.write(
+                    ";".join(label(address) for address in stack)
+                    + f" {microseconds}\n",
+                )
+
+    def save(self, path: str) -> str:
+        """
+        Write the report of the profile and its collapsed call stacks.
+
+        Args:
+            path: the file for the report
+
+        Returns:
+            The file the collapsed call stacks were written to, which is the
+            report file with a folded extension.
+        """
+
+        stacks_path = os.path.splitext(path)[0] + ".folded"
+
+        with open(path, "w", encoding="utf-8") as report_file:
+            self.report(report_file)
+
+        with open(stacks_path, "w", encoding="utf-8") as stacks_file:
+            self.collapse(stacks_file)
+
+        return stacks_path
+
+
+def profile(processor: Processor, path: str, interval: float = 0.001) -> Profiler:
+    """
+    Execute a session under a profiler and save the profile.
+
+    The profile is saved however the session stops, so a session that
+    fails can still be looked at.
+
+    Args:
+        processor: the processor of the session
+        path: the file for the report of the profile
+        interval: the seconds of CPU time between samples, or 0 to time
+            every instruction
+
+    Returns:
+        The profiler.
+    """
+
+    profiler = Profiler(processor, interval)
+
+    try:
+        profiler.run()
+    finally:
+        stacks_path = profiler.save(path)
+        logger.info(f"profile written to {path} and {stacks_path}")
+
+    return profiler
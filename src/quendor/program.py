@@ -1,10 +1,11 @@
 """Module for zcode program abstraction."""
 
+import mmap
 import os
 from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Union
 
-from logzero import logger
-
+from quendor.blorb import Blorb
 from quendor.errors import (
     InvalidZcodeProgramFormatError,
     UnableToAccessZcodeProgramError,
@@ -12,39 +13,167 @@ from quendor.errors import (
     UnknownZCodeProgramFormatError,
     UnsupportedZcodeProgramTypeError,
 )
+from quendor.header import Header
+from quendor.logging import logger
+
+Buffer = Union[bytes, bytearray, memoryview]
+Source = Union[str, Path, Buffer, BinaryIO]
 
 
 class Program:
     """Abstraction for a zcode program."""
 
-    def __init__(self, program: str) -> None:
+    def __init__(self, program: str, mapped: bool = False) -> None:
+        self._prepare(program, mapped)
+        self._locate()
+        self._read_memory()
+
+    def _prepare(self, program: str, mapped: bool) -> None:
+        """Give the program its starting state, before anything is read."""
+
         self._program: str = program
+        self._mapped: bool = mapped
+        self._mmap: Optional[mmap.mmap] = None
         self.file: str = ""
-        self.data: bytes = b""
+        self.data: Union[bytes, memoryview] = b""
+        self.story: memoryview = memoryview(b"")
+        self.blorb: Optional[Blorb] = None
         self.format: str = ""
+        self._header: Optional[Header] = None
+        self.cache: Dict[str, Any] = {}
 
-        self._locate()
-        self._read_memory()
+    @classmethod
+    def from_buffer(cls, buffer: Buffer, path: str = "") -> "Program":  # noqa: ANN102
+        """
+        Provide a program over data that is already in memory.
+
+        Nothing is located or read. The data of the program is a view of
+        the buffer, not a copy, which lets the worker processes of a host
+        share a story that was loaded once into shared memory.
+
+        Args:
+            buffer: the contents of a program file
+            path: the file the contents came from, for reporting
+
+        Returns:
+            The program.
+        """
+
+        program = cls.__new__(cls)
+        program._prepare(path, mapped=False)
+        program.file = path
+        program.data = memoryview(buffer)
+        program._read_format()
+        program._read_story()
+
+        return program
+
+    @classmethod
+    def from_file(cls, stream: BinaryIO, path: str = "") -> "Program":  # noqa: ANN102
+        """
+        Provide a program read from a binary file that is already open.
+
+        Args:
+            stream: the file, read from where it is to its end
+            path: the file the contents came from, for reporting, which is
+                the name of the file if it has one
+
+        Returns:
+            The program.
+        """
+
+        name = getattr(stream, "name", "")
+
+        if not path and isinstance(name, str):
+            path = name
+
+        return cls.from_buffer(stream.read(), path)
+
+    @classmethod
+    def load(cls, source: Source, mapped: bool = False) -> "Program":  # noqa: ANN102
+        """
+        Provide a program from whatever it is held in.
+
+        This is the way in for code that embeds Quendor. A path is located
+        and read as on the command line, while the contents of a program,
+        in memory or in an open file, are taken as they are.
+
+        Args:
+            source: a path, the contents of a program file, or an open
+                binary file
+            mapped: whether a program read from a path is memory-mapped
+
+        Returns:
+            The program.
+        """
+
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return cls.from_buffer(source)
+
+        if isinstance(source, (str, Path)):
+            return cls(str(source), mapped=mapped)
+
+        return cls.from_file(source)
+
+    @property
+    def header(self) -> Header:
+        """Provide the header of the story, reading it on first use."""
+
+        if self._header is None:
+            self._header = Header(self.story)
+
+        return self._header
+
+    @property
+    def checksum(self) -> int:
+        """Provide the checksum of the story, computing it on first use."""
+
+        if "checksum" not in self.cache:
+            from quendor.checksum import checksum
+
+            self.cache["checksum"] = checksum(self.story, self.header.file_length)
+
+        return self.cache["checksum"]
+
+    @property
+    def verified(self) -> bool:
+        """Provide whether the story matches the checksum in its header."""
+
+        return self.checksum == self.header.checksum
 
     def _locate(self) -> None:
-        """Determine if a zcode program exists."""
+        """
+        Determine if a zcode program exists.
+
+        A program is looked for as it was named first. Otherwise it is
+        looked for under that name in each of the directories listed in
+        $ZCODE_PATH, and only then in the catalog of those directories,
+        where it can also be named by its release and serial code.
+
+        Raises:
+            UnableToLocateZcodeProgramError: if the program cannot be found
+        """
 
-        paths = [os.curdir]
-        paths.append(str(Path(os.path.expandvars("$ZCODE_PATH"))))
+        from quendor.catalog import search_path
 
-        for path in paths:
-            found = os.path.isfile(os.path.join(path, self._program))
+        paths = search_path()
+        candidates = [self._program] + [
+            os.path.join(directory, self._program) for directory in paths
+        ]
+        self.file = next((path for path in candidates if os.path.isfile(path)), "")
 
-            if found:
-                self.file = os.path.join(path, self._program)
+        if not self.file and paths:
+            from quendor.catalog import Catalog
 
-                logger.debug(f"zcode program file: {self.file}")
+            self.file = Catalog(paths).find(self._program) or ""
 
-                return
+        if not self.file:
+            raise UnableToLocateZcodeProgramError(
+                "Quendor was unable to find the zcode program.\n\n"
+                + f"Checked in: {[os.curdir] + paths}",
+            )
 
-        raise UnableToLocateZcodeProgramError(
-            f"Quendor was unable to find the zcode program.\n\nChecked in: {paths}",
-        )
+        logger.debug(f"zcode program file: {self.file}")
 
     def _read_memory(self) -> None:
         """
@@ -57,18 +186,67 @@ class Program:
 
         self._read_data()
         self._read_format()
+        self._read_story()
 
     def _read_data(self) -> None:
-        """Open a program file and read binary contents."""
+        """
+        Open a program file and read binary contents.
+
+        When the program was requested as mapped, the file is not read at
+        all. Instead the file is memory-mapped and the data is exposed as
+        a read-only memoryview over the mapping. That means the operating
+        system shares the pages of the file between every process that
+        maps the same program and nothing is copied into Python memory.
+
+        Raises:
+            UnableToAccessZcodeProgramError: if the program cannot be read
+        """
 
         try:
             with open(self.file, "rb") as zcode_program:
-                self.data = zcode_program.read()
-        except OSError as exc:
+                if self._mapped:
+                    self._mmap = mmap.mmap(
+                        zcode_program.fileno(),
+                        0,
+                        access=mmap.ACCESS_READ,
+                    )
+                    self.data = memoryview(self._mmap)
+                else:
+                    self.data = zcode_program.read()
+        except (OSError, ValueError) as exc:
             raise UnableToAccessZcodeProgramError(
                 f"Unable to access the zcode program: {self.file}",
             ) from exc
 
+    def close(self) -> None:
+        """
+        Release the program data, including any memory mapping.
+
+        A mapping can only be closed once every view onto it is released.
+        If something outside the program still holds a view, such as a
+        blorb resource, the mapping is left for the garbage collector.
+        """
+
+        self.story.release()
+
+        if self.blorb is not None:
+            self.blorb.data.release()
+            self.blorb = None
+
+        if isinstance(self.data, memoryview):
+            self.data.release()
+
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                logger.debug("zcode program mapping still has views")
+
+            self._mmap = None
+
+        self.data = b""
+        self.story = memoryview(b"")
+
     def _read_format(self) -> None:
         """
         Read the format of program file.
@@ -89,7 +267,7 @@ class Program:
             UnknownZCodeProgramFormatError: if zcode or blorb format not found
         """
 
-        format_id = self.data[0:4]
+        format_id = bytes(self.data[0:4])
 
         # Rule out Glulx right away since Quendor doesn't support it.
 
@@ -102,7 +280,7 @@ class Program:
         # we have an interactive fiction type of IFF file.
 
         if format_id.decode("latin-1") == "FORM":
-            ifrs_id = self.data[8:12]
+            ifrs_id = bytes(self.data[8:12])
 
             if ifrs_id.decode("latin-1") != "IFRS":
                 raise InvalidZcodeProgramFormatError(
@@ -116,7 +294,7 @@ class Program:
 
         # If we got to this point, we likely have an unblorbed zcode file.
 
-        if format_id[0] >= 1 and format_id[0] <= 8:
+        if format_id and format_id[0] >= 1 and format_id[0] <= 8:
             self.format = "ZCODE"
             logger.debug(f"zcode file format: {self.format}")
             return
@@ -124,3 +302,30 @@ class Program:
         raise UnknownZCodeProgramFormatError(
             f"Quendor cannot determine the file format of {self.file}",
         )
+
+    def _read_story(self) -> None:
+        """
+        Read the story from the program data.
+
+        The story is the z-code image itself. For an unblorbed program
+        that's the whole file. For a blorb, the resource index is read to
+        find the executable chunk and the story is a view of just that
+        chunk; no other resource is read.
+
+        Raises:
+            UnsupportedZcodeProgramTypeError: if a blorb holds a Glulx program
+        """
+
+        if self.format != "BLORB":
+            self.story = memoryview(self.data)
+            return
+
+        self.blorb = Blorb(self.data)
+        chunk_id, self.story = self.blorb.executable()
+
+        if chunk_id != "ZCOD":
+            raise UnsupportedZcodeProgramTypeError(
+                f"Quendor cannot interpret {chunk_id.strip()} blorb executables.",
+            )
+
+        logger.debug(f"zcode executable size: {len(self.story)}")
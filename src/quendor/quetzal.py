@@ -0,0 +1,267 @@
+"""Module for saving and restoring sessions in the Quetzal format."""
+
+import re
+from typing import BinaryIO, Iterator, List, TYPE_CHECKING, Tuple
+
+from quendor.memory import Memory
+
+if TYPE_CHECKING:
+    from quendor.processor import Frame, Processor
+
+RUNS = re.compile(b"\0{1,256}")
+ENCODED_RUNS = re.compile(b"\0(.)", re.DOTALL)
+
+
+class QuetzalError(Exception):
+    """Signal a save file that cannot be restored into a session."""
+
+
+def xor(first: bytes, second: bytes) -> bytes:
+    """Provide the bytes of two runs of the same length XORed together."""
+
+    length = len(first)
+    value = int.from_bytes(first, "big") ^ int.from_bytes(second, "big")
+
+    return value.to_bytes(length, "big")
+
+
+def compress(memory: Memory) -> bytes:
+    """
+    Compress dynamic memory against the dynamic memory of the story.
+
+    Dynamic memory is XORed against the original story bytes, which leaves
+    zeros wherever a byte is unchanged. Each run of up to 256 zeros is then
+    written as a zero followed by one less than the length of the run, and
+    trailing zeros are left out. Both steps work on whole runs of bytes, so
+    nothing loops over single bytes in Python.
+
+    Args:
+        memory: the memory of the session
+
+    Returns:
+        The contents of a CMem chunk.
+    """
+
+    changes = xor(bytes(memory.dynamic), bytes(memory.static[: memory.dynamic_size]))
+
+    return RUNS.sub(
+        lambda run: b"\0" + bytes((len(run.group()) - 1,)),
+        changes.rstrip(b"\0"),
+    )
+
+
+def decompress(memory: Memory, data: bytes) -> bytes:
+    """
+    Provide the dynamic memory held in the contents of a CMem chunk.
+
+    Args:
+        memory: the memory of the session
+        data: the contents of the CMem chunk
+
+    Returns:
+        The dynamic memory.
+
+    Raises:
+        QuetzalError: if the chunk expands beyond dynamic memory
+    """
+
+    changes = ENCODED_RUNS.sub(lambda run: bytes(run.group(1)[0] + 1), data)
+
+    if len(changes) > memory.dynamic_size:
+        raise QuetzalError("compressed memory is larger than dynamic memory")
+
+    changes += bytes(memory.dynamic_size - len(changes))
+
+    return xor(changes, bytes(memory.static[: memory.dynamic_size]))
+
+
+class Quetzal:
+    """
+    Abstraction for the save files of a session.
+
+    A Quetzal save file is an IFF FORM of type IFZS, holding an IFhd chunk
+    that identifies the story and the program counter, a CMem chunk with
+    the compressed dynamic memory and a Stks chunk with the call frames.
+    Chunks are written straight to the save file one after the other and
+    read back chunk by chunk, so the file itself is never assembled into a
+    single buffer.
+    """
+
+    def __init__(self, processor: "Processor") -> None:
+        self.processor: "Processor" = processor
+        self.memory: Memory = processor.memory
+
+    def _identity(self) -> bytes:
+        """Provide the release, serial and checksum that identify the story."""
+
+        static = self.memory.static
+
+        return b"".join((static[0x02:0x04], static[0x12:0x18], static[0x1C:0x1E]))
+
+    def save(self, save_file: BinaryIO, pc: int) -> None:
+        """
+        Write the state of the session to a save file.
+
+        Args:
+            save_file: the binary file to write to
+            pc: the address the session continues from once restored
+        """
+
+        chunks = (
+            (b"IFhd", self._identity() + pc.to_bytes(3, "big")),
+            (b"CMem", compress(self.memory)),
+            (b"Stks", b"".join(self._frames())),
+        )
+
+        length = 4 + sum(8 + len(data) + len(data) % 2 for _, data in chunks)
+
+        save_file.write(b"FORM" + length.to_bytes(4, "big") + b"IFZS")
+
+        for chunk_id, data in chunks:
+            save_file.write(chunk_id + len(data).to_bytes(4, "big"))
+            save_file.write(data)
+
+            if len(data) % 2:
+                save_file.write(b"\0")
+
+    def _frames(self) -> Iterator[bytes]:
+        """Provide each call frame in the form of the Stks chunk."""
+
+        for index, frame in enumerate(self.processor.frames):
+            dummy = index == 0 and self.processor.version != 6
+            flags = len(frame.locals)
+
+            if frame.store < 0 and not dummy:
+                flags |= 0x10
+
+            yield b"".join(
+                (
+                    frame.return_pc.to_bytes(3, "big"),
+                    bytes((flags, max(frame.store, 0), (1 << frame.arg_count) - 1)),
+                    len(frame.stack).to_bytes(2, "big"),
+                    b"".join(value.to_bytes(2, "big") for value in frame.locals),
+                    b"".join(value.to_bytes(2, "big") for value in frame.stack),
+                ),
+            )
+
+    def _chunks(self, save_file: BinaryIO) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Provide the chunks of a save file one at a time.
+
+        Args:
+            save_file: the binary file to read from
+
+        Yields:
+            The ID and contents of each chunk.
+
+        Raises:
+            QuetzalError: if the file is not a Quetzal save file
+        """
+
+        form = save_file.read(12)
+
+        if len(form) < 12 or form[0:4] != b"FORM" or form[8:12] != b"IFZS":
+            raise QuetzalError("not a Quetzal save file")
+
+        remaining = int.from_bytes(form[4:8], "big") - 4
+
+        while remaining >= 8:
+            header = save_file.read(8)
+
+            if len(header) < 8:
+                raise QuetzalError("truncated save file")
+
+            length = int.from_bytes(header[4:8], "big")
+            data = save_file.read(length + length % 2)[0:length]
+
+            if len(data) < length:
+                raise QuetzalError("truncated save file")
+
+            remaining -= 8 + length + length % 2
+
+            yield header[0:4], data
+
+    def restore(self, save_file: BinaryIO) -> int:
+        """
+        Read the state of the session from a save file.
+
+        The session is only changed once the whole file has been read and
+        found to belong to the story.
+
+        Args:
+            save_file: the binary file to read from
+
+        Returns:
+            The address the session continues from.
+
+        Raises:
+            QuetzalError: if the file does not hold a session of the story
+        """
+
+        chunks = dict(self._chunks(save_file))
+        identity = chunks.get(b"IFhd", b"")
+
+        if len(identity) < 13 or b"Stks" not in chunks:
+            raise QuetzalError("save file is incomplete")
+
+        if identity[0:10] != self._identity():
+            raise QuetzalError("save file belongs to another story")
+
+        if b"CMem" in chunks:
+            dynamic = decompress(self.memory, chunks[b"CMem"])
+        else:
+            dynamic = chunks.get(b"UMem", b"")
+
+        frames = self._read_frames(chunks[b"Stks"])
+
+        if len(dynamic) != self.memory.dynamic_size or not frames:
+            raise QuetzalError("save file is incomplete")
+
+        self.memory.dynamic[:] = dynamic
+        self.memory.changed(0, self.memory.dynamic_size)
+        self.processor.frames = frames
+        self.processor.frame = frames[-1]
+
+        return int.from_bytes(identity[10:13], "big")
+
+    def _read_frames(self, data: bytes) -> List["Frame"]:
+        """
+        Provide the call frames held in the contents of a Stks chunk.
+
+        Args:
+            data: the contents of the Stks chunk
+
+        Returns:
+            The call frames.
+        """
+
+        from quendor.processor import Frame
+
+        frames: List[Frame] = []
+        offset = 0
+
+        while offset + 8 <= len(data):
+            end = offset + 8
+            header = data[offset:end]
+            return_pc = int.from_bytes(header[0:3], "big")
+            flags, store, arguments = header[3:6]
+            depth = int.from_bytes(header[6:8], "big")
+            count = flags & 0x0F
+            offset += 8
+
+            words = [
+                (data[start] << 8) | data[start + 1]
+                for start in range(offset, offset + 2 * (count + depth), 2)
+            ]
+            offset += 2 * (count + depth)
+
+            frame = Frame(
+                return_pc,
+                -1 if flags & 0x10 or not frames else store,
+                words[0:count],
+                (arguments + 1).bit_length() - 1,
+            )
+            frame.stack = words[count:]
+            frames.append(frame)
+
+        return frames
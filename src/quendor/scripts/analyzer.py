@@ -12,6 +12,7 @@ import pathlib
 import subprocess
 import sys
 import textwrap
+from typing import Optional
 
 import colorama
 
@@ -108,6 +109,16 @@ def check_for_story(story_file: str) -> None:
     )
 
 
+def find_in_catalog(story_file: str) -> Optional[str]:
+    """Provide the path of a story from the catalog of $ZCODE_PATH."""
+
+    from quendor.catalog import Catalog, search_path
+
+    paths = search_path()
+
+    return Catalog(paths).find(story_file) if paths else None
+
+
 def run_tool(name: str, story_file: str) -> list:
     """Execute the provided tool against the provided story file."""
 
@@ -128,6 +139,12 @@ def run_tool(name: str, story_file: str) -> list:
     else:
         story_path = f"./{story_file}"
 
+    # A story that is not where it was named is looked up in the catalog,
+    # by name or by release and serial code.
+
+    if not pathlib.Path(story_path).is_file():
+        story_path = find_in_catalog(story_file) or story_path
+
     check_for_story(story_path)
 
     if name == "txd":
@@ -0,0 +1,821 @@
+"""
+Z-Code Interpreter Benchmarks.
+
+This module provides a suite of workloads that measure how fast the
+interpreter is. Each workload reports its rate, in instructions or other
+operations per second, the best time it took over a number of repeats and
+the peak memory it allocated. Results can be stored as a JSON baseline and
+later runs compared against that baseline, so a change that makes the
+interpreter slower shows up as a number rather than as a feeling.
+
+Full runs use the checker files, which can be downloaded with the Quendor
+downloader (`quend --checkers`), and the test program fixture. A checker
+file that cannot be found is skipped. The workloads that load a story use
+the fixture, or whichever story is given instead, and fail if it cannot be
+found. The fixture is only there when the benchmarks are run from the root
+of the repository, so anywhere else a story has to be given. Each full run
+plays through a script of commands, and a run that fails is reported as a
+failure, not as a time.
+"""
+
+import argparse
+import io
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import tracemalloc
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TYPE_CHECKING,
+)
+
+import colorama
+
+from termcolor import colored
+
+from quendor.logging import setup_logging
+
+if TYPE_CHECKING:
+    from quendor.objects import ObjectTable
+
+if sys.version_info < (3, 7):
+    sys.stderr.write("This script requires at least version 3.7 of Python.\n")
+    sys.exit(1)
+
+colorama.init()
+
+CHECKER_STORIES = ["czech.z5", "praxix.z5", "etude.z5"]
+FIXTURE_STORY = os.path.join("tests", "fixtures", "test_program.z5")
+
+# The commands each full run plays through. A story that is not listed is
+# run until it first asks for input.
+
+SCRIPTS = {
+    "test_program.z5": (
+        "look",
+        "take rock",
+        "take feather",
+        "inventory",
+        "east",
+        "look",
+        "west",
+        "drop rock",
+        "score",
+        "quit",
+        "y",
+    ),
+    "praxix.z5": ("all",),
+}
+
+# inc_chk g00 30000 ?~loop; quit
+
+LOOP = bytes((0xC5, 0x4F, 0x10, 0x75, 0x30, 0x3F, 0xFB, 0xBA))
+
+# loop: call_vn 0x90; inc_chk g00 2000 ?~loop; quit
+
+CALL_LOOP = bytes(
+    (0xF9, 0x3F, 0x00, 0x90, 0xC5, 0x4F, 0x10, 0x07, 0xD0, 0x3F, 0xF7, 0xBA),
+)
+
+# 1 local; loop: inc_chk L01 100 ?~loop; rtrue
+
+COUNTING_ROUTINE = bytes((0x01, 0x05, 0x01, 0x64, 0x3F, 0xFD, 0xB0))
+
+# The most seconds a single operation of a workload may take, whatever the
+# baseline. These cover the start of a new process, so they are generous
+# enough for a slow machine but not for a heavy import.
+
+BUDGETS = {"startup": 0.25, "cold-load": 0.3}
+
+Operation = Callable[[], int]
+
+
+class Workload(NamedTuple):
+    """A named workload, with what it counts and how to prepare it."""
+
+    name: str
+    unit: str
+    prepare: Callable[[], Optional[Operation]]
+
+
+class Measurement(NamedTuple):
+    """The outcome of measuring a workload."""
+
+    name: str
+    unit: str
+    operations: int
+    seconds: float
+    peak_kb: float
+    note: str
+    failed: bool = False
+
+    @property
+    def rate(self) -> float:
+        """Provide the number of operations per second."""
+
+        return self.operations / self.seconds if self.seconds else 0.0
+
+
+class ScriptEndedError(Exception):
+    """Signal a full run that asked for input after its script ran out."""
+
+
+class Script:
+    """Abstraction for a script of commands that a full run plays through."""
+
+    def __init__(self, commands: Sequence[str]) -> None:
+        self.commands: Sequence[str] = commands
+        self.lines: Iterator[str] = iter(commands)
+
+    def rewind(self) -> None:
+        """Start the script over from its first command."""
+
+        self.lines = iter(self.commands)
+
+    def __call__(self) -> str:
+        """
+        Provide the next command of the script, as a processor reads a line.
+
+        Returns:
+            The next command.
+
+        Raises:
+            ScriptEndedError: if the script has run out
+        """
+
+        try:
+            return next(self.lines)
+        except StopIteration:
+            raise ScriptEndedError from None
+
+
+def process_parameters(params: list) -> dict:
+    """Process all parameters from the command line."""
+
+    parser = argparse.ArgumentParser(
+        description="Quendor Z-Code Interpreter Benchmarks",
+        usage=textwrap.dedent(
+            """
+            The general format is:
+
+                quenb [options]
+
+            Examples:
+                (1) quenb
+                    - runs every workload and reports the results
+
+                (2) quenb --save benchmarks/baseline.json
+                    - stores the results as a baseline
+
+                (3) quenb --compare benchmarks/baseline.json
+                    - reports the results against a stored baseline
+            """,
+        ),
+        epilog=textwrap.dedent(
+            """
+            Enjoy your measurements!
+            """,
+        ),
+    )
+
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=5,
+        help="number of times to time each workload (default: 5)",
+    )
+    parser.add_argument(
+        "-s",
+        "--save",
+        metavar="baseline",
+        help="store the results as a JSON baseline",
+    )
+    parser.add_argument(
+        "-c",
+        "--compare",
+        metavar="baseline",
+        help="compare the results against a JSON baseline",
+    )
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        type=float,
+        default=10.0,
+        help="percentage a result may fall behind the baseline (default: 10)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workload",
+        action="append",
+        dest="workloads",
+        metavar="name",
+        help="run only the named workload (may be given more than once)",
+    )
+    parser.add_argument(
+        "-z",
+        "--zcode-directory",
+        default="resources/zcheckers",
+        help="directory holding the checker files",
+    )
+    # The test program is only there in a checkout of the repository, so
+    # anywhere else the story has to be given.
+
+    fixture = os.path.isfile(FIXTURE_STORY)
+
+    parser.add_argument(
+        "-p",
+        "--story",
+        default=FIXTURE_STORY if fixture else None,
+        required=not fixture,
+        help="story for the workloads that load one (default: the test program, "
+        "when run from the repository)",
+    )
+
+    return vars(parser.parse_args(params))
+
+
+def assemble(directory: str, name: str, main: bytes, routine: bytes = b"") -> str:
+    """
+    Assemble a minimal version 5 zcode program.
+
+    The main code starts at the static memory base, 0x220, and is followed
+    by a routine at packed address 0x90. Global variables start at 0x40.
+
+    Args:
+        directory: the directory to write the program into
+        name: the file name of the program
+        main: the code to start executing
+        routine: the code of the routine, including its header
+
+    Returns:
+        The path to the assembled program.
+
+    Raises:
+        ValueError: if the main code runs into the routine, or the routine
+            runs past the end of the program
+    """
+
+    if len(main) > 0x20:
+        raise ValueError(f"main code of {len(main)} bytes runs into the routine")
+
+    if len(routine) > 0x200:
+        raise ValueError(f"routine of {len(routine)} bytes runs past the end")
+
+    story = bytearray(0x440)
+    story[0x00] = 5
+    story[0x04:0x06] = (0x220).to_bytes(2, "big")
+    story[0x06:0x08] = (0x220).to_bytes(2, "big")
+    story[0x0C:0x0E] = (0x40).to_bytes(2, "big")
+    story[0x0E:0x10] = (0x220).to_bytes(2, "big")
+    main_end = 0x220 + len(main)
+    routine_end = 0x240 + len(routine)
+    story[0x220:main_end] = main
+    story[0x240:routine_end] = routine
+
+    path = os.path.join(directory, name)
+    pathlib.Path(path).write_bytes(bytes(story))
+
+    return path
+
+
+def story_run(
+    path: str,
+    threshold: int = 20,
+    commands: Sequence[str] = (),
+) -> Optional[Operation]:
+    """
+    Prepare a full run of a story, which plays through a script of commands.
+
+    The run stops when the story quits, or when it asks for input once the
+    script has run out. Any error the story stops with is passed on.
+
+    Args:
+        path: the path to the story file
+        threshold: the number of calls after which a routine is compiled
+        commands: the commands to play through
+
+    Returns:
+        A run of the story, or None if the story cannot be found.
+    """
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    if not os.path.isfile(path):
+        return None
+
+    script = Script(commands)
+    processor = Processor(
+        Program(os.path.abspath(path)),
+        threshold=threshold,
+        output=lambda text: None,
+        reader=script,
+    )
+
+    def run() -> int:
+        script.rewind()
+        processor.restart()
+        processor.instructions = 0
+
+        try:
+            processor.run()
+        except ScriptEndedError:
+            processor.streams.flush()
+
+        return processor.instructions
+
+    return run
+
+
+def full_run(path: str) -> Optional[Operation]:
+    """Prepare a full run of a story, with the script it is played with."""
+
+    return story_run(path, commands=SCRIPTS.get(os.path.basename(path), ()))
+
+
+def text_decoding(path: str) -> Optional[Operation]:
+    """Prepare decoding every dictionary word and abbreviation of a story."""
+
+    from quendor.dictionary import Tokenizer
+    from quendor.memory import Memory
+    from quendor.program import Program
+    from quendor.text import TextDecoder
+
+    if not os.path.isfile(path):
+        return None
+
+    program = Program(os.path.abspath(path))
+    memory = Memory(program)
+    index = Tokenizer(memory, TextDecoder(memory)).dictionary()
+
+    def run() -> int:
+        program.cache.pop("strings", None)
+        program.cache.pop("abbreviations", None)
+
+        text = TextDecoder(memory)
+        abbreviations = len(text.abbreviations)
+
+        for address in index.entries.values():
+            text.decode(address)
+
+        return abbreviations + len(index.entries)
+
+    return run
+
+
+def object_walk(path: str) -> Optional[Operation]:
+    """Prepare walking the object tree of a story, as objectloop does."""
+
+    from quendor.memory import Memory
+    from quendor.objects import ObjectTable
+    from quendor.program import Program
+
+    if not os.path.isfile(path):
+        return None
+
+    objects = ObjectTable(Memory(Program(os.path.abspath(path))))
+
+    def run() -> int:
+        count = 0
+
+        for _ in range(500):
+            for number in range(1, objects.count + 1):
+                count += visit_children(objects, number)
+                objects.next_property(number, 0)
+                count += 1
+
+        return count
+
+    return run
+
+
+def visit_children(objects: "ObjectTable", number: int) -> int:
+    """
+    Visit each child of an object, as the body of an objectloop does.
+
+    Args:
+        objects: the object table
+        number: the number of the object
+
+    Returns:
+        The number of object table reads made.
+    """
+
+    count = 0
+    child = objects.child[number]
+
+    while child:
+        objects.has_attribute(child, 1)
+        objects.get(child, 1)
+        child = objects.sibling[child]
+        count += 3
+
+    return count
+
+
+def story_checksum(path: str) -> Optional[Operation]:
+    """Prepare computing the checksum of a story, as verify does."""
+
+    from quendor.program import Program
+
+    if not os.path.isfile(path):
+        return None
+
+    program = Program(os.path.abspath(path))
+
+    def run() -> int:
+        for _ in range(100):
+            program.cache.pop("checksum", None)
+            program.checksum
+
+        return 100
+
+    return run
+
+
+def save_and_restore(path: str) -> Optional[Operation]:
+    """Prepare saving a session to a Quetzal file and restoring it."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    if not os.path.isfile(path):
+        return None
+
+    processor = Processor(Program(os.path.abspath(path)), output=lambda text: None)
+
+    # Change a spread of dynamic memory so there is something to compress.
+
+    for address in range(0x100, processor.memory.dynamic_size, 97):
+        processor.memory.dynamic[address] ^= 0x55
+
+    def run() -> int:
+        for _ in range(100):
+            save_file = io.BytesIO()
+            processor.quetzal.save(save_file, processor.pc)
+            save_file.seek(0)
+            processor.quetzal.restore(save_file)
+
+        return 100
+
+    return run
+
+
+def startup() -> Operation:
+    """Prepare starting the interpreter in a new process."""
+
+    def run() -> int:
+        subprocess.run(  # noqa: S603
+            [sys.executable, "-m", "quendor", "--version"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+
+        return 1
+
+    return run
+
+
+def cold_load(path: str) -> Optional[Operation]:
+    """Prepare loading a story in a new process, with nothing imported yet."""
+
+    if not os.path.isfile(path):
+        return None
+
+    def run() -> int:
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; from quendor.program import Program; Program(sys.argv[1])",
+                os.path.abspath(path),
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+
+        return 1
+
+    return run
+
+
+def require(path: str) -> str:
+    """Provide the path to a story that has to be there, as nothing skips it."""
+
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"no story at {path}")
+
+    return path
+
+
+def workloads(directory: str, zcode_directory: str, story: str) -> List[Workload]:
+    """
+    Provide every workload of the suite.
+
+    Args:
+        directory: a directory for assembled programs
+        zcode_directory: the directory holding the checker files
+        story: the story for the workloads that load one
+
+    Returns:
+        The workloads.
+    """
+
+    loop = assemble(directory, "loop.z5", LOOP)
+    calls = assemble(directory, "calls.z5", CALL_LOOP, COUNTING_ROUTINE)
+
+    suite = [
+        Workload("startup", "starts", startup),
+        Workload("cold-load", "loads", lambda: cold_load(require(story))),
+        Workload("loop-interpreted", "instructions", lambda: story_run(loop, 0)),
+        Workload("calls-interpreted", "instructions", lambda: story_run(calls, 0)),
+        Workload("calls-compiled", "instructions", lambda: story_run(calls)),
+        Workload("text-decoding", "strings", lambda: text_decoding(require(story))),
+        Workload("object-walk", "lookups", lambda: object_walk(require(story))),
+        Workload("save-restore", "saves", lambda: save_and_restore(require(story))),
+        Workload("checksum", "checksums", lambda: story_checksum(require(story))),
+        Workload("run-test_program", "instructions", lambda: full_run(require(story))),
+    ]
+
+    for checker in CHECKER_STORIES:
+        path = os.path.join(zcode_directory, checker)
+        suite.append(
+            Workload(
+                f"run-{checker.split('.')[0]}",
+                "instructions",
+                lambda path=path: full_run(path),  # type: ignore
+            ),
+        )
+
+    return suite
+
+
+def measure(workload: Workload, repeat: int) -> Measurement:
+    """
+    Measure a workload.
+
+    The workload is timed a number of times and the best time is kept, as
+    that is the one least disturbed by anything else on the machine. It is
+    then run once more while tracing allocations, for its peak memory. A
+    workload that fails, or cannot be prepared, is measured as a failure,
+    with the error as note.
+
+    Args:
+        workload: the workload to measure
+        repeat: the number of times to time the workload
+
+    Returns:
+        The measurement.
+    """
+
+    best = float("inf")
+    operations = 0
+
+    try:
+        operation = workload.prepare()
+
+        if operation is None:
+            return Measurement(workload.name, workload.unit, 0, 0.0, 0.0, "skipped")
+
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            operations = operation()
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        operation()
+        peak = tracemalloc.get_traced_memory()[1]
+    except Exception as exc:
+        note = f"failed: {type(exc).__name__}: {exc}".splitlines()[0]
+        return Measurement(workload.name, workload.unit, 0, 0.0, 0.0, note, True)
+    finally:
+        tracemalloc.stop()
+
+    return Measurement(workload.name, workload.unit, operations, best, peak / 1024, "")
+
+
+def run_suite(
+    repeat: int,
+    names: Optional[List[str]] = None,
+    zcode_directory: str = "resources/zcheckers",
+    story: str = FIXTURE_STORY,
+) -> Iterator[Measurement]:
+    """
+    Measure the workloads of the suite.
+
+    Args:
+        repeat: the number of times to time each workload
+        names: the names of the workloads to run, or None for all of them
+        zcode_directory: the directory holding the checker files
+        story: the story for the workloads that load one
+
+    Yields:
+        The measurement of each workload.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        for workload in workloads(directory, zcode_directory, story):
+            if names and workload.name not in names:
+                continue
+
+            yield measure(workload, repeat)
+
+
+def to_baseline(measurements: List[Measurement]) -> Dict[str, Dict[str, float]]:
+    """Provide the measurements in the form stored in a baseline."""
+
+    return {
+        measurement.name: {
+            "rate": round(measurement.rate, 2),
+            "seconds": round(measurement.seconds, 6),
+            "peak_kb": round(measurement.peak_kb, 1),
+        }
+        for measurement in measurements
+        if not measurement.note
+    }
+
+
+def compare(
+    measurements: List[Measurement],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> Dict[str, List[str]]:
+    """
+    Compare measurements against a baseline.
+
+    A rate that falls, or a peak memory that grows, by more than the
+    tolerance is a regression.
+
+    Args:
+        measurements: the measurements
+        baseline: the stored baseline
+        tolerance: the percentage a result may fall behind the baseline
+
+    Returns:
+        The metrics that regressed, for each workload that regressed.
+    """
+
+    regressions: Dict[str, List[str]] = {}
+    results = to_baseline(measurements)
+
+    for name, result in results.items():
+        failed = regressed(result, baseline.get(name, {}), tolerance)
+
+        if failed:
+            regressions[name] = failed
+
+    return regressions
+
+
+def regressed(
+    result: Dict[str, float],
+    stored: Dict[str, float],
+    tolerance: float,
+) -> List[str]:
+    """Provide the metrics of a result that fell behind their stored values."""
+
+    failed: List[str] = []
+
+    if stored and result["rate"] < stored["rate"] * (1 - tolerance / 100):
+        failed.append("rate")
+
+    if stored and result["peak_kb"] > stored["peak_kb"] * (1 + tolerance / 100):
+        failed.append("peak_kb")
+
+    return failed
+
+
+def over_budget(measurements: List[Measurement]) -> Dict[str, List[str]]:
+    """
+    Provide the workloads whose operations take longer than their budget.
+
+    Args:
+        measurements: the measurements
+
+    Returns:
+        The seconds metric, for each workload over its budget.
+    """
+
+    return {
+        measurement.name: ["seconds"]
+        for measurement in measurements
+        if not measurement.note
+        and measurement.name in BUDGETS
+        and measurement.seconds / max(measurement.operations, 1)
+        > BUDGETS[measurement.name]
+    }
+
+
+def change(current: float, stored: Optional[float]) -> str:
+    """Provide the change of a metric from its baseline as a percentage."""
+
+    if not stored:
+        return ""
+
+    return f"{(current - stored) / stored * 100:+7.1f}%"
+
+
+def report(
+    measurements: List[Measurement],
+    baseline: Dict[str, Dict[str, float]],
+    regressions: Dict[str, List[str]],
+) -> None:
+    """Print each measurement, with its change from the baseline."""
+
+    for measurement in measurements:
+        if measurement.note:
+            colour = "red" if measurement.failed else "yellow"
+            print(colored(f"{measurement.name:<22} {measurement.note}", colour))
+        elif measurement.name in regressions:
+            print(colored(result_line(measurement, baseline), "red"))
+        else:
+            print(result_line(measurement, baseline))
+
+
+def result_line(
+    measurement: Measurement,
+    baseline: Dict[str, Dict[str, float]],
+) -> str:
+    """Provide the report line of a measurement, with its change from the baseline."""
+
+    stored = baseline.get(measurement.name, {})
+
+    return (
+        f"{measurement.name:<22}"
+        f"{measurement.rate:>14,.0f} {measurement.unit + '/s':<16}"
+        f"{change(measurement.rate, stored.get('rate')):>9}"
+        f"{measurement.seconds * 1000:>11.2f} ms"
+        f"{measurement.peak_kb:>11,.0f} KB"
+        f"{change(measurement.peak_kb, stored.get('peak_kb')):>9}"
+    )
+
+
+def main(params: list = None) -> int:
+    """Entry point for the Quendor benchmarks."""
+
+    print("\nQuendor Z-Code Interpreter Benchmarks\n")
+
+    if not params:
+        params = sys.argv[1:]
+
+    args = process_parameters(params)
+
+    setup_logging(0)
+
+    measurements = list(
+        run_suite(
+            args["repeat"],
+            args["workloads"],
+            args["zcode_directory"],
+            args["story"],
+        ),
+    )
+
+    baseline: Dict[str, Dict[str, float]] = {}
+
+    if args["compare"]:
+        baseline = json.loads(pathlib.Path(args["compare"]).read_text())
+
+    regressions = compare(measurements, baseline, args["tolerance"])
+
+    for name, failed in over_budget(measurements).items():
+        regressions.setdefault(name, []).extend(failed)
+
+    for name in (
+        measurement.name for measurement in measurements if measurement.failed
+    ):
+        regressions.setdefault(name, []).append("failed")
+
+    report(measurements, baseline, regressions)
+
+    if args["save"]:
+        path = pathlib.Path(args["save"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(to_baseline(measurements), indent=2) + "\n")
+        print(colored(f"\nBaseline stored in {path}", "cyan"))
+
+    if regressions:
+        print(colored(f"\n{len(regressions)} workloads regressed.\n", "red"))
+        return 1
+
+    print()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,413 @@
+"""
+Z-Code Batch Runner.
+
+This module provides a way to run a whole directory of z-code story files
+without a terminal. Each story is given the commands in a script file next
+to it and its transcript is compared with an expected transcript, when
+there is one. Stories are spread across a pool of worker processes, so a
+catalog of stories takes about as long as its slowest few stories rather
+than as long as all of them together.
+
+For a story such as `zork1.z3` the runner looks for:
+
+- `zork1.in`, the commands to send, one per line
+- `zork1.out`, the transcript the story is expected to produce
+
+A story that runs for longer than its time limit is stopped and fails, as
+does a story that makes the interpreter fail in any other way, so one bad
+story never holds up or ends the run of the others.
+"""
+
+import argparse
+import contextlib
+import multiprocessing
+import os
+import pathlib
+import signal
+import sys
+import textwrap
+import threading
+import time
+from types import FrameType
+from typing import Iterator, List, NamedTuple, Optional
+
+import colorama
+
+from termcolor import colored
+
+from quendor.catalog import SUFFIXES
+from quendor.logging import setup_logging
+
+if sys.version_info < (3, 7):
+    sys.stderr.write("This script requires at least version 3.7 of Python.\n")
+    sys.exit(1)
+
+colorama.init()
+
+TIMEOUT = 60.0
+
+
+class ScriptEndedError(Exception):
+    """Signal a story that asked for input after its script ran out."""
+
+
+class StoryTimeoutError(Exception):
+    """Signal a story that ran for longer than it was allowed to."""
+
+
+class StoryJob(NamedTuple):
+    """A story to run, with the files that go along with it."""
+
+    story: str
+    script: str
+    expected: Optional[str]
+    record: bool
+    timeout: float = TIMEOUT
+
+
+class StoryResult(NamedTuple):
+    """The outcome of running a story."""
+
+    story: str
+    passed: Optional[bool]
+    seconds: float
+    instructions: int
+    error: str
+
+
+def process_parameters(params: list) -> dict:
+    """Process all parameters from the command line."""
+
+    parser = argparse.ArgumentParser(
+        description="Quendor Z-Code Batch Runner",
+        usage=textwrap.dedent(
+            """
+            The general format is:
+
+                quenr <directory> [options]
+
+            Examples:
+                (1) quenr ./resources/zcode
+                    - runs every story with a script in the directory
+
+                (2) quenr ./resources/zcode --jobs 4
+                    - runs the stories across four worker processes
+
+                (3) quenr ./resources/zcode --record
+                    - writes the transcript of each story as expected
+            """,
+        ),
+        epilog=textwrap.dedent(
+            """
+            Enjoy your regressions!
+            """,
+        ),
+    )
+
+    parser.add_argument(
+        "directory",
+        help="directory of story files and their scripts",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "-r",
+        "--record",
+        action="store_true",
+        help="write each transcript as the expected transcript",
+    )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=TIMEOUT,
+        help=f"seconds each story may run for, 0 for no limit (default: {TIMEOUT:g})",
+    )
+
+    return vars(parser.parse_args(params))
+
+
+def find_jobs(
+    directory: str,
+    record: bool = False,
+    timeout: float = TIMEOUT,
+) -> List[StoryJob]:
+    """
+    Find the stories in a directory that have a script.
+
+    Args:
+        directory: the directory to search
+        record: whether transcripts are to be written rather than compared
+        timeout: the seconds each story may run for, or 0 for no limit
+
+    Returns:
+        A job for each story with a script, ordered by story file name.
+    """
+
+    jobs: List[StoryJob] = []
+
+    for story in sorted(pathlib.Path(directory).iterdir()):
+        script = story.with_suffix(".in")
+
+        if story.suffix.lower() not in SUFFIXES or not script.is_file():
+            continue
+
+        expected = story.with_suffix(".out")
+
+        jobs.append(
+            StoryJob(
+                str(story.resolve()),
+                str(script),
+                str(expected) if expected.is_file() or record else None,
+                record,
+                timeout,
+            ),
+        )
+
+    return jobs
+
+
+@contextlib.contextmanager
+def time_limit(seconds: float) -> Iterator[None]:
+    """
+    Stop whatever runs in the context once a number of seconds have passed.
+
+    The limit is kept by an alarm signal, which stops even a story that is
+    stuck in a compiled routine. Where there is no alarm signal, or outside
+    the main thread, which alone receives signals, there is no limit.
+
+    Args:
+        seconds: the seconds allowed, or 0 for no limit
+
+    Yields:
+        Nothing; the limit applies until the context is left.
+    """
+
+    if (
+        seconds <= 0
+        or not hasattr(signal, "SIGALRM")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def expire(signum: int, frame: Optional[FrameType]) -> None:
+        raise StoryTimeoutError(f"Quendor stopped the story after {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_story(job: StoryJob) -> StoryResult:
+    """
+    Run a story with its script and check the transcript it produces.
+
+    The story runs until it quits or asks for input once the script has run
+    out. Its save file, transcript and command script are kept in a
+    directory of its own, which is removed once the run ends. Any problem
+    the interpreter reports, any other error and running past the time
+    limit all fail the story.
+
+    Args:
+        job: the story to run
+
+    Returns:
+        The outcome of the run.
+    """
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+    from quendor.session import private_files
+
+    with open(job.script, encoding="utf-8") as script_file:
+        commands: Iterator[str] = iter(script_file.read().splitlines())
+
+    def reader() -> str:
+        try:
+            command = next(commands)
+        except StopIteration:
+            raise ScriptEndedError from None
+
+        transcript.append(command + "\n")
+
+        return command
+
+    transcript: List[str] = []
+    error = ""
+    start = time.perf_counter()
+    processor: Optional[Processor] = None
+
+    try:
+        with time_limit(job.timeout):
+            program = Program(job.story)
+
+            # Each run keeps the files it writes to itself, so runs of the
+            # same story side by side neither share them nor leave them
+            # next to the story.
+
+            with private_files(program) as base:
+                processor = Processor(
+                    program,
+                    output=transcript.append,
+                    reader=reader,
+                )
+                processor.place(base)
+                processor.run()
+    except ScriptEndedError:
+        pass
+    except Exception as exc:
+        error = describe(exc)
+
+    seconds = time.perf_counter() - start
+    instructions = processor.instructions if processor else 0
+
+    return StoryResult(
+        job.story,
+        check_transcript(job, "".join(transcript)) if not error else False,
+        seconds,
+        instructions,
+        error,
+    )
+
+
+def describe(error: Exception) -> str:
+    """Provide the line that reports the error a story failed with."""
+
+    from quendor.errors import QuendorError
+
+    lines = str(error).strip().splitlines()
+
+    if isinstance(error, QuendorError) and lines:
+        return lines[-1]
+
+    return f"{type(error).__name__}: {error}"
+
+
+def check_transcript(job: StoryJob, transcript: str) -> Optional[bool]:
+    """
+    Compare a transcript with the expected transcript of a story.
+
+    Args:
+        job: the story that was run
+        transcript: the transcript the story produced
+
+    Returns:
+        Whether the transcripts match, or None when there is nothing to
+        compare against. A recorded transcript always matches.
+    """
+
+    if job.expected is None:
+        return None
+
+    if job.record:
+        pathlib.Path(job.expected).write_text(transcript, encoding="utf-8")
+        return True
+
+    expected = pathlib.Path(job.expected).read_text(encoding="utf-8")
+
+    return normalize(expected) == normalize(transcript)
+
+
+def normalize(transcript: str) -> List[str]:
+    """Provide the lines of a transcript without trailing whitespace."""
+
+    return [line.rstrip() for line in transcript.rstrip().splitlines()]
+
+
+def run_jobs(jobs: List[StoryJob], processes: int) -> List[StoryResult]:
+    """
+    Run stories across a pool of worker processes.
+
+    Args:
+        jobs: the stories to run
+        processes: the number of worker processes
+
+    Returns:
+        The outcome of each run, in the order of the jobs.
+    """
+
+    if processes <= 1 or len(jobs) <= 1:
+        return [run_story(job) for job in jobs]
+
+    with multiprocessing.Pool(
+        processes=min(processes, len(jobs)),
+        initializer=setup_logging,
+        initargs=(0,),
+    ) as pool:
+        return pool.map(run_story, jobs, chunksize=1)
+
+
+def report(results: List[StoryResult], seconds: float) -> None:
+    """Print the outcome of each run and a summary of them all."""
+
+    labels = {
+        True: colored("PASS", "green"),
+        False: colored("FAIL", "red", attrs=["bold"]),
+        None: colored("RAN ", "yellow"),
+    }
+
+    for result in results:
+        rate = result.instructions / result.seconds if result.seconds else 0.0
+
+        print(
+            f"{labels[result.passed]} {os.path.basename(result.story):<28}"
+            f"{result.seconds:>9.3f}s {result.instructions:>12,} instructions"
+            f" {rate:>12,.0f}/s",
+        )
+
+        if result.error:
+            print(colored(f"     {result.error}", "red"))
+
+    failed = sum(1 for result in results if result.passed is False)
+
+    print(
+        f"\n{len(results)} stories, {failed} failed, "
+        f"{sum(result.instructions for result in results):,} instructions "
+        f"in {seconds:.3f}s\n",
+    )
+
+
+def main(params: list = None) -> int:
+    """Entry point for the Quendor batch runner."""
+
+    print("\nQuendor Z-Code Batch Runner\n")
+
+    if not params:
+        params = sys.argv[1:]
+
+    args = process_parameters(params)
+
+    setup_logging(0)
+
+    jobs = find_jobs(args["directory"], args["record"], args["timeout"])
+
+    if not jobs:
+        sys.stderr.write(
+            colored(
+                f"No stories with scripts were found in {args['directory']}.\n\n",
+                "red",
+            ),
+        )
+        return 1
+
+    start = time.perf_counter()
+    results = run_jobs(jobs, args["jobs"])
+
+    report(results, time.perf_counter() - start)
+
+    return 1 if any(result.passed is False for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
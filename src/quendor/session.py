@@ -0,0 +1,288 @@
+"""Module for hosting sessions of zcode programs on an asyncio event loop."""
+
+import asyncio
+import contextlib
+import os
+import socket
+import tempfile
+from typing import Awaitable, Callable, Iterator, Optional, Set
+
+from quendor.errors import QuendorError
+from quendor.logging import logger
+from quendor.processor import InputPendingError, Output, Processor
+from quendor.program import Program
+
+Lines = Callable[[], Awaitable[Optional[str]]]
+
+
+class Session:
+    """
+    Abstraction for a session driven by an asyncio event loop.
+
+    The processor of the session runs until the program reads input that
+    has not arrived yet. It then stops with the read instruction waiting
+    and the session awaits the next line, so a session that waits for its
+    player holds no thread and no process, only its memory. One event loop
+    can therefore keep any number of idle sessions.
+
+    A timed read has its routine called each time its time runs out while
+    the line is still being awaited. Should the routine return true, the
+    read ends with no input.
+
+    The save file, transcript and command script of the session are kept
+    at the base path it is given, or next to the program without one.
+    """
+
+    def __init__(
+        self,
+        program: Program,
+        output: Output,
+        threshold: int = 20,
+        base: str = "",
+    ) -> None:
+        self.line: Optional[str] = None
+        self.processor: Processor = Processor(
+            program,
+            threshold=threshold,
+            output=output,
+            reader=self._read,
+        )
+
+        if base:
+            self.processor.place(base)
+
+    def _read(self) -> str:
+        """
+        Provide the line the session was given for the waiting read.
+
+        Returns:
+            The line.
+
+        Raises:
+            InputPendingError: if there is no line yet
+        """
+
+        line = self.line
+
+        if line is None:
+            raise InputPendingError
+
+        self.line = None
+
+        return line
+
+    async def run(self, lines: Lines) -> None:
+        """
+        Execute the session, awaiting each line of input it reads.
+
+        Args:
+            lines: provides the next line of input, or None once there is
+                no more input, which ends the session
+        """
+
+        processor = self.processor
+
+        while True:
+            processor.run()
+
+            if processor.waiting is None:
+                return
+
+            line = await self._next_line(lines)
+
+            if line is None:
+                return
+
+            self.line = line
+
+    async def _next_line(self, lines: Lines) -> Optional[str]:
+        """
+        Await the next line of input, calling the routine of a timed read.
+
+        Args:
+            lines: provides the next line of input
+
+        Returns:
+            The line, or None once there is no more input.
+        """
+
+        processor = self.processor
+        tenths, routine = processor.timer()
+        pending = asyncio.ensure_future(lines())
+
+        while True:
+            done, _ = await asyncio.wait({pending}, timeout=tenths / 10 or None)
+
+            if done:
+                return pending.result()
+
+            if processor.interrupt(routine):
+                pending.cancel()
+                processor.terminator = 0
+                return ""
+
+
+async def serve(program: Program, host: str, port: int) -> None:
+    """
+    Serve sessions of a program over TCP, one session per connection.
+
+    The protocol is plain lines of text: each line a client sends is a line
+    of input, and the output of the program is sent back as it is written.
+    A session ends when the program stops or the client disconnects.
+
+    Saved games do not outlive their session. Each session saves to a
+    directory of its own, removed when the session ends, so a game saved
+    over one connection cannot be restored over another.
+
+    Args:
+        program: the program every session runs
+        host: the address to listen on
+        port: the port to listen on, or 0 for any free port
+    """
+
+    server = await start_server(program, host, port)
+
+    for listener in server.sockets or ():
+        logger.info(f"serving {program.file} on {listener.getsockname()}")
+
+    async with server:
+        await server.serve_forever()
+
+
+async def start_server(
+    program: Program,
+    host: str,
+    port: int,
+) -> asyncio.base_events.Server:
+    """
+    Start a server for sessions of a program.
+
+    Args:
+        program: the program every session runs
+        host: the address to listen on
+        port: the port to listen on, or 0 for any free port
+
+    Returns:
+        The server, already listening.
+    """
+
+    async def connected(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        await converse(program, reader, writer)
+
+    return await asyncio.start_server(connected, host, port)
+
+
+async def converse(
+    program: Program,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    sessions: Optional[Set[Session]] = None,
+) -> Session:
+    """
+    Run a session of a program over a stream of lines.
+
+    The session keeps its files in a private directory, which is removed
+    when it ends, so that sessions served side by side never share a save
+    file or a transcript.
+
+    Args:
+        program: the program the session runs
+        reader: the stream the input is read from
+        writer: the stream the output is written to
+        sessions: the sessions to keep the session in while it runs
+
+    Returns:
+        The session, once it has ended.
+    """
+
+    async def lines() -> Optional[str]:
+        await writer.drain()
+        data = await reader.readline()
+
+        if not data:
+            return None
+
+        return data.decode("utf-8", "replace").rstrip("\r\n")
+
+    with private_files(program) as base:
+        session = Session(
+            program,
+            lambda text: writer.write(text.replace("\n", "\r\n").encode("utf-8")),
+            base=base,
+        )
+
+        if sessions is not None:
+            sessions.add(session)
+
+        # A problem with the program ends its own session, not the server.
+
+        try:
+            await session.run(lines)
+        except QuendorError as exc:
+            writer.write(f"{type(exc).__name__}: {exc}\r\n".encode("utf-8"))
+            logger.error(f"session on {program.file} stopped: {exc}")
+        finally:
+            writer.close()
+
+            if sessions is not None:
+                sessions.discard(session)
+
+    return session
+
+
+@contextlib.contextmanager
+def private_files(program: Program) -> Iterator[str]:
+    """
+    Provide a base path for the files of one session, in a new directory.
+
+    Args:
+        program: the program the session runs
+
+    Yields:
+        The path of the files, without their suffixes. The directory is
+        removed, along with everything in it, once the session ends.
+    """
+
+    stem = os.path.splitext(os.path.basename(program.file))[0]
+
+    with tempfile.TemporaryDirectory(prefix="quendor-") as directory:
+        yield os.path.join(directory, stem or "story")
+
+
+def listen(host: str, port: int) -> socket.socket:
+    """
+    Provide a socket listening for connections on an address.
+
+    This builds what socket.create_server does, which Python only has from
+    version 3.8 on.
+
+    Args:
+        host: the address to listen on
+        port: the port to listen on, or 0 for any free port
+
+    Returns:
+        The listening socket.
+
+    Raises:
+        OSError: if the address cannot be listened on
+    """
+
+    family, kind, _, _, address = socket.getaddrinfo(
+        host,
+        port,
+        type=socket.SOCK_STREAM,
+    )[0]
+    listener = socket.socket(family, kind)
+
+    try:
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(address)
+        listener.listen()
+    except OSError:
+        listener.close()
+        raise
+
+    return listener
@@ -1,12 +1,14 @@
 """Entry point module for the Quendor interpreter."""
 
+import os
+import signal
 import sys
+from typing import TYPE_CHECKING
 
-from logzero import logger
+from quendor import __version__
 
-from quendor.cli import process_options
-from quendor.logging import setup_logging
-from quendor.program import Program
+if TYPE_CHECKING:
+    from quendor.program import Program
 
 
 def setup_quendor(cli: dict) -> None:
@@ -20,7 +22,119 @@ def setup_quendor(cli: dict) -> None:
         cli: the parsed command line arguments
     """
 
-    Program(cli["zcode"])
+    if cli["probe"]:
+        probe_quendor(cli["probe"])
+        return
+
+    from quendor.program import Program
+
+    program = Program(cli["zcode"], mapped=cli["mmap"])
+
+    if cli["serve"]:
+        serve_quendor(program, cli["serve"], cli["workers"], cli["fork"])
+        return
+
+    run_quendor(program, cli)
+
+
+def run_quendor(program: "Program", cli: dict) -> None:
+    """
+    Execute a program, under any diagnostics the command line asks for.
+
+    Args:
+        program: the program to execute
+        cli: the parsed command line arguments
+    """
+
+    # The processor is only imported when a session is to be run, and the
+    # profiler only when it is asked for, so a session without it runs
+    # exactly as it would if it did not exist.
+
+    from quendor.cache import StoryCache
+    from quendor.processor import Processor
+
+    # The story cache is read before the processor decodes anything, and
+    # written back however the session ends, so that what it decoded and
+    # compiled before an error is not lost.
+
+    cache = StoryCache(program)
+    cache.load()
+
+    # Text is word wrapped to the terminal it is shown on, and left as it
+    # is for anything else, which can wrap it as it sees fit.
+
+    width = os.get_terminal_size().columns - 1 if sys.stdout.isatty() else 0
+    processor = Processor(program, trace=cli["trace"], width=width)
+    trace = processor.trace
+
+    if trace is not None and hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: trace.dump(sys.stderr))
+
+    try:
+        if cli["profile"]:
+            from quendor.profiler import profile
+
+            profile(processor, cli["profile"], cli["profile_interval"] / 1000)
+        else:
+            processor.run()
+    finally:
+        cache.save()
+
+
+def probe_quendor(directory: str) -> None:
+    """
+    Report what the header of every program file below a directory says.
+
+    Args:
+        directory: the directory to probe
+    """
+
+    from quendor.probe import probe_all, report, scan
+
+    valid = report(probe_all(scan(directory)), sys.stdout)
+
+    print(f"\n{valid} z-code programs found.\n")
+
+
+def serve_quendor(
+    program: "Program",
+    address: str,
+    workers: int = 0,
+    fork: bool = False,
+) -> None:
+    """
+    Serve sessions of a program until the server is interrupted.
+
+    Args:
+        program: the program to serve
+        address: the port, or the host and port, to listen on
+        workers: the number of worker processes, or 0 to serve from this one
+        fork: whether to fork each session from a warm server
+    """
+
+    host, _, port = address.rpartition(":")
+    host = host or "127.0.0.1"
+    programs = {os.path.basename(program.file): program}
+
+    print(f"Serving {program.file} on {host}:{port}\n")
+
+    try:
+        if fork:
+            from quendor.forkserver import run_fork_server
+
+            run_fork_server(programs, host, int(port))
+        elif workers > 0:
+            from quendor.hosting import run_host
+
+            run_host(programs, host, int(port), workers)
+        else:
+            import asyncio
+
+            from quendor.session import serve
+
+            asyncio.run(serve(program, host, int(port)))
+    except KeyboardInterrupt:
+        print("\nServer stopped.\n")
 
 
 def main(args: list = None) -> int:
@@ -38,17 +152,38 @@ def main(args: list = None) -> int:
     if not args:
         args = sys.argv[1:]
 
+    # The version is reported before anything else is imported, so that
+    # asking for it costs no more than starting Python. The rest of the
+    # interpreter is only imported once it is known to be needed.
+
+    if "-v" in args or "--version" in args:
+        print(f"Version: {__version__}\n")
+        sys.exit(0)
+
+    from quendor.cli import process_options
+    from quendor.errors import QuendorError
+    from quendor.logging import logger, setup_logging
+
     cli = process_options(args)
 
     setup_logging(cli["loglevel"])
 
-    logger.debug(f"Argument count: {'':>4}" + str(len(args)))
+    # Debug messages are formatted by the logger, and only when they are
+    # to be shown.
+
+    logger.debug("Argument count:     %d", len(args))
 
     for i, arg in enumerate(args):
-        logger.debug(f"Argument {i}: {'':>8}" + arg)
+        logger.debug("Argument %d:         %s", i, arg)
+
+    logger.debug("Parsed arguments:   %s", cli)
 
-    logger.debug(f"Parsed arguments: {'':>2}" + f"{cli}")
+    # Problems are raised as exceptions so that Quendor can be embedded.
+    # Only here, at the command line, does a problem end the process.
 
-    setup_quendor(cli)
+    try:
+        setup_quendor(cli)
+    except QuendorError as exc:
+        raise SystemExit(exc.report()) from exc
 
     return 0
@@ -0,0 +1,128 @@
+"""Module for running zcode programs from code that embeds Quendor."""
+
+from collections import deque
+from typing import Deque, List, Optional
+
+from quendor.instruction import Instruction
+from quendor.processor import InputPendingError, Processor
+from quendor.program import Program, Source
+
+
+class Story:
+    """
+    Abstraction for a session of a program, driven by the code embedding it.
+
+    A story executes only when it is told to. Running it executes the
+    program until the program reads input it has not been given or stops,
+    and provides the text the program wrote on the way. Nothing is read
+    from or written to the terminal and nothing ends the process: a problem
+    with the program is raised as a QuendorError for the caller to handle.
+
+    Any number of stories can share one program, and so one copy of the
+    story and of everything decoded and compiled from it. Each of them then
+    needs a base path of its own for its save file, transcript and command
+    script. Without one they are kept next to the program, and a program
+    loaded from bytes or a buffer keeps none at all.
+    """
+
+    def __init__(self, program: Program, threshold: int = 20, base: str = "") -> None:
+        self.program: Program = program
+        self.lines: Deque[str] = deque()
+        self.text: List[str] = []
+        self.finished: bool = False
+        self.processor: Processor = Processor(
+            program,
+            threshold=threshold,
+            output=self.text.append,
+            reader=self._read,
+        )
+
+        if base:
+            self.processor.place(base)
+
+    @classmethod
+    def load(
+        cls,  # noqa: ANN102
+        source: Source,
+        threshold: int = 20,
+        base: str = "",
+    ) -> "Story":
+        """
+        Provide a story of a program, from whatever the program is held in.
+
+        Args:
+            source: a path, the contents of a program file, or an open
+                binary file
+            threshold: the number of calls after which a routine is compiled
+            base: the path of the files of the story, without their suffixes
+
+        Returns:
+            The story.
+        """
+
+        return cls(Program.load(source), threshold, base)
+
+    @property
+    def waiting(self) -> bool:
+        """Provide whether the program is waiting for a line of input."""
+
+        return self.processor.waiting is not None
+
+    def _read(self) -> str:
+        """
+        Provide the next line of input the story was given.
+
+        Returns:
+            The line.
+
+        Raises:
+            InputPendingError: if there is no line yet
+        """
+
+        if not self.lines:
+            raise InputPendingError
+
+        return self.lines.popleft()
+
+    def run(self, line: Optional[str] = None) -> str:
+        """
+        Execute the program until it needs input it does not have, or stops.
+
+        Args:
+            line: a line of input to give the program first
+
+        Returns:
+            The text the program wrote, since the text was last taken.
+        """
+
+        if line is not None:
+            self.lines.append(line)
+
+        if not self.finished:
+            self.processor.run()
+            self.finished = self.processor.waiting is None
+
+        return self.take()
+
+    def step(self) -> Instruction:
+        """
+        Execute a single instruction of the program.
+
+        A read with no input to take leaves the program waiting, as it does
+        when the story is run.
+
+        Returns:
+            The instruction that was executed.
+        """
+
+        return self.processor.step()
+
+    def take(self) -> str:
+        """Provide the text the program wrote since the text was last taken."""
+
+        self.processor.streams.flush()
+
+        try:
+            return "".join(self.text)
+        finally:
+            self.text.clear()
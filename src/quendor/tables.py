@@ -0,0 +1,151 @@
+"""Module for the table operations of the Z-Machine."""
+
+from quendor.errors import IllegalMemoryAccessError
+from quendor.memory import Memory
+from quendor.text import TextDecoder
+
+
+def copy_table(memory: Memory, first: int, second: int, size: int) -> None:
+    """
+    Copy a table of bytes, or zero it, as copy_table does.
+
+    The table is copied with a single slice assignment rather than a byte
+    at a time. A positive size copies the table as if through a buffer of
+    its own, so that overlapping tables are never corrupted. A negative
+    size copies forwards, byte by byte, even if that corrupts the first
+    table: where the second table starts inside the first, the start of
+    the first table is repeated across the second, which is built as one
+    repeated pattern instead.
+
+    Args:
+        memory: the memory of the session
+        first: the byte address of the table to copy
+        second: the byte address to copy it to, or 0 to zero the table
+        size: the length of the table in bytes, as a signed number
+
+    Raises:
+        IllegalMemoryAccessError: if the table written to is not in
+            dynamic memory
+    """
+
+    length = abs(size)
+    target = second or first
+    end = target + length
+
+    if not length:
+        return
+
+    if not _writable(memory, target, length):
+        raise IllegalMemoryAccessError(
+            f"Quendor cannot write a {length} byte table at {target}",
+        )
+
+    if not second:
+        memory.dynamic[target:end] = bytes(length)
+    elif size < 0 and first < second < first + length:
+        pattern = bytes(memory.read_bytes(first, second - first))
+        repeats = -(-length // len(pattern))
+        memory.dynamic[target:end] = (pattern * repeats)[:length]
+    else:
+        memory.dynamic[target:end] = memory.read_bytes(first, length)
+
+    memory.changed(target, length)
+
+
+def _writable(memory: Memory, address: int, length: int) -> bool:
+    """Provide whether a table of a length at an address is in dynamic memory."""
+
+    return 0 <= address and address + length <= memory.dynamic_size
+
+
+def scan_table(memory: Memory, value: int, table: int, count: int, form: int) -> int:
+    """
+    Search a table for a value, as scan_table does.
+
+    The table is searched with bytes.find over its bytes rather than an
+    entry at a time. Byte entries longer than a byte are first picked out
+    of the table with a strided slice. Word entries are found as their two
+    bytes, skipping any find that does not fall at the start of an entry.
+
+    Args:
+        memory: the memory of the session
+        value: the byte or word to look for
+        table: the byte address of the table
+        count: the number of entries in the table
+        form: the length of each entry in bytes, with the top bit set for
+            word entries
+
+    Returns:
+        The byte address of the first entry that holds the value, or 0 if
+        none does.
+    """
+
+    words = bool(form & 0x80)
+    step = form & 0x7F
+
+    if count <= 0 or value > (0xFFFF if words else 0xFF):
+        return 0
+
+    if not step:
+        count, step = 1, 1
+
+    data = bytes(
+        memory.read_bytes(table, min(count * step, memory.size - table)),
+    )
+
+    index = _find_word(data, value, step) if words else _find_byte(data, value, step)
+
+    return table + index if index >= 0 else 0
+
+
+def _find_byte(data: bytes, value: int, step: int) -> int:
+    """Provide the offset of the first entry that starts with a byte, or -1."""
+
+    index = data[::step].find(value)
+
+    return index * step if index >= 0 else -1
+
+
+def _find_word(data: bytes, value: int, step: int) -> int:
+    """Provide the offset of the first entry that starts with a word, or -1."""
+
+    needle = value.to_bytes(2, "big")
+    index = data.find(needle)
+
+    while index >= 0 and index % step:
+        index = data.find(needle, index + 1)
+
+    return index
+
+
+def print_table(
+    text: TextDecoder,
+    table: int,
+    width: int,
+    height: int = 1,
+    skip: int = 0,
+) -> str:
+    """
+    Provide the text of a rectangle of ZSCII characters, as print_table does.
+
+    Each row of the rectangle is read as a run of bytes and translated as a
+    whole, and the rows are put on lines of their own.
+
+    Args:
+        text: the text decoder of the session
+        table: the byte address of the first row
+        width: the number of characters in each row
+        height: the number of rows
+        skip: the number of bytes between the end of a row and the start
+            of the next
+
+    Returns:
+        The text of the rectangle.
+    """
+
+    stride = width + skip
+
+    return "\n".join(
+        text.zscii_text(text.memory.read_bytes(table + row * stride, width))
+        for row in range(height)
+    )
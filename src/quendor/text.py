@@ -0,0 +1,282 @@
+"""Module for Z-character and ZSCII text decoding."""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+from quendor.memory import Memory
+
+ALPHABET_A0 = "abcdefghijklmnopqrstuvwxyz"
+ALPHABET_A1 = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+ALPHABET_A2 = " \n0123456789.,!?_#'\"/\\-:()"
+ALPHABET_A2_V1 = " 0123456789.,!?_#'\"/\\<-:()"
+
+# The default translation of ZSCII 155 to 223, used when a story does
+# not provide a Unicode translation table of its own.
+
+EXTRA_CHARACTERS = (
+    "äöüÄÖÜß»«ëïÿËÏáéíóúýÁÉÍÓÚÝàèìòùÀÈÌÒÙâêîôûÂÊÎÔÛåÅøØãñõÃÑÕæÆçÇþðÞÐ£œŒ¡¿"
+)
+
+
+class TextDecoder:
+    """
+    Decoder for the text of a zcode program.
+
+    Text is stored as Z-characters, three to a word, which select from
+    three alphabets, shift between them, expand abbreviations and escape
+    to ZSCII. Unpacking that is slow in Python, so decoded text is kept.
+
+    Text in static or high memory cannot change, so it is decoded once per
+    program and kept in a cache shared by every session, keyed by address.
+    That covers inline strings, packed strings and the abbreviations.
+    Text in dynamic memory, such as the short name of an object, may be
+    rewritten by the program. That text is kept per session along with
+    the encoded bytes it was decoded from, and it is only reused while
+    memory still holds those same bytes.
+    """
+
+    def __init__(self, memory: Memory) -> None:
+        self.memory: Memory = memory
+        self.version: int = memory.header.version
+        self.alphabets: Tuple[str, str, str] = self._alphabets()
+        self.characters: Dict[int, str] = self._characters()
+        self.translation: Dict[int, Optional[str]] = {
+            code: self.zscii(code) or None
+            for code in range(256)
+            if not 32 <= code <= 126
+        }
+        self.strings: Dict[int, str] = memory.program.cache.setdefault("strings", {})
+        self.dynamic_strings: Dict[int, Tuple[bytes, str]] = {}
+        self._abbreviations: Optional[List[str]] = None
+
+    def _alphabets(self) -> Tuple[str, str, str]:
+        """
+        Provide the three alphabets used by the program.
+
+        From version 5, a program can provide its own alphabet table. The
+        first two characters of the third alphabet still mean an escape to
+        ZSCII and a new line, whatever the table says.
+
+        Returns:
+            The characters of alphabets A0, A1 and A2.
+        """
+
+        if self.version == 1:
+            return ALPHABET_A0, ALPHABET_A1, ALPHABET_A2_V1
+
+        table = self.memory.header.alphabet
+
+        if self.version < 5 or table == 0:
+            return ALPHABET_A0, ALPHABET_A1, ALPHABET_A2
+
+        codes = bytes(self.memory.read_bytes(table, 78))
+        alphabets = [
+            "".join(self.zscii(code) for code in codes[start:end])
+            for start, end in ((0, 26), (26, 52), (52, 78))
+        ]
+
+        return alphabets[0], alphabets[1], " \n" + alphabets[2][2:]
+
+    def _characters(self) -> Dict[int, str]:
+        """
+        Provide the translation of the ZSCII characters above 154.
+
+        A program can supply a Unicode translation table through the
+        header extension table. Otherwise the default table is used.
+
+        Returns:
+            The Unicode character for each extra ZSCII character.
+        """
+
+        extension = self.memory.header.extension if self.version >= 5 else 0
+        table = 0
+
+        if extension and self.memory.read_word(extension) >= 3:
+            table = self.memory.read_word(extension + 6)
+
+        if not table:
+            return {155 + index: char for index, char in enumerate(EXTRA_CHARACTERS)}
+
+        return {
+            155 + index: chr(self.memory.read_word(table + 1 + 2 * index))
+            for index in range(self.memory.read_byte(table))
+        }
+
+    def zscii(self, code: int) -> str:
+        """Provide the Unicode text for a ZSCII character."""
+
+        if 32 <= code <= 126:
+            return chr(code)
+
+        if code == 13:
+            return "\n"
+
+        return self.characters.get(code, "")
+
+    def zscii_text(self, codes: Union[bytes, memoryview]) -> str:
+        """
+        Provide the Unicode text for a run of ZSCII characters.
+
+        The run is translated as a whole: its bytes are taken as the
+        characters with the same codes, which leaves the printable ASCII
+        range as it is, and every other code is translated in one pass.
+
+        Args:
+            codes: the ZSCII characters
+
+        Returns:
+            The text.
+        """
+
+        return bytes(codes).decode("latin-1").translate(self.translation)
+
+    def decode(self, address: int) -> str:
+        """
+        Provide the text of the string at a byte address.
+
+        Args:
+            address: the byte address of the encoded string
+
+        Returns:
+            The decoded text.
+        """
+
+        if address >= self.memory.dynamic_size:
+            text = self.strings.get(address)
+
+            if text is None:
+                text = self._decode(self.zchars(address)[0])
+                self.strings[address] = text
+
+            return text
+
+        cached = self.dynamic_strings.get(address)
+
+        if cached is not None:
+            encoded, text = cached
+            end = address + len(encoded)
+
+            if self.memory.dynamic[address:end] == encoded:
+                return text
+
+        zchars, end = self.zchars(address)
+        text = self._decode(zchars)
+        encoded = bytes(self.memory.read_bytes(address, end - address))
+        self.dynamic_strings[address] = (encoded, text)
+
+        return text
+
+    def zchars(self, address: int) -> Tuple[List[int], int]:
+        """
+        Provide the Z-characters of the string at a byte address.
+
+        Args:
+            address: the byte address of the encoded string
+
+        Returns:
+            The Z-characters and the address just past the string.
+        """
+
+        zchars: List[int] = []
+        read_word = self.memory.read_word
+
+        while True:
+            word = read_word(address)
+            address += 2
+            zchars.extend(((word >> 10) & 0x1F, (word >> 5) & 0x1F, word & 0x1F))
+
+            if word & 0x8000:
+                return zchars, address
+
+    @property
+    def abbreviations(self) -> List[str]:
+        """
+        Provide the text of every abbreviation, decoding them once.
+
+        The table of abbreviation addresses usually sits in dynamic memory,
+        though no program rewrites it. The decoded abbreviations are shared
+        through the program cache along with the table they came from, and a
+        session only reuses them while its own table still matches.
+
+        Returns:
+            The text of each abbreviation.
+        """
+
+        if self._abbreviations is not None:
+            return self._abbreviations
+
+        count = 96 if self.version >= 3 else 32
+        table = self.memory.header.abbreviations
+        addresses = bytes(self.memory.read_bytes(table, 2 * count))
+        cache = self.memory.program.cache
+        cached = cache.get("abbreviations")
+
+        if cached is not None and cached[0] == addresses:
+            self._abbreviations = cached[1]
+        else:
+            self._abbreviations = [
+                self._decode(self.zchars(2 * (high << 8 | low))[0], False)
+                for high, low in zip(addresses[0::2], addresses[1::2])  # noqa: B905
+            ]
+            cache["abbreviations"] = (addresses, self._abbreviations)
+
+        return self._abbreviations
+
+    def _decode(  # noqa: C901, CCR001
+        self,
+        zchars: List[int],
+        expand: bool = True,
+    ) -> str:
+        """
+        Decode a run of Z-characters into text.
+
+        Args:
+            zchars: the Z-characters
+            expand: whether abbreviations may be expanded
+
+        Returns:
+            The decoded text.
+        """
+
+        version = self.version
+        alphabets = self.alphabets
+        text: List[str] = []
+        alphabet = 0
+        locked = 0
+        index = 0
+        count = len(zchars)
+
+        while index < count:
+            zchar = zchars[index]
+            index += 1
+
+            if zchar == 0:
+                text.append(" ")
+                alphabet = locked
+            elif zchar <= 3 and (version >= 3 or (version == 2 and zchar == 1)):
+                if expand and index < count:
+                    text.append(self.abbreviations[32 * (zchar - 1) + zchars[index]])
+
+                index += 1
+                alphabet = locked
+            elif zchar == 1:
+                text.append("\n")
+            elif zchar <= 5:
+                shifted = (alphabet + (1 if zchar % 2 == 0 else 2)) % 3
+
+                if version >= 3:
+                    alphabet = zchar - 3
+                elif zchar <= 3:
+                    alphabet = shifted
+                else:
+                    alphabet = locked = shifted
+            elif alphabet == 2 and zchar == 6:
+                if index + 1 < count:
+                    text.append(self.zscii((zchars[index] << 5) | zchars[index + 1]))
+
+                index += 2
+                alphabet = locked
+            else:
+                text.append(alphabets[alphabet][zchar - 6])
+                alphabet = locked
+
+        return "".join(text)
@@ -0,0 +1,83 @@
+"""Module for tracing the instructions a session executes."""
+
+from array import array
+from typing import Iterator, NamedTuple, TextIO, Tuple
+
+from quendor.instruction import name
+
+OPERANDS = 8
+
+
+class Record(NamedTuple):
+    """An instruction in the trace."""
+
+    pc: int
+    opcode: int
+    operands: Tuple[int, ...]
+    depth: int
+
+
+class Trace:
+    """
+    Abstraction for a ring buffer of the last instructions executed.
+
+    Each record holds the address and opcode of an instruction, its
+    operands as they are encoded, so a variable operand is the number of
+    the variable, and the depth of the evaluation stack before it ran. The
+    records are kept in arrays that are allocated once, at the size of the
+    trace, and written round and round by the traced dispatch loop of the
+    processor. Nothing is formatted until the trace is dumped.
+    """
+
+    def __init__(self, size: int = 256) -> None:
+        self.size: int = max(size, 1)
+        self.pcs: array = array("L", [0]) * self.size
+        self.opcodes: array = array("H", [0]) * self.size
+        self.depths: array = array("H", [0]) * self.size
+        self.counts: array = array("B", [0]) * self.size
+        self.operands: array = array("H", [0]) * (self.size * OPERANDS)
+        self.position: int = 0
+        self.total: int = 0
+
+    def __len__(self) -> int:
+        """Provide the number of records the trace holds."""
+
+        return min(self.total, self.size)
+
+    def records(self) -> Iterator[Record]:
+        """
+        Provide the records of the trace, oldest first.
+
+        Yields:
+            Each record.
+        """
+
+        for index in range(self.position - len(self), self.position):
+            slot = index % self.size
+            base = slot * OPERANDS
+            end = base + self.counts[slot]
+
+            yield Record(
+                self.pcs[slot],
+                self.opcodes[slot],
+                tuple(self.operands[base:end]),
+                self.depths[slot],
+            )
+
+    def dump(self, dump_file: TextIO) -> None:
+        """Write the records of the trace, oldest first, to a text file."""
+
+        dump_file.write(
+            f"\nQuendor trace of the last {len(self):,}"
+            f" of {self.total:,} instructions\n",
+        )
+
+        for record in self.records():
+            operands = " ".join(f"{value:04x}" for value in record.operands)
+
+            dump_file.write(
+                f"  {record.pc:05x}  {name(record.opcode):<16}"
+                f"{operands:<40} stack {record.depth}\n",
+            )
+
+        dump_file.flush()
@@ -0,0 +1,192 @@
+"""Module for the undo history of a session."""
+
+from collections import deque
+from typing import Deque, List, Optional, TYPE_CHECKING, Tuple
+
+from quendor.memory import Memory
+
+if TYPE_CHECKING:
+    from quendor.processor import Frame
+
+PAGE_SIZE = 256
+
+
+class Snapshot:
+    """
+    Abstraction for one saved state in the undo history.
+
+    A snapshot holds dynamic memory as a tuple of pages, the call frames
+    and the address to continue from. The cost of a snapshot is the number
+    of bytes in the pages it holds that no older snapshot holds as well.
+    """
+
+    __slots__ = ("pages", "frames", "pc", "cost")
+
+    def __init__(
+        self,
+        pages: Tuple[bytes, ...],
+        frames: List["Frame"],
+        pc: int,
+        cost: int,
+    ) -> None:
+        self.pages: Tuple[bytes, ...] = pages
+        self.frames: List["Frame"] = frames
+        self.pc: int = pc
+        self.cost: int = cost
+
+
+class UndoRing:
+    """
+    Abstraction for the undo history of a session.
+
+    Dynamic memory is split into pages. A snapshot only copies the pages
+    that differ from the newest snapshot before it, which is found by
+    comparing each page against that snapshot; every other page is the
+    very same bytes object as in the older snapshot. Pages that still hold
+    what the story started with are shared with a baseline that is built
+    once per program, and cost nothing at all. The memory an undo history
+    takes therefore follows how much each turn writes, not the size of
+    dynamic memory times the depth of the history.
+
+    Snapshots are kept in a ring, limited both in how many it holds and in
+    how many bytes of pages they hold between them. The oldest snapshots
+    are dropped first to stay within those limits.
+    """
+
+    def __init__(
+        self,
+        memory: Memory,
+        depth: int = 10,
+        limit: int = 1 << 20,
+    ) -> None:
+        self.memory: Memory = memory
+        self.depth: int = depth
+        self.limit: int = limit
+        self.size: int = 0
+        self.snapshots: Deque[Snapshot] = deque()
+        self.baseline: Tuple[bytes, ...] = memory.program.cache.get("pages", ())
+
+        if not self.baseline:
+            self.baseline = self._pages(bytes(memory.static[: memory.dynamic_size]))
+            memory.program.cache["pages"] = self.baseline
+
+    @staticmethod
+    def _pages(data: bytes) -> Tuple[bytes, ...]:
+        """Provide the pages of a run of memory."""
+
+        pages: List[bytes] = []
+
+        for start in range(0, len(data), PAGE_SIZE):
+            end = start + PAGE_SIZE
+            pages.append(data[start:end])
+
+        return tuple(pages)
+
+    def save(self, frames: List["Frame"], pc: int) -> bool:
+        """
+        Add a snapshot of the session to the history.
+
+        Args:
+            frames: copies of the call frames of the session
+            pc: the address to continue from when the snapshot is restored
+
+        Returns:
+            True if the snapshot was added, which it is unless it is larger
+            than the history may ever hold.
+        """
+
+        if self.depth <= 0:
+            return False
+
+        pages, cost = self._changed_pages()
+
+        if cost > self.limit:
+            return False
+
+        self.snapshots.append(Snapshot(pages, frames, pc, cost))
+        self.size += cost
+
+        while len(self.snapshots) > self.depth or (
+            self.size > self.limit and len(self.snapshots) > 1
+        ):
+            self._evict()
+
+        return True
+
+    def _changed_pages(self) -> Tuple[Tuple[bytes, ...], int]:
+        """
+        Provide the pages of dynamic memory for a new snapshot.
+
+        Returns:
+            The pages, and the number of bytes in the pages that had to be
+            copied because no older snapshot or the baseline holds them.
+        """
+
+        previous = self.snapshots[-1].pages if self.snapshots else self.baseline
+        baseline = self.baseline
+        dynamic = memoryview(self.memory.dynamic)
+        pages: List[bytes] = []
+        cost = 0
+
+        for index, start in enumerate(range(0, len(dynamic), PAGE_SIZE)):
+            end = start + PAGE_SIZE
+            current = dynamic[start:end]
+
+            if current == previous[index]:
+                pages.append(previous[index])
+            elif current == baseline[index]:
+                pages.append(baseline[index])
+            else:
+                pages.append(bytes(current))
+                cost += len(current)
+
+        dynamic.release()
+
+        return tuple(pages), cost
+
+    def _evict(self) -> None:
+        """Drop the oldest snapshot, handing its pages on to the next one."""
+
+        oldest = self.snapshots.popleft()
+        self.size -= oldest.cost
+
+        if not self.snapshots:
+            return
+
+        following = self.snapshots[0]
+        baseline = self.baseline
+
+        # Pages the next snapshot shared with the oldest one are now its own.
+
+        inherited = sum(
+            len(page)
+            for page, old, base in zip(  # noqa: B905
+                following.pages,
+                oldest.pages,
+                baseline,
+            )
+            if page is old and page is not base
+        )
+
+        following.cost += inherited
+        self.size += inherited
+
+    def restore(self) -> Optional[Snapshot]:
+        """
+        Put dynamic memory back to the newest snapshot and drop it.
+
+        Returns:
+            The snapshot, with the call frames and the address to continue
+            from, or None when the history is empty.
+        """
+
+        if not self.snapshots:
+            return None
+
+        snapshot = self.snapshots.pop()
+        self.size -= snapshot.cost
+
+        self.memory.dynamic[:] = b"".join(snapshot.pages)
+        self.memory.changed(0, self.memory.dynamic_size)
+
+        return snapshot
@@ -0,0 +1,63 @@
+"""Module for assembling minimal zcode programs around a piece of code."""
+
+import os
+import pathlib
+from typing import Callable
+
+GLOBALS = 0x40
+STATIC = 0x220
+ROUTINE = 0x240
+END = 0x440
+
+Assembler = Callable[..., str]
+
+
+def assemble(
+    directory: str,
+    main: bytes,
+    routine: bytes = b"",
+    name: str = "assembled.z5",
+) -> str:
+    """
+    Assemble a minimal version 5 zcode program.
+
+    The program has a global variable table and nothing else in dynamic
+    memory. The main code starts at the static memory base and is followed
+    by a routine at packed address 0x90. This is enough to run a few
+    instructions in isolation, as the tests do.
+
+    Args:
+        directory: the directory to write the program into
+        main: the code to start executing
+        routine: the code of the routine, including its header
+        name: the file name of the program
+
+    Returns:
+        The path to the assembled program.
+
+    Raises:
+        ValueError: if the main code runs into the routine, or the routine
+            runs past the end of the program
+    """
+
+    if len(main) > ROUTINE - STATIC:
+        raise ValueError(f"main code of {len(main)} bytes runs into the routine")
+
+    if len(routine) > END - ROUTINE:
+        raise ValueError(f"routine of {len(routine)} bytes runs past the end")
+
+    story = bytearray(END)
+    story[0x00] = 5
+    story[0x04:0x06] = STATIC.to_bytes(2, "big")
+    story[0x06:0x08] = STATIC.to_bytes(2, "big")
+    story[0x0C:0x0E] = GLOBALS.to_bytes(2, "big")
+    story[0x0E:0x10] = STATIC.to_bytes(2, "big")
+    main_end = STATIC + len(main)
+    routine_end = ROUTINE + len(routine)
+    story[STATIC:main_end] = main
+    story[ROUTINE:routine_end] = routine
+
+    path = os.path.join(directory, name)
+    pathlib.Path(path).write_bytes(bytes(story))
+
+    return path
@@ -0,0 +1,92 @@
+"""Shared fixtures for the Quendor tests."""
+
+import functools
+import io
+import logging
+import sys
+from pathlib import Path
+from typing import Iterator, TYPE_CHECKING
+
+import logzero
+
+import pytest
+
+if TYPE_CHECKING:
+    from tests.assembly import Assembler
+
+
+@pytest.fixture(autouse=True)
+def _logging_to_captured_stderr(capsys: pytest.CaptureFixture) -> Iterator[None]:
+    """
+    Point the logzero stream handler at the stderr of the current test.
+
+    The handler is bound to whatever stderr was when logzero was first
+    imported, which otherwise depends on which test happens to run first.
+
+    Args:
+        capsys: the capture fixture, which replaces stderr for the test
+
+    Yields:
+        Nothing; the handler is restored once the test is done.
+    """
+
+    handlers = [
+        handler
+        for handler in logzero.logger.handlers
+        if type(handler) is logging.StreamHandler
+    ]
+
+    for handler in handlers:
+        handler.stream = sys.stderr
+
+    yield
+
+    for handler in handlers:
+        handler.stream = sys.__stderr__
+
+
+@pytest.fixture(autouse=True)
+def _empty_stdin(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Give every test an empty standard input.
+
+    A program run from the command line reads its commands from there, so
+    a session ends at its first read instead of failing on the captured
+    input of pytest.
+
+    Args:
+        monkeypatch: the fixture that restores stdin once the test is done
+    """
+
+    monkeypatch.setattr(sys, "stdin", io.StringIO(""))
+
+
+@pytest.fixture(autouse=True)
+def _private_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Keep the story cache and catalog of every test to itself.
+
+    Args:
+        tmp_path: the directory of the test
+        monkeypatch: the fixture that restores the environment afterwards
+    """
+
+    monkeypatch.setenv("QUENDOR_CACHE", str(tmp_path / "quendor-cache"))
+
+
+@pytest.fixture(name="assemble")
+def fixture_assemble(tmp_path: Path) -> "Assembler":
+    """
+    Provide a way to assemble programs into the directory of the test.
+
+    Args:
+        tmp_path: the directory of the test
+
+    Returns:
+        The assembler, which takes the main code and, optionally, the code
+        of a routine and a file name.
+    """
+
+    from tests.assembly import assemble
+
+    return functools.partial(assemble, str(tmp_path))
@@ -0,0 +1,127 @@
+"""Tests for the Quendor benchmarks."""
+
+import os
+import pathlib
+
+from expects import be_above, be_false, be_true, contain, equal, expect, have_key
+
+import pytest
+
+LOOP_INSTRUCTIONS = 30002
+
+
+def test_workload_is_measured() -> None:
+    """Quendor measures the rate, time and memory of a workload."""
+
+    from quendor.scripts.benchmark import run_suite
+
+    (measurement,) = run_suite(1, ["loop-interpreted"])
+
+    expect(measurement.operations).to(equal(LOOP_INSTRUCTIONS))
+    expect(measurement.rate).to(equal(measurement.operations / measurement.seconds))
+    expect(measurement.note).to(equal(""))
+
+
+def test_regressions_are_found_against_baseline() -> None:
+    """Quendor reports a workload that fell behind its baseline."""
+
+    from quendor.scripts.benchmark import Measurement, compare
+
+    measurements = [
+        Measurement("steady", "instructions", 1000, 1.0, 10.0, ""),
+        Measurement("slower", "instructions", 1000, 2.0, 10.0, ""),
+        Measurement("larger", "instructions", 1000, 1.0, 20.0, ""),
+    ]
+    baseline = {
+        name: {"rate": 1000.0, "seconds": 1.0, "peak_kb": 10.0}
+        for name in ("steady", "slower", "larger")
+    }
+
+    regressions = compare(measurements, baseline, 10.0)
+
+    expect(regressions).not_to(have_key("steady"))
+    expect(regressions).to(equal({"slower": ["rate"], "larger": ["peak_kb"]}))
+
+
+def test_workloads_over_budget_are_found() -> None:
+    """Quendor reports a workload whose operations take longer than budgeted."""
+
+    from quendor.scripts.benchmark import BUDGETS, Measurement, over_budget
+
+    budget = BUDGETS["startup"]
+    measurements = [
+        Measurement("startup", "starts", 2, budget * 3, 1.0, ""),
+        Measurement("cold-load", "loads", 1, 0.0, 1.0, "skipped"),
+        Measurement("loop-interpreted", "instructions", 1, 60.0, 1.0, ""),
+    ]
+
+    expect(over_budget(measurements)).to(equal({"startup": ["seconds"]}))
+
+
+def test_full_runs_play_their_script() -> None:
+    """Quendor plays full runs through their script and reports failures."""
+
+    from quendor.scripts.benchmark import FIXTURE_STORY, Workload, measure, run_suite
+
+    (measurement,) = run_suite(1, ["run-test_program"])
+
+    expect(os.path.isfile(FIXTURE_STORY)).to(be_true)
+    expect(measurement.failed).to(be_false)
+    expect(measurement.operations).to(be_above(100000))
+
+    def broken() -> int:
+        raise ValueError("no story")
+
+    failure = measure(Workload("broken", "runs", lambda: broken), 1)
+
+    expect(failure.failed).to(be_true)
+    expect(failure.note).to(equal("failed: ValueError: no story"))
+
+
+def test_missing_story_fails_its_workloads(tmp_path: pathlib.Path) -> None:
+    """Quendor fails the workloads of a story that cannot be loaded."""
+
+    from quendor.scripts.benchmark import run_suite
+
+    missing = str(tmp_path / "gone.z5")
+    (measurement,) = run_suite(1, ["checksum"], story=missing)
+    note = f"failed: FileNotFoundError: no story at {missing}"
+
+    expect(measurement.failed).to(be_true)
+    expect(measurement.note).to(equal(note))
+
+    broken = tmp_path / "broken.z5"
+    broken.write_bytes(b"")
+    (measurement,) = run_suite(1, ["cold-load"], story=str(broken))
+
+    expect(measurement.failed).to(be_true)
+    expect(measurement.note).to(contain("CalledProcessError"))
+
+
+def test_assembled_code_must_fit(tmp_path: pathlib.Path) -> None:
+    """Quendor refuses to assemble main code that runs into the routine."""
+
+    from quendor.scripts.benchmark import assemble
+
+    assemble(str(tmp_path), "fits.z5", bytes(0x20))
+
+    with pytest.raises(ValueError, match="runs into the routine"):
+        assemble(str(tmp_path), "overlaps.z5", bytes(0x21))
+
+
+def test_story_is_required_away_from_fixture(
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Quendor asks for a story when the test program fixture is not there."""
+
+    from quendor.scripts.benchmark import FIXTURE_STORY, process_parameters
+
+    expect(process_parameters([])["story"]).to(equal(FIXTURE_STORY))
+
+    monkeypatch.chdir(tmp_path)
+
+    expect(process_parameters(["--story", "a.z5"])["story"]).to(equal("a.z5"))
+
+    with pytest.raises(SystemExit):
+        process_parameters([])
@@ -0,0 +1,172 @@
+"""Tests for the Quendor story cache."""
+
+from pathlib import Path
+
+from expects import be_false, be_true, equal, expect, have_key
+
+import pytest
+
+from tests.assembly import Assembler
+
+# call_vs 0x90 g00 -> g01; inc_chk g00 99 ?~loop; quit
+MAIN = bytes(
+    (0xE0, 0x2F, 0x00, 0x90, 0x10, 0x11) + (0x05, 0x10, 0x63, 0x3F, 0xF7) + (0xBA,),
+)
+
+# 2 locals; add L01 L01 -> L02; jl L02 100 ?~done; rtrue; done: ret L02
+ROUTINE = bytes(
+    (0x02, 0x74, 0x01, 0x01, 0x02) + (0x42, 0x02, 0x64, 0x43) + (0xB0, 0xAB, 0x02),
+)
+
+
+def test_cache_restores_decoded_and_compiled_code(
+    tmp_path: Path,
+    assemble: Assembler,
+) -> None:
+    """Quendor reuses the decoded and compiled code of an earlier session."""
+
+    from quendor.cache import StoryCache
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    program_file = assemble(MAIN, ROUTINE)
+    cache_directory = tmp_path / "cache"
+
+    program = Program(program_file)
+    Processor(program, threshold=5).run()
+
+    expect(StoryCache(program, cache_directory).save()).to(be_true)
+
+    reloaded = Program(program_file)
+    cache = StoryCache(reloaded, cache_directory)
+
+    expect(cache.load()).to(be_true)
+    expect(cache.save()).to(be_false)
+    expect(set(reloaded.cache["instructions"])).to(
+        equal(set(program.cache["instructions"])),
+    )
+    expect(reloaded.cache["sources"]).to(equal(program.cache["sources"]))
+
+    processor = Processor(reloaded, threshold=5)
+    processor.step()
+
+    expect(processor.routines[0x240]).not_to(equal(None))
+
+
+def test_changed_story_invalidates_cache(tmp_path: Path, assemble: Assembler) -> None:
+    """Quendor ignores a cache that was built from a different story file."""
+
+    from quendor.cache import StoryCache
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    program_file = assemble(MAIN, ROUTINE)
+    cache_directory = tmp_path / "cache"
+
+    program = Program(program_file)
+    Processor(program, threshold=5).run()
+    StoryCache(program, cache_directory).save()
+
+    story = bytearray(Path(program_file).read_bytes())
+    story[-1] = 0xFF
+    Path(program_file).write_bytes(bytes(story))
+
+    changed = Program(program_file)
+
+    expect(StoryCache(changed, cache_directory).load()).to(be_false)
+    expect(changed.cache).to(equal({}))
+
+
+def test_changed_compiler_invalidates_cache(
+    tmp_path: Path,
+    assemble: Assembler,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Quendor ignores a cache that was built by different compiler code."""
+
+    from quendor import cache
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    program_file = assemble(MAIN, ROUTINE)
+    cache_directory = tmp_path / "cache"
+
+    program = Program(program_file)
+    Processor(program, threshold=5).run()
+    cache.StoryCache(program, cache_directory).save()
+
+    monkeypatch.setattr(cache, "code_digest", lambda: bytes(16))
+    changed = Program(program_file)
+
+    expect(cache.StoryCache(changed, cache_directory).load()).to(be_false)
+    expect(changed.cache).to(equal({}))
+
+
+def test_shared_cache_is_not_trusted(tmp_path: Path, assemble: Assembler) -> None:
+    """Quendor neither reads nor writes a cache that others can write to."""
+
+    from quendor.cache import StoryCache
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    program_file = assemble(MAIN, ROUTINE)
+    cache_directory = tmp_path / "cache"
+
+    program = Program(program_file)
+    Processor(program, threshold=5).run()
+    cache = StoryCache(program, cache_directory)
+
+    expect(cache.save()).to(be_true)
+    expect(cache_directory.stat().st_mode & 0o777).to(equal(0o700))
+
+    cache.path.chmod(0o666)
+
+    expect(StoryCache(Program(program_file), cache_directory).load()).to(be_false)
+
+    cache.path.chmod(0o600)
+    cache_directory.chmod(0o777)
+
+    expect(StoryCache(Program(program_file), cache_directory).load()).to(be_false)
+    expect(StoryCache(Program(program_file), cache_directory).save()).to(be_false)
+
+
+def test_session_saves_cache_on_error(assemble: Assembler) -> None:
+    """Quendor writes the story cache even when the session fails."""
+
+    from quendor.cache import StoryCache
+    from quendor.errors import UnimplementedOpcodeError
+    from quendor.program import Program
+    from quendor.startup import run_quendor
+
+    # call_vs 0x90 g00 -> g01; inc_chk g00 99 ?~loop; unimplemented
+    main = MAIN[:-1] + bytes((0xBE, 0x1F))
+    program = Program(assemble(main, ROUTINE))
+    cli = {"trace": 0, "profile": None}
+
+    with pytest.raises(UnimplementedOpcodeError):
+        run_quendor(program, cli)
+
+    reloaded = Program(program.file)
+
+    expect(StoryCache(reloaded).load()).to(be_true)
+    expect(reloaded.cache["routines"]).to(equal({}))
+    expect(reloaded.cache["sources"]).to(have_key(0x240))
+
+
+def test_failed_save_leaves_no_temporary_file(
+    tmp_path: Path,
+    assemble: Assembler,
+) -> None:
+    """Quendor removes the temporary file of a cache it could not write."""
+
+    from quendor.cache import StoryCache
+    from quendor.program import Program
+
+    program = Program(assemble(MAIN, ROUTINE))
+    program.cache["sources"] = {0x240: object()}
+    cache_directory = tmp_path / "cache"
+
+    with pytest.raises(ValueError, match="unmarshallable"):
+        StoryCache(program, cache_directory).save()
+
+    expect(list(cache_directory.iterdir())).to(equal([]))
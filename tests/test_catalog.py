@@ -0,0 +1,127 @@
+"""Tests for the Quendor catalog of programs on the search path."""
+
+import os
+import shutil
+from pathlib import Path
+from typing import Tuple
+from unittest import mock
+
+from expects import be_none, equal, expect
+
+import pytest
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "test_program.z5")
+
+
+@pytest.fixture(name="library")
+def fixture_library(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Tuple[Path, Path]:
+    """Provide two directories of stories, the second holding a nested one."""
+
+    first = tmp_path / "first"
+    second = tmp_path / "second" / "infocom" / "zork"
+    second.mkdir(parents=True)
+    first.mkdir()
+
+    shutil.copy(FIXTURE, second / "zork1.z5")
+    (first / "notes.z5").write_bytes(b"not a story")
+
+    monkeypatch.setenv("QUENDOR_CACHE", str(tmp_path / "cache"))
+    search = (str(first), str(tmp_path / "second"))
+    monkeypatch.setenv("ZCODE_PATH", os.pathsep.join(search))
+
+    return first, second
+
+
+def test_catalog_finds_programs(library: Tuple[Path, Path]) -> None:
+    """Quendor finds a program by name, relative path, or release and serial."""
+
+    from quendor.catalog import Catalog, search_path
+
+    _, second = library
+    path = str(second / "zork1.z5")
+    catalog = Catalog(search_path())
+
+    expect(catalog.find("zork1.z5")).to(equal(path))
+    expect(catalog.find("infocom/zork/zork1.z5")).to(equal(path))
+    expect(catalog.find("0-171219")).to(equal(path))
+    expect(catalog.find("notes.z5")).to(be_none)
+
+    entry = catalog.entry("zork1.z5")
+
+    if entry is None:
+        pytest.fail("the catalog has no entry for zork1.z5")
+
+    expect(entry.digest).to(equal(catalog.entries[path].digest))
+
+
+def test_catalog_refreshes_incrementally(library: Tuple[Path, Path]) -> None:
+    """Quendor keeps its catalog between runs and only probes what changed."""
+
+    from quendor.catalog import Catalog, search_path
+
+    first, second = library
+
+    expect(Catalog(search_path()).refresh()).to(equal(1))
+
+    catalog = Catalog(search_path())
+
+    expect(catalog.find("zork1.z5")).to(equal(str(second / "zork1.z5")))
+    expect(catalog.refresh()).to(equal(0))
+
+    shutil.copy(FIXTURE, first / "zork1.z5")
+    (second / "zork1.z5").unlink()
+
+    expect(catalog.find("zork1.z5")).to(equal(str(first / "zork1.z5")))
+    expect(Catalog(search_path()).entries).to(equal(catalog.entries))
+
+
+def test_program_located_through_catalog(library: Tuple[Path, Path]) -> None:
+    """Quendor loads a program from the search path by release and serial."""
+
+    from quendor.logging import logger
+    from quendor.program import Program
+
+    _, second = library
+
+    with mock.patch.object(logger, "debug") as debug:
+        program = Program("0-171219")
+
+    expect(program.file).to(equal(str(second / "zork1.z5")))
+    expect(program.header.serial).to(equal("171219"))
+    debug.assert_any_call(f"zcode program file: {program.file}")
+
+
+def test_program_located_without_suffix(library: Tuple[Path, Path]) -> None:
+    """Quendor finds a file on the search path by name, whatever its suffix."""
+
+    from quendor.program import Program
+
+    first, _ = library
+    shutil.copy(FIXTURE, first / "story")
+
+    expect(Program("story").file).to(equal(str(first / "story")))
+
+
+def test_catalog_survives_links_and_bad_index(library: Tuple[Path, Path]) -> None:
+    """Quendor does not follow links to directories or trust a bad index."""
+
+    import marshal
+
+    from quendor import __version__
+    from quendor.catalog import Catalog, MAGIC, search_path
+
+    _, second = library
+    (second / "loop").symlink_to(second.parent.parent, target_is_directory=True)
+
+    catalog = Catalog(search_path())
+    catalog.refresh()
+
+    expect(list(catalog.entries)).to(equal([str(second / "zork1.z5")]))
+
+    with open(catalog.path, "wb") as index_file:
+        marshal.dump(((MAGIC, __version__), [("too", "few")]), index_file)
+
+    expect(Catalog(search_path()).load()).to(equal(False))
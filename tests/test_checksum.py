@@ -0,0 +1,95 @@
+"""Tests for the Quendor story checksum."""
+
+import os
+from pathlib import Path
+
+from expects import be_false, be_none, be_true, equal, expect
+
+import pytest
+
+from tests.assembly import Assembler, GLOBALS
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "test_program.z5")
+
+# loop: call_vs 0x90 -> g01; inc_chk g00 9 ?~loop; quit
+
+MAIN = bytes((0xE0, 0x3F, 0x00, 0x90, 0x11) + (0x05, 0x10, 0x09, 0x3F, 0xF8, 0xBA))
+
+# 0 locals; verify ?rtrue; rfalse
+
+ROUTINE = bytes((0x00, 0xBD, 0xC1, 0xB1))
+
+
+def signed_story(assemble: Assembler, corrupt: bool = False) -> str:
+    """Provide an assembled program whose header holds its checksum."""
+
+    path = Path(assemble(MAIN, ROUTINE))
+    story = bytearray(path.read_bytes())
+    total = (sum(story[0x40:]) + corrupt) & 0xFFFF
+    story[0x1C:0x1E] = total.to_bytes(2, "big")
+    path.write_bytes(bytes(story))
+
+    return str(path)
+
+
+def test_checksum_matches_header() -> None:
+    """Quendor computes the checksum of a story once and keeps it."""
+
+    from quendor.checksum import checksum
+    from quendor.program import Program
+
+    program = Program(FIXTURE)
+    story = bytes(program.story)
+    end = program.header.file_length
+    expected = sum(story[0x40:end]) & 0xFFFF
+
+    expect(checksum(story, program.header.file_length)).to(equal(expected))
+    expect(program.verified).to(be_true)
+    expect(program.cache["checksum"]).to(equal(program.header.checksum))
+
+
+def test_checksum_without_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Quendor computes the checksum without NumPy when it is not installed."""
+
+    from quendor import checksum as module
+
+    monkeypatch.setattr(module, "_numpy", lambda: None)
+
+    total = sum(range(0x40, 256)) + 3 * sum(range(256))
+
+    expect(module.checksum(bytes(range(256)) * 4)).to(equal(total & 0xFFFF))
+    expect(module.checksum(b"\x05" * 0x48, 0x44)).to(equal(20))
+    expect(module.checksum(b"\x05" * 0x20)).to(equal(0))
+
+
+def test_checksum_with_numpy() -> None:
+    """Quendor computes the same checksum with NumPy as without it."""
+
+    from quendor import checksum as module
+
+    pytest.importorskip("numpy")
+
+    story = bytes(range(256)) * 2048
+
+    expect(module.checksum(story)).to(equal(sum(story[0x40:]) & 0xFFFF))
+
+
+@pytest.mark.parametrize("threshold", [0, 5])
+def test_verify_branches_on_checksum(assemble: Assembler, threshold: int) -> None:
+    """Quendor verifies a story, interpreted and compiled alike."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    genuine = Processor(Program(signed_story(assemble)), threshold=threshold)
+    genuine.run()
+
+    corrupt = Processor(Program(signed_story(assemble, True)), threshold=threshold)
+    corrupt.run()
+
+    expect(genuine.memory.read_word(GLOBALS + 2)).to(equal(1))
+    expect(corrupt.memory.read_word(GLOBALS + 2)).to(equal(0))
+    expect(corrupt.program.verified).to(be_false)
+
+    if threshold:
+        expect(genuine.routines[0x240]).not_to(be_none)
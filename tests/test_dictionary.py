@@ -0,0 +1,112 @@
+"""Tests for the Quendor dictionary and tokeniser."""
+
+from typing import List
+
+from expects import be, equal, expect, have_key
+
+from tests.assembly import Assembler, GLOBALS
+from tests.test_memory import zcode_fixture
+
+TEXT_BUFFER = 0x100
+PARSE_BUFFER = 0x140
+
+
+def test_story_dictionary_is_shared() -> None:
+    """Quendor indexes the story dictionary once for every session."""
+
+    from quendor.memory import Memory
+    from quendor.program import Program
+    from quendor.text import TextDecoder
+    from quendor.dictionary import Tokenizer
+
+    program = Program(zcode_fixture())
+
+    first = Memory(program)
+    second = Memory(program)
+    index = Tokenizer(first, TextDecoder(first)).dictionary()
+
+    expect(program.cache["dictionaries"]).to(have_key(index.address))
+    expect(Tokenizer(second, TextDecoder(second)).dictionary()).to(be(index))
+
+
+def test_tokenise_looks_up_words() -> None:
+    """Quendor splits input into the words of the story dictionary."""
+
+    from quendor.memory import Memory
+    from quendor.program import Program
+    from quendor.text import TextDecoder
+    from quendor.dictionary import Tokenizer
+
+    memory = Memory(Program(zcode_fixture()))
+    text = TextDecoder(memory)
+    tokenizer = Tokenizer(memory, text)
+
+    command = b"inventory, xyzzy"
+    buffer = bytes((80, len(command))) + command
+    end = TEXT_BUFFER + len(buffer)
+    memory.dynamic[TEXT_BUFFER:end] = buffer
+    memory.dynamic[PARSE_BUFFER] = 10
+
+    tokenizer.tokenise(TEXT_BUFFER, PARSE_BUFFER)
+
+    words: List[str] = []
+
+    for number in range(memory.read_byte(PARSE_BUFFER + 1)):
+        entry = memory.read_word(PARSE_BUFFER + 2 + 4 * number)
+        words.append(text.decode(entry) if entry else "")
+
+    expect(words).to(equal(["inventory", ",", ""]))
+    expect(memory.read_byte(PARSE_BUFFER + 12)).to(equal(5))
+    expect(memory.read_byte(PARSE_BUFFER + 13)).to(equal(13))
+
+
+def test_custom_dictionary_follows_writes(assemble: Assembler) -> None:
+    """Quendor indexes a custom dictionary in dynamic memory again once it changes."""
+
+    from quendor.memory import Memory
+    from quendor.program import Program
+    from quendor.text import TextDecoder
+    from quendor.dictionary import Tokenizer
+
+    memory = Memory(Program(assemble(b"")))
+    tokenizer = Tokenizer(memory, TextDecoder(memory))
+
+    # No separators, entries of 6 bytes, 1 entry, holding "hello".
+    table = 0x180
+    entry = table + 4
+    end = entry + 6
+    memory.dynamic[table:entry] = bytes((0, 6, 0, 1))
+    memory.dynamic[entry:end] = tokenizer.encode(b"hello")
+
+    expect(tokenizer.dictionary(table).lookup(tokenizer.encode(b"hello"))).to(
+        equal(entry),
+    )
+
+    memory.dynamic[entry:end] = tokenizer.encode(b"world")
+
+    expect(tokenizer.dictionary(table).lookup(tokenizer.encode(b"hello"))).to(
+        equal(0),
+    )
+
+
+def test_read_stores_input(assemble: Assembler) -> None:
+    """Quendor reads a line of input into a text buffer."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # aread 0x100 0 -> g00; quit
+    main = bytes((0xE4, 0x1F, 0x01, 0x00, 0x00, 0x10, 0xBA))
+
+    processor = Processor(
+        Program(assemble(main)),
+        reader=lambda: "Open Door",
+    )
+    processor.memory.write_byte(TEXT_BUFFER, 20)
+    processor.run()
+
+    expect(processor.memory.read_word(GLOBALS)).to(equal(13))
+    expect(processor.memory.read_byte(TEXT_BUFFER + 1)).to(equal(9))
+    expect(bytes(processor.memory.read_bytes(TEXT_BUFFER + 2, 9))).to(
+        equal(b"open door"),
+    )
@@ -0,0 +1,97 @@
+"""Tests for the Quendor fork server."""
+
+import gc
+import os
+import socket
+from pathlib import Path
+from typing import Iterator, TYPE_CHECKING, Tuple
+
+from expects import be_none, contain, equal, expect, have_key
+
+import pytest
+
+from tests.assembly import Assembler, GLOBALS, STATIC
+from tests.test_session import PREPARE, READ
+
+if TYPE_CHECKING:
+    from quendor.forkserver import ForkServer
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+
+@pytest.fixture(autouse=True)
+def _warm_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """
+    Keep story caches out of the user cache and unfreeze the heap after.
+
+    Args:
+        tmp_path: the directory of the test
+        monkeypatch: the fixture that restores the environment
+
+    Yields:
+        Nothing; the heap is unfrozen once the test is done.
+    """
+
+    monkeypatch.setenv("QUENDOR_CACHE", str(tmp_path / "cache"))
+
+    yield
+
+    gc.unfreeze()
+
+
+def converse(server: "ForkServer", line: bytes) -> Tuple[bytes, int]:
+    """Fork a session on one end of a socket pair and talk to it."""
+
+    ours, theirs = socket.socketpair()
+
+    with theirs:
+        pid = server.spawn(theirs)
+
+    with ours:
+        ours.sendall(line)
+        ours.shutdown(socket.SHUT_WR)
+        received = b"".join(iter(lambda: ours.recv(4096), b""))
+
+    return received, os.WEXITSTATUS(os.waitpid(pid, 0)[1])
+
+
+def test_warm_server_forks_ready_sessions(assemble: Assembler) -> None:
+    """Quendor forks sessions from a server with its stories warmed."""
+
+    from quendor.forkserver import ForkServer
+    from quendor.program import Program
+
+    program = Program(assemble(PREPARE + READ))
+    server = ForkServer({"story": program})
+    server.warm()
+
+    # Warming decoded everything up to and including the first read.
+
+    expect(program.cache["instructions"]).to(have_key(STATIC + len(PREPARE)))
+    expect(converse(server, b"look\r\n")).to(equal((b"Hello", 0)))
+    expect(converse(server, b"xyzzy\r\n")).to(equal((b"Hello", 0)))
+
+    # The sessions ran in the children, leaving the warm processor untouched.
+
+    processor = server.processors["story"]
+
+    expect(processor.instructions).to(equal(0))
+    expect(processor.memory.read_word(GLOBALS + 2)).to(equal(0))
+    expect(processor.waiting).to(be_none)
+
+
+def test_forked_session_is_chosen_from_catalog(assemble: Assembler) -> None:
+    """Quendor asks which story to fork when it serves more than one."""
+
+    from quendor.forkserver import ForkServer
+    from quendor.program import Program
+
+    story = assemble(PREPARE + READ)
+    server = ForkServer({"first": Program(story), "second": Program(story)})
+    server.warm()
+
+    received, status = converse(server, b"first\r\nlook\r\n")
+
+    expect(status).to(equal(0))
+    expect(received).to(contain(b"Stories: first, second"))
+    expect(received).to(contain(b"Hello"))
@@ -0,0 +1,118 @@
+"""Tests for hosting Quendor sessions across worker processes."""
+
+import asyncio
+import socket
+import sys
+from pathlib import Path
+from typing import List
+from unittest import mock
+
+from expects import be_true, contain, equal, expect
+
+import pytest
+
+from tests.assembly import Assembler
+from tests.test_session import PREPARE, READ
+
+pytest.importorskip("multiprocessing.shared_memory")
+
+
+def test_program_reads_from_buffer(assemble: Assembler) -> None:
+    """Quendor builds a program over a buffer without reading a file."""
+
+    from quendor.program import Program
+
+    story = Path(assemble(PREPARE + READ)).read_bytes()
+    view = memoryview(story)
+    program = Program.from_buffer(view, "shared.z5")
+
+    expect(program.format).to(equal("ZCODE"))
+    expect(program.file).to(equal("shared.z5"))
+    expect(program.story.obj).to(equal(story))
+    expect(program.header.version).to(equal(5))
+
+
+def test_sessions_are_spread_across_workers(assemble: Assembler) -> None:
+    """Quendor hands connections to workers that share the story."""
+
+    from quendor.hosting import Host
+    from quendor.program import Program
+
+    host = Host({"story": Program(assemble(PREPARE + READ))}, 2)
+    host.start()
+
+    async def converse(port: int) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"look\r\n")
+        writer.write_eof()
+
+        return await reader.read()
+
+    async def run(listener: socket.socket) -> List[bytes]:
+        serving = asyncio.ensure_future(host.serve(listener))
+        port = listener.getsockname()[1]
+
+        try:
+            return await asyncio.gather(*(converse(port) for _ in range(4)))
+        finally:
+            serving.cancel()
+
+    try:
+        with socket.create_server(("127.0.0.1", 0)) as listener:
+            received = asyncio.run(run(listener))
+
+        sessions = [load.sessions for load in host.loads]
+    finally:
+        host.stop()
+
+    expect(received).to(equal([b"Hello"] * 4))
+    expect(sessions).to(equal([2, 2]))
+    expect(all(not process.is_alive() for process in host.processes)).to(be_true)
+
+
+def test_story_is_chosen_from_catalog(assemble: Assembler) -> None:
+    """Quendor asks which story to play when it hosts more than one."""
+
+    from quendor.hosting import Host
+    from quendor.program import Program
+
+    story = assemble(PREPARE + READ)
+    host = Host({"first": Program(story), "second": Program(story)}, 1)
+    host.start()
+
+    async def run(listener: socket.socket) -> bytes:
+        serving = asyncio.ensure_future(host.serve(listener))
+        port = listener.getsockname()[1]
+
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"second\r\nlook\r\n")
+            writer.write_eof()
+
+            return await reader.read()
+        finally:
+            serving.cancel()
+
+    try:
+        with socket.create_server(("127.0.0.1", 0)) as listener:
+            received = asyncio.run(run(listener))
+    finally:
+        host.stop()
+
+    expect(received).to(contain(b"Stories: first, second"))
+    expect(received).to(contain(b"Hello"))
+
+
+def test_hosting_needs_shared_memory(assemble: Assembler) -> None:
+    """Quendor refuses to host across workers before Python 3.8."""
+
+    from quendor.errors import UnsupportedPythonVersionError
+    from quendor.hosting import run_host
+    from quendor.program import Program
+
+    programs = {"story": Program(assemble(PREPARE + READ))}
+
+    with mock.patch.object(sys, "version_info", (3, 7)), pytest.raises(
+        UnsupportedPythonVersionError,
+    ):
+        run_host(programs, "127.0.0.1", 0, 1)
@@ -0,0 +1,69 @@
+"""Tests for the Quendor memory model."""
+
+import os
+
+from expects import be, be_an, equal, expect
+
+import pytest
+
+
+def zcode_fixture() -> str:
+    """Provide the path to the unblorbed zcode fixture."""
+
+    return os.path.join(os.path.dirname(__file__), "./fixtures", "test_program.z5")
+
+
+def test_header_identifies_story() -> None:
+    """Quendor reads the identifying details of a story from its header."""
+
+    from quendor.program import Program
+
+    header = Program(zcode_fixture()).header
+
+    expect(header.version).to(equal(5))
+    expect(header.release).to(equal(0))
+    expect(header.serial).to(equal("171219"))
+    expect(header.file_length).to(equal(62632))
+
+
+def test_sessions_share_static_memory() -> None:
+    """Quendor shares static memory between sessions of the same program."""
+
+    from quendor.memory import Memory
+    from quendor.program import Program
+
+    program = Program(zcode_fixture(), mapped=True)
+
+    first = Memory(program)
+    second = Memory(program)
+
+    expect(first.static).to(be(second.static))
+    expect(first.dynamic).to(be_an(bytearray))
+    expect(len(first.dynamic)).to(equal(program.header.static_memory))
+
+    first.write_word(0x40, 0x1234)
+
+    expect(first.read_word(0x40)).to(equal(0x1234))
+    expect(second.read_word(0x40)).to(equal(program.story[0x40] << 8))
+
+    first.reset()
+
+    expect(first.dynamic).to(equal(second.dynamic))
+
+
+def test_static_memory_is_read_only() -> None:
+    """Quendor does not allow writes outside of dynamic memory."""
+
+    from quendor.errors import IllegalMemoryAccessError
+    from quendor.memory import Memory
+    from quendor.program import Program
+
+    program = Program(zcode_fixture())
+    memory = Memory(program)
+    static_base = program.header.static_memory
+
+    expect(memory.read_byte(static_base)).to(equal(program.data[static_base]))
+    expect(memory.read_bytes(static_base, 4)).to(be_an(memoryview))
+
+    with pytest.raises(IllegalMemoryAccessError):
+        memory.write_byte(static_base, 0)
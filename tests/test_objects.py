@@ -0,0 +1,129 @@
+"""Tests for the Quendor object table."""
+
+from typing import Tuple
+
+from expects import be, be_false, be_true, equal, expect
+
+import pytest
+
+from tests.test_memory import zcode_fixture
+
+
+def object_table() -> Tuple:
+    """Provide memory, text and the object table of the zcode fixture."""
+
+    from quendor.memory import Memory
+    from quendor.objects import ObjectTable
+    from quendor.program import Program
+    from quendor.text import TextDecoder
+
+    memory = Memory(Program(zcode_fixture()))
+
+    return memory, TextDecoder(memory), ObjectTable(memory)
+
+
+def test_object_tree_is_read_into_columns() -> None:
+    """Quendor reads the links and short names of every object."""
+
+    memory, text, objects = object_table()
+
+    expect(objects.count).to(equal(33))
+    expect(text.decode(objects.short_name(6))).to(equal("compass"))
+    expect(objects.child[6]).to(equal(7))
+    expect(objects.parent[7]).to(equal(6))
+    expect(objects.sibling[7]).to(equal(8))
+
+
+def test_tree_changes_are_written_to_memory() -> None:
+    """Quendor keeps memory in step with changes to the object tree."""
+
+    from quendor.objects import ObjectTable
+
+    memory, _, objects = object_table()
+
+    objects.insert(7, 2)
+    objects.set_attribute(7, 5, True)
+
+    expect(objects.child[6]).to(equal(8))
+    expect(objects.has_attribute(7, 5)).to(be_true)
+
+    reread = ObjectTable(memory)
+
+    expect(reread.parent[7]).to(equal(2))
+    expect(reread.child[2]).to(equal(7))
+    expect(reread.child[6]).to(equal(8))
+    expect(reread.attributes[7]).to(equal(objects.attributes[7]))
+
+
+def test_memory_writes_update_columns() -> None:
+    """Quendor sees writes made straight into the object entries."""
+
+    memory, _, objects = object_table()
+
+    # Version 5 entries hold 6 attribute bytes before the parent word.
+
+    memory.write_word(objects.entries + 6 * objects.entry_length + 6, 3)
+    memory.write_byte(objects.entries + 6 * objects.entry_length, 0x80)
+
+    expect(objects.parent[7]).to(equal(3))
+    expect(objects.has_attribute(7, 0)).to(be_true)
+    expect(objects.has_attribute(7, 1)).to(be_false)
+
+
+def test_property_index_follows_layout() -> None:
+    """Quendor indexes properties and reindexes when their layout changes."""
+
+    memory, _, objects = object_table()
+
+    address = objects.address_of(7, 21)
+
+    expect(objects.next_property(7, 0)).to(equal(48))
+    expect(objects.size_of(address)).to(equal(2))
+
+    objects.put(7, 21, 0x1234)
+
+    expect(objects.get(7, 21)).to(equal(0x1234))
+
+    index = objects.index(7)
+    memory.write_word(address, 0x4321)
+
+    expect(objects.index(7)).to(be(index))
+
+    # Rewriting the size byte of the property changes its layout.
+
+    memory.write_byte(address - 1, memory.read_byte(address - 1) & 0xBF)
+
+    expect(objects.size_of(objects.address_of(7, 21))).to(equal(1))
+
+
+def test_property_tables_are_indexed_when_used() -> None:
+    """Quendor indexes no property table until it is used, nor after bulk data."""
+
+    memory, _, objects = object_table()
+
+    expect(objects.properties).to(equal({}))
+    expect(memory.watch_end).to(equal(memory.program.cache["objects_end"]))
+
+    address, size = objects.index(15)[1]
+    index = objects.index(15)
+
+    # A long write over property data leaves the layout as it was.
+
+    end = address + size
+    memory.dynamic[address:end] = bytes(size)
+    memory.changed(address, size)
+
+    expect(objects.index(15)).to(be(index))
+
+
+def test_missing_property_uses_default() -> None:
+    """Quendor provides the default value of a property an object lacks."""
+
+    from quendor.errors import InvalidObjectError
+
+    memory, _, objects = object_table()
+
+    expect(objects.get(2, 4)).to(equal(memory.read_word(objects.address + 6)))
+
+    with pytest.raises(InvalidObjectError):
+        objects.put(2, 4, 1)
@@ -0,0 +1,127 @@
+"""Tests for the Quendor output streams."""
+
+from pathlib import Path
+from typing import List
+
+from expects import equal, expect
+
+import pytest
+
+from tests.assembly import Assembler
+
+# output_stream 3 0x100; print_char 'h'; print_char 'i'; new_line;
+# output_stream -3; print_char '!'; print_char 0x9B; quit
+
+MAIN = bytes(
+    (0xF3, 0x4F, 0x03, 0x01, 0x00)
+    + (0xE5, 0x7F, 0x68, 0xE5, 0x7F, 0x69, 0xBB)
+    + (0xF3, 0x3F, 0xFF, 0xFD)
+    + (0xE5, 0x7F, 0x21, 0xE5, 0x7F, 0x9B, 0xBA),
+)
+
+
+def test_wrap_continues_lines() -> None:
+    """Quendor word wraps text from the column the last text ended at."""
+
+    from quendor.output import wrap
+
+    expect(wrap("the quick brown fox", 10)).to(equal(("the quick\nbrown fox", 9)))
+    expect(wrap(" jumps over", 10, 6)).to(equal(("\njumps over", 10)))
+    expect(wrap("a\nverylongword b", 5, 3)).to(equal(("a\nverylongword\nb", 1)))
+
+
+def test_streams_flush_in_one_write(assemble: Assembler) -> None:
+    """Quendor writes out what the program printed in one piece, and no sooner."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    written: List[str] = []
+    processor = Processor(
+        Program(assemble(MAIN)),
+        output=written.append,
+    )
+    processor.run()
+
+    expect(written).to(equal(["!ä"]))
+    expect(bytes(processor.memory.read_bytes(0x100, 5))).to(equal(b"\0\3hi\r"))
+
+    processor.streams.write("unseen")
+
+    expect(written).to(equal(["!ä"]))
+
+
+def test_streams_to_files(tmp_path: Path, assemble: Assembler) -> None:
+    """Quendor appends the transcript and the command script to their files."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    written: List[str] = []
+    processor = Processor(
+        Program(assemble(bytes((0xBA,)))),
+        output=written.append,
+    )
+    streams = processor.streams
+
+    streams.select(2)
+    streams.select(4)
+    streams.write("You see a lamp.\n")
+    streams.command("take lamp")
+    streams.set_window(1)
+    streams.write("Score: 0")
+    streams.set_window(0)
+    streams.select(-1)
+    streams.write("Taken.\n")
+    streams.flush()
+    streams.select(-2)
+    streams.write("Dark.\n")
+    streams.flush()
+
+    transcript = (tmp_path / "assembled.scr").read_text()
+
+    expect(transcript).to(equal("You see a lamp.\nTaken.\n"))
+    expect((tmp_path / "assembled.rec").read_text()).to(equal("take lamp\n"))
+    expect(written).to(equal(["You see a lamp.\n"]))
+    expect(processor.memory.read_byte(0x11) & 1).to(equal(0))
+
+
+def test_streams_lay_out_windows(assemble: Assembler) -> None:
+    """Quendor wraps the lower window and places text on the upper one."""
+
+    from quendor.errors import OutputStreamError
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    written: List[str] = []
+    processor = Processor(
+        Program(assemble(bytes((0xBA,)))),
+        output=written.append,
+        width=12,
+    )
+    streams = processor.streams
+
+    streams.split_window(2)
+    streams.set_window(1)
+    streams.write("West of House")
+    streams.set_cursor(1, 8)
+    streams.write("Moves\n0")
+    streams.set_window(0)
+    streams.write("You are standing ")
+    streams.write("in an open field.\n")
+    streams.buffer_mode(False)
+    streams.write("Unwrapped text, all of it.")
+    streams.flush()
+
+    expect(streams.upper).to(equal("West ofMoves\n0"))
+    expect(written).to(
+        equal(["You are\nstanding in\nan open\nfield.\nUnwrapped text, all of it."]),
+    )
+    expect(processor.memory.read_byte(0x21)).to(equal(12))
+
+    streams.erase_window(-1)
+
+    expect(streams.upper).to(equal(""))
+
+    with pytest.raises(OutputStreamError):
+        streams.select(-3)
@@ -0,0 +1,90 @@
+"""Tests for probing Quendor program files."""
+
+import io
+import os
+from pathlib import Path
+from typing import Optional
+
+from expects import be_above, be_below, be_false, be_true, contain, equal, expect
+
+import pytest
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class CountingFile(io.BytesIO):
+    """A file in memory that counts the bytes read from it."""
+
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.count = 0
+
+    def read(self, size: Optional[int] = -1) -> bytes:  # noqa: D102
+        data = super().read(size)
+        self.count += len(data)
+        return data
+
+
+@pytest.mark.parametrize("name", ["test_program.z5", "test_program.zblorb"])
+def test_probe_reports_header(name: str) -> None:
+    """Quendor probes a program for what its header says."""
+
+    from quendor.probe import probe
+    from quendor.program import Program
+
+    path = os.path.join(FIXTURES, name)
+    header = Program(path).header
+    result = probe(path)
+
+    expect(result.valid).to(be_true)
+    expect(result.version).to(equal(header.version))
+    expect(result.release).to(equal(header.release))
+    expect(result.serial).to(equal(header.serial))
+    expect(result.checksum).to(equal(header.checksum))
+
+
+def test_probe_reads_only_headers() -> None:
+    """Quendor probes a blorb without reading the executable or resources."""
+
+    from quendor.probe import _probe_file
+
+    with open(os.path.join(FIXTURES, "test_program.zblorb"), "rb") as blorb:
+        data = blorb.read()
+
+    counting = CountingFile(data)
+    result = _probe_file("test_program.zblorb", counting)
+
+    expect(result.file_format).to(equal("BLORB"))
+    expect(counting.count).to(be_below(256))
+    expect(len(data)).to(be_above(256))
+
+
+def test_probe_reports_unloadable_files(tmp_path: Path) -> None:
+    """Quendor probes files it cannot load without raising."""
+
+    from quendor.probe import probe_all
+
+    names = ["test_program.ulx", "test_program.txt", "test_program.aif"]
+    paths = [os.path.join(FIXTURES, name) for name in names]
+    glulx, text, iff, missing = probe_all(
+        paths + [str(tmp_path / "missing.z5")],
+    )
+
+    expect(glulx.glulx).to(be_true)
+    expect(text.problem).to(contain("cannot determine the file format"))
+    expect(iff.problem).to(contain("IFRS"))
+    expect(missing.valid).to(be_false)
+
+
+def test_probe_directory_from_cli(capsys: pytest.CaptureFixture) -> None:
+    """Quendor probes every program below a directory from the cli."""
+
+    from quendor.__main__ import main
+
+    main(["--probe", FIXTURES])
+
+    result = capsys.readouterr().out
+
+    expect(result).to(contain("ZCODE\t5\t"))
+    expect(result).to(contain("\tglulx\t"))
+    expect(result).to(contain("2 z-code programs found."))
@@ -0,0 +1,218 @@
+"""Tests for the Quendor processor."""
+
+from typing import Dict, List
+
+from expects import be_above, be_an, be_none, contain, equal, expect, have_key
+
+import pytest
+
+from tests.assembly import Assembler, GLOBALS, STATIC
+
+
+def test_routine_call_and_return(assemble: Assembler) -> None:
+    """Quendor calls a routine with arguments and stores its result."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # call_vs 0x90 5 7 -> g00; quit
+    main = bytes((0xE0, 0x17, 0x00, 0x90, 0x05, 0x07, 0x10, 0xBA))
+
+    # 2 locals; add L01 L02 -> sp; ret sp
+    routine = bytes((0x02, 0x74, 0x01, 0x02, 0x00, 0xAB, 0x00))
+
+    processor = Processor(Program(assemble(main, routine)))
+    processor.run()
+
+    expect(processor.memory.read_word(GLOBALS)).to(equal(12))
+    expect(processor.instructions).to(equal(4))
+    expect(processor.frames).to(equal([processor.frame]))
+
+
+def test_loop_uses_decoded_instructions(assemble: Assembler) -> None:
+    """Quendor decodes each instruction once, however often it executes."""
+
+    from quendor.instruction import Instruction
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # inc_chk g00 999 ?~loop; quit
+    main = bytes((0xC5, 0x4F, 0x10, 0x03, 0xE7, 0x3F, 0xFB, 0xBA))
+
+    program = Program(assemble(main))
+    processor = Processor(program)
+    processor.run()
+
+    expect(processor.memory.read_word(GLOBALS)).to(equal(1000))
+    expect(processor.instructions).to(equal(1001))
+    expect(processor.decoder.cache).to(equal(program.cache["instructions"]))
+    expect(len(processor.decoder.cache)).to(equal(2))
+    expect(processor.decoder.cache[STATIC]).to(be_an(Instruction))
+    expect(processor.decoder.cache[STATIC].branch_target).to(equal(STATIC))
+
+
+def test_signed_division(assemble: Assembler) -> None:
+    """Quendor divides signed numbers, rounding towards zero."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # div -11 2 -> g00; mod -11 2 -> g01; quit
+    main = bytes(
+        (0xD7, 0x1F, 0xFF, 0xF5, 0x02, 0x10)
+        + (0xD8, 0x1F, 0xFF, 0xF5, 0x02, 0x11)
+        + (0xBA,),
+    )
+
+    processor = Processor(Program(assemble(main)))
+    processor.run()
+
+    expect(processor.memory.read_word(GLOBALS)).to(equal(0x10000 - 5))
+    expect(processor.memory.read_word(GLOBALS + 2)).to(equal(0x10000 - 1))
+
+
+def test_unimplemented_opcode(assemble: Assembler) -> None:
+    """Quendor reports an instruction it cannot execute."""
+
+    from quendor.errors import UnimplementedOpcodeError
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    processor = Processor(Program(assemble(bytes((0xBE, 0x1F)))))
+
+    with pytest.raises(UnimplementedOpcodeError):
+        processor.run()
+
+    expect(processor.instructions).not_to(be_above(0))
+
+
+def test_hot_routine_is_compiled(assemble: Assembler) -> None:
+    """Quendor compiles a routine once it has been called often enough."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # call_vs 0x90 g00 -> g01; inc_chk g00 99 ?~loop; quit
+    main = bytes(
+        (0xE0, 0x2F, 0x00, 0x90, 0x10, 0x11) + (0x05, 0x10, 0x63, 0x3F, 0xF7) + (0xBA,),
+    )
+
+    # 2 locals; add L01 L01 -> L02; jl L02 100 ?~done; rtrue; done: ret L02
+    routine = bytes(
+        (0x02, 0x74, 0x01, 0x01, 0x02) + (0x42, 0x02, 0x64, 0x43) + (0xB0, 0xAB, 0x02),
+    )
+
+    program = Program(assemble(main, routine))
+    interpreted = Processor(program, threshold=0)
+    interpreted.run()
+
+    processor = Processor(program, threshold=5)
+    processor.run()
+
+    expect(program.cache["routines"]).to(have_key(0x240))
+    expect(processor.memory.dynamic).to(equal(interpreted.memory.dynamic))
+    expect(processor.memory.read_word(GLOBALS + 2)).to(equal(198))
+    expect(interpreted.memory.read_word(GLOBALS + 2)).to(equal(198))
+
+
+def test_compiled_blocks_are_searched(assemble: Assembler) -> None:
+    """Quendor picks the blocks of a compiled loop without a chain of tests."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # 2 locals; loop: inc_chk L01 10 ?done; jg L01 5 ?big; add L02 1 -> L02;
+    # jump loop; big: add L02 L01 -> L02; jump loop; done: ret L02
+    routine = bytes(
+        (0x02, 0x05, 0x01, 0x0A, 0xD4, 0x43, 0x01, 0x05, 0xC9)
+        + (0x54, 0x02, 0x01, 0x02, 0x8C, 0xFF, 0xF3)
+        + (0x74, 0x02, 0x01, 0x02, 0x8C, 0xFF, 0xEC, 0xAB, 0x02),
+    )
+
+    # call_vs 0x90 -> g00; quit
+    program = Program(assemble(bytes((0xE0, 0x3F, 0x00, 0x90, 0x10, 0xBA)), routine))
+    interpreted = Processor(program, threshold=0)
+    interpreted.run()
+
+    processor = Processor(program)
+    compiled = processor.compiler.compile(0x240)
+
+    expect(compiled(processor, [])).to(equal(45))  # type: ignore
+    expect(interpreted.memory.read_word(GLOBALS)).to(equal(45))
+    expect(program.cache["sources"][0x240]).not_to(contain("block =="))
+
+
+def test_compiled_routine_underflows(assemble: Assembler) -> None:
+    """Quendor reports an empty stack popped by a compiled routine."""
+
+    from quendor.compiler import UncompilableRoutineError
+    from quendor.errors import StackUnderflowError
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # 0 locals; je 1 ?rtrue; ret_popped
+    routine = bytes((0x00, 0xC1, 0x7F, 0x01, 0xC1, 0xB8))
+
+    processor = Processor(Program(assemble(bytes((0xBA,)), routine)))
+    compiled = processor.compiler.compile(0x240)
+
+    expect(compiled).not_to(be_none)
+
+    with pytest.raises(StackUnderflowError):
+        compiled(processor, [])  # type: ignore
+
+    with pytest.raises(UncompilableRoutineError):
+        processor.compiler.load(0x240, "def routine_00240(:")
+
+
+def test_compiled_routine_calls_and_prints(assemble: Assembler) -> None:
+    """Quendor compiles a routine that prints and calls a compiled routine."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # call_vs 0x90 -> g02; inc_chk g00 9 ?~loop; quit
+    main = bytes(
+        (0xE0, 0x3F, 0x00, 0x90, 0x12) + (0x05, 0x10, 0x09, 0x3F, 0xF8) + (0xBA,),
+    )
+
+    # 0 locals; call_1s 0x93 -> sp; print_num sp; new_line; rtrue; and at
+    # 0x24c: 0 locals; ret 7
+    routine = bytes(
+        (0x00, 0x98, 0x93, 0x00, 0xE6, 0xBF, 0x00, 0xBB, 0xB0, 0, 0, 0)
+        + (0x00, 0x9B, 0x07),
+    )
+
+    program = Program(assemble(main, routine))
+    written: Dict[int, str] = {}
+
+    for threshold in (0, 5):
+        output: List[str] = []
+        processor = Processor(program, threshold=threshold, output=output.append)
+        processor.run()
+        written[threshold] = "".join(output)
+
+    expect(written[5]).to(equal("7\n" * 10))
+    expect(written[0]).to(equal(written[5]))
+    expect(processor.routines[0x240]).not_to(be_none)
+    expect(processor.routines[0x24C]).not_to(be_none)
+    expect(program.cache["sources"][0x240]).to(contain("call(147, [])"))
+
+
+def test_deep_calls_are_compiled_later(assemble: Assembler) -> None:
+    """Quendor compiles a routine whose calls nested too deeply once it can."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # 0 locals; call_1s 0x93 -> sp; ret_popped; and at 0x24c: 0 locals; ret 7
+    routine = bytes((0x00, 0x98, 0x93, 0x00, 0xB8) + (0,) * 7 + (0x00, 0x9B, 0x07))
+
+    processor = Processor(Program(assemble(bytes((0xBA,)), routine)))
+    compiler = processor.compiler
+    compiler.DEPTH = 0
+
+    expect(compiler.compile(0x240)).to(be_none)
+    expect(processor.routines).not_to(have_key(0x240))
+    expect(compiler.compile(0x24C)).not_to(be_none)
+    expect(compiler.compile(0x240)(processor, [])).to(equal(7))  # type: ignore
@@ -0,0 +1,138 @@
+"""Tests for the Quendor profiler."""
+
+from pathlib import Path
+from typing import List
+
+from expects import be_above, contain, equal, expect, have_key
+
+import pytest
+
+from tests.assembly import Assembler
+
+# loop: call_vn 0x90; inc_chk g00 20 ?~loop; quit
+
+MAIN = bytes((0xF9, 0x3F, 0x00, 0x90, 0x05, 0x10, 0x14, 0x3F, 0xF9, 0xBA))
+
+# 1 local; loop: inc_chk L01 10 ?~loop; rtrue
+
+ROUTINE = bytes((0x01, 0x05, 0x01, 0x0A, 0x3F, 0xFD, 0xB0))
+
+
+def test_every_instruction_is_timed(assemble: Assembler) -> None:
+    """Quendor counts every opcode and routine when profiling exactly."""
+
+    from quendor.processor import Processor
+    from quendor.profiler import Profiler
+    from quendor.program import Program
+
+    processor = Processor(Program(assemble(MAIN, ROUTINE)), threshold=0)
+    profiler = Profiler(processor, interval=0)
+    profiler.run()
+
+    routines = profiler.routines()
+
+    expect(sum(profiler.counts.values())).to(equal(processor.instructions))
+    expect(profiler.instructions).to(equal(processor.instructions))
+    expect(profiler.counts[0xF9]).to(equal(21))
+    expect(routines).to(have_key(0x240))
+    expect(routines[0x240][0]).to(equal(21 * 12))
+    expect(routines[0][2]).to(be_above(routines[0x240][2]))
+
+
+def test_compiled_routines_are_profiled(assemble: Assembler) -> None:
+    """Quendor times compiled routines as routines of their own."""
+
+    from quendor.processor import Processor
+    from quendor.profiler import Profiler
+    from quendor.program import Program
+
+    processor = Processor(Program(assemble(MAIN, ROUTINE)), threshold=5)
+    profiler = Profiler(processor, interval=0)
+    profiler.run()
+
+    expect(profiler.stack_counts[(0, 0x240)]).to(equal(4 * 12 + 17))
+    expect(processor.__dict__).not_to(have_key("_call_compiled"))
+
+
+def test_profile_is_saved(tmp_path: Path, assemble: Assembler) -> None:
+    """Quendor writes a sorted report and collapsed call stacks."""
+
+    from quendor.processor import Processor
+    from quendor.profiler import profile
+    from quendor.program import Program
+
+    processor = Processor(Program(assemble(MAIN, ROUTINE)), threshold=0)
+    profile(processor, str(tmp_path / "profile.txt"), interval=0)
+
+    report = (tmp_path / "profile.txt").read_text()
+    stacks = (tmp_path / "profile.folded").read_text().splitlines()
+
+    expect(report).to(contain("inc_chk"))
+    expect(report).to(contain("00240"))
+    expect([line.rsplit(" ", 1)[0] for line in stacks]).to(
+        equal(["main", "main;00240"]),
+    )
+
+
+def test_session_is_sampled(assemble: Assembler) -> None:
+    """Quendor samples a session without touching its dispatch loop."""
+
+    from quendor.processor import Processor
+    from quendor.profiler import Profiler
+    from quendor.program import Program
+
+    # inc_chk g00 30000 ?~loop; quit
+
+    main = bytes((0xC5, 0x4F, 0x10, 0x75, 0x30, 0x3F, 0xFB, 0xBA))
+
+    processor = Processor(Program(assemble(main)))
+    profiler = Profiler(processor, interval=0.0005)
+
+    while not profiler.counts:
+        processor.restart()
+        profiler.run()
+
+    expect(set(profiler.counts)).to(equal({0x05}))
+    expect(set(profiler.stack_counts)).to(equal({(0,)}))
+
+
+def test_timed_session_writes_output(assemble: Assembler) -> None:
+    """Quendor writes out what a session printed once it has been timed."""
+
+    from quendor.processor import Processor
+    from quendor.profiler import Profiler
+    from quendor.program import Program
+
+    # print_char 'h'; print_char 'i'; quit
+
+    main = bytes((0xE5, 0x7F, 0x68, 0xE5, 0x7F, 0x69, 0xBA))
+
+    written: List[str] = []
+    processor = Processor(Program(assemble(main)), output=written.append)
+    Profiler(processor, interval=0).run()
+
+    expect(written).to(equal(["hi"]))
+    expect(processor.instructions).to(equal(3))
+
+
+def test_cli_profiles_program(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    """Quendor saves a profile from the cli, however the program stops."""
+
+    import io
+    import os
+
+    from quendor.__main__ import main
+
+    file_path = os.path.join(os.path.dirname(__file__), "./fixtures", "test_program.z5")
+    report = tmp_path / "fixture.prof"
+
+    monkeypatch.setattr("sys.stdin", io.StringIO("look\n"))
+    main([file_path, "--profile", str(report), "--profile-interval", "0"])
+
+    expect(report.read_text()).to(contain("call_vs"))
+    expect((tmp_path / "fixture.folded").read_text()).to(contain("main;"))
+    expect(capsys.readouterr().out.count("Beautiful Garden")).to(equal(2))
@@ -4,7 +4,7 @@ import os
 import sys
 from unittest import mock
 
-from expects import be_an, contain, equal, expect
+from expects import be_an, contain, equal, expect, have_key
 
 import pytest
 
@@ -18,7 +18,7 @@ def test_report_package_version() -> None:
 
 
 def test_quendor_startup_banner(capsys: pytest.CaptureFixture) -> None:
-    """Quendor provides a minimal banner."""
+    """Quendor provides a minimal banner and then runs the program."""
 
     from quendor.__main__ import main
 
@@ -35,6 +35,7 @@ def test_quendor_startup_banner(capsys: pytest.CaptureFixture) -> None:
     result = captured.out
 
     expect(result).to(contain("Quendor Z-Machine Interpreter"))
+    expect(result).to(contain("Beautiful Garden"))
 
 
 def test_bad_python_version(capsys: pytest.CaptureFixture) -> None:
@@ -72,6 +73,32 @@ def test_quendor_cli_version(capsys: pytest.CaptureFixture) -> None:
     expect(result).to(contain(f"Version: {quendor.__version__}"))
 
 
+def test_quendor_version_imports_nothing_else() -> None:
+    """Quendor reports its version without importing the rest of itself."""
+
+    import subprocess
+
+    script = (
+        "import sys\n"
+        "from quendor.startup import main\n"
+        "try:\n"
+        "    main(['--version'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(name for name in ('argparse', 'inspect', 'logzero',"
+        " 'termcolor', 'quendor.program') if name in sys.modules))\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    expect(result.stdout.splitlines()[-1]).to(equal("[]"))
+
+
 def test_debug_logging(capsys: pytest.CaptureFixture) -> None:
     """Quendor can display debug log information."""
 
@@ -127,6 +154,27 @@ def test_locate_valid_zcode() -> None:
     expect(program.data).to(be_an(bytes))
 
 
+def test_mapped_zcode_is_read_only_view() -> None:
+    """Quendor can memory-map a zcode program as a read-only view."""
+
+    from quendor.program import Program
+
+    file_path = os.path.join(os.path.dirname(__file__), "./fixtures", "test_program.z5")
+
+    program = Program(file_path, mapped=True)
+
+    if not isinstance(program.data, memoryview):
+        pytest.fail("the mapped program is not a view")
+
+    expect(program.data.readonly).to(equal(True))
+    expect(program.format).to(equal("ZCODE"))
+    expect(bytes(program.data)).to(equal(Program(file_path).data))
+
+    program.close()
+
+    expect(program.data).to(equal(b""))
+
+
 def test_unable_to_locate_zcode(capsys: pytest.CaptureFixture) -> None:
     """Quendor informs the user if a zcode program could not be located."""
 
@@ -136,8 +184,8 @@ def test_unable_to_locate_zcode(capsys: pytest.CaptureFixture) -> None:
     with pytest.raises(SystemExit) as pytest_wrapped_e:
         main(["missing.z5"])
 
-    error_type = pytest_wrapped_e.value.args[0]
-    error_message = "".join(pytest_wrapped_e.value.args[0].args)
+    error_type = pytest_wrapped_e.value.__cause__
+    error_message = pytest_wrapped_e.value.code
 
     expect(error_type).to(be_an(UnableToLocateZcodeProgramError))
     expect(error_message).to(contain("Quendor was unable to find the zcode program"))
@@ -155,13 +203,11 @@ def test_unable_to_access_zcode() -> None:
     program._locate()
     program.file = "badprogram.z5"
 
-    with pytest.raises(SystemExit) as pytest_wrapped_e:
+    with pytest.raises(UnableToAccessZcodeProgramError) as pytest_wrapped_e:
         program._read_data()
 
-    error_type = pytest_wrapped_e.value.args[0]
-    error_message = "".join(pytest_wrapped_e.value.args[0].args)
+    error_message = str(pytest_wrapped_e.value)
 
-    expect(error_type).to(be_an(UnableToAccessZcodeProgramError))
     expect(error_message).to(contain("Unable to access the zcode program"))
 
 
@@ -184,8 +230,8 @@ def test_glulx_files_unsupported() -> None:
     ):
         main([file_path])
 
-    error_type = pytest_wrapped_e.value.args[0]
-    error_message = "".join(pytest_wrapped_e.value.args[0].args)
+    error_type = pytest_wrapped_e.value.__cause__
+    error_message = pytest_wrapped_e.value.code
 
     expect(error_type).to(be_an(UnsupportedZcodeProgramTypeError))
     expect(error_message).to(contain("Quendor cannot interpret Glulx files"))
@@ -210,8 +256,8 @@ def test_unable_to_find_ifrs_format() -> None:
     ):
         main([file_path])
 
-    error_type = pytest_wrapped_e.value.args[0]
-    error_message = "".join(pytest_wrapped_e.value.args[0].args)
+    error_type = pytest_wrapped_e.value.__cause__
+    error_message = pytest_wrapped_e.value.code
 
     expect(error_type).to(be_an(InvalidZcodeProgramFormatError))
     expect(error_message).to(contain("Quendor did not find an IFRS format type"))
@@ -268,8 +314,44 @@ def test_unable_to_determine_format() -> None:
     ):
         main([file_path])
 
-    error_type = pytest_wrapped_e.value.args[0]
-    error_message = "".join(pytest_wrapped_e.value.args[0].args)
+    error_type = pytest_wrapped_e.value.__cause__
+    error_message = pytest_wrapped_e.value.code
 
     expect(error_type).to(be_an(UnknownZCodeProgramFormatError))
     expect(error_message).to(contain("Quendor cannot determine the file format"))
+
+
+def test_blorb_executable_is_indexed() -> None:
+    """Quendor reads the executable from a blorb through its resource index."""
+
+    from quendor.program import Program
+
+    file_path = os.path.join(
+        os.path.dirname(__file__),
+        "./fixtures",
+        "test_program.zblorb",
+    )
+
+    unblorbed_path = os.path.join(
+        os.path.dirname(__file__),
+        "./fixtures",
+        "test_program.z5",
+    )
+
+    program = Program(file_path)
+
+    expect(program.story).to(be_an(memoryview))
+    expect(program.story.obj).to(equal(program.data))
+    expect(bytes(program.story)).to(equal(Program(unblorbed_path).data))
+
+    if program.blorb is None:
+        pytest.fail("the program has no blorb")
+
+    picture = program.blorb.picture(1)
+
+    if picture is None:
+        pytest.fail("the blorb has no picture 1")
+
+    expect(program.blorb.resources).to(have_key(("Pict", 1)))
+    expect(picture[0]).to(equal("PNG "))
+    expect(program.blorb.sound(1)).to(equal(None))
@@ -0,0 +1,69 @@
+"""Tests for Quendor save files."""
+
+from pathlib import Path
+
+from expects import be_below, be_false, be_true, equal, expect
+
+from tests.assembly import Assembler, GLOBALS
+from tests.test_memory import zcode_fixture
+
+# store g00 5; save -> g01; store g00 9; quit
+MAIN = bytes((0x0D, 0x10, 0x05, 0xBE, 0x00, 0xFF, 0x11, 0x0D, 0x10, 0x09, 0xBA))
+
+
+def test_memory_is_compressed_against_story() -> None:
+    """Quendor compresses dynamic memory down to what has changed."""
+
+    from quendor.memory import Memory
+    from quendor.program import Program
+    from quendor.quetzal import compress, decompress
+
+    memory = Memory(Program(zcode_fixture()))
+    memory.write_word(0x1000, 0xBEEF)
+    memory.write_byte(0x40, 0x7F)
+
+    data = compress(memory)
+
+    expect(len(data)).to(be_below(64))
+    expect(decompress(memory, data)).to(equal(bytes(memory.dynamic)))
+
+
+def test_session_is_restored(tmp_path: Path, assemble: Assembler) -> None:
+    """Quendor restores a session from the point where it was saved."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    program = Program(assemble(MAIN))
+
+    processor = Processor(program)
+    processor.save_path = str(tmp_path / "session.qzl")
+    processor.run()
+
+    expect(processor.memory.read_word(GLOBALS + 2)).to(equal(1))
+
+    restored = Processor(program)
+
+    expect(restored.restore(processor.save_path)).to(be_true)
+    expect(restored.memory.read_word(GLOBALS)).to(equal(5))
+    expect(restored.memory.read_word(GLOBALS + 2)).to(equal(2))
+
+    restored.run()
+
+    expect(restored.memory.read_word(GLOBALS)).to(equal(9))
+
+
+def test_other_story_is_not_restored(tmp_path: Path, assemble: Assembler) -> None:
+    """Quendor refuses to restore a session of another story."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    processor = Processor(Program(assemble(MAIN)))
+    processor.save_path = str(tmp_path / "session.qzl")
+    processor.run()
+
+    other = Processor(Program(zcode_fixture()))
+
+    expect(other.restore(processor.save_path)).to(be_false)
+    expect(other.restore(str(tmp_path / "missing.qzl"))).to(be_false)
@@ -0,0 +1,104 @@
+"""Tests for the Quendor batch runner."""
+
+import shutil
+from pathlib import Path
+
+from expects import be_above, be_none, be_true, contain, equal, expect
+
+from tests.assembly import Assembler
+from tests.test_text import HELLO
+
+# print "Hello"; new_line; aread 0x100 0 -> g00; print "Hello"; quit
+MAIN = (
+    bytes((0xB2,))
+    + HELLO
+    + bytes((0xBB, 0xE4, 0x1F, 0x01, 0x00, 0x00, 0x10, 0xB2))
+    + HELLO
+    + bytes((0xBA,))
+)
+
+
+def test_runner_checks_transcripts(tmp_path: Path, assemble: Assembler) -> None:
+    """Quendor runs each story with a script and checks its transcript."""
+
+    from quendor.scripts.runner import find_jobs, run_jobs
+
+    story = Path(assemble(MAIN))
+
+    for name in ("passing", "failing", "unchecked", "unscripted"):
+        shutil.copy(story, tmp_path / f"{name}.z5")
+
+    story.unlink()
+
+    for name in ("passing", "failing", "unchecked"):
+        (tmp_path / f"{name}.in").write_text("look\n")
+
+    (tmp_path / "passing.out").write_text("Hello\nlook\nHello\n")
+    (tmp_path / "failing.out").write_text("Goodbye\n")
+
+    results = {
+        Path(result.story).stem: result
+        for result in run_jobs(find_jobs(str(tmp_path)), 2)
+    }
+
+    expect(sorted(results)).to(equal(["failing", "passing", "unchecked"]))
+    expect(results["passing"].passed).to(be_true)
+    expect(results["failing"].passed).to(equal(False))
+    expect(results["unchecked"].passed).to(be_none)
+    expect(results["passing"].instructions).to(equal(5))
+
+
+def test_runner_stops_stories(tmp_path: Path, assemble: Assembler) -> None:
+    """Quendor fails a story that runs too long or breaks the interpreter."""
+
+    from quendor.scripts.runner import StoryJob, run_story
+
+    # loop: jump loop
+    looping = assemble(bytes((0x8C, 0xFF, 0xFF)))
+    script = tmp_path / "looping.in"
+    script.write_text("")
+
+    result = run_story(StoryJob(looping, str(script), None, False, 0.2))
+
+    expect(result.passed).to(equal(False))
+    expect(result.error).to(contain("StoryTimeoutError"))
+    expect(result.instructions).to(be_above(0))
+
+    result = run_story(StoryJob(str(tmp_path), str(script), None, False))
+
+    expect(result.passed).to(equal(False))
+    expect(result.error).to(contain("Checked in"))
+
+
+def test_runner_finds_what_the_catalog_finds(tmp_path: Path) -> None:
+    """Quendor runs scripts for every kind of story file the catalog knows."""
+
+    from quendor.catalog import SUFFIXES
+    from quendor.scripts.runner import find_jobs
+
+    for suffix in SUFFIXES + (".txt",):
+        (tmp_path / f"story{suffix}").write_bytes(b"")
+
+    (tmp_path / "story.in").write_text("look\n")
+
+    stories = sorted(Path(job.story).suffix for job in find_jobs(str(tmp_path)))
+
+    expect(stories).to(equal(sorted(SUFFIXES)))
+
+
+def test_runner_keeps_files_apart(tmp_path: Path, assemble: Assembler) -> None:
+    """Quendor keeps the files a story writes away from the story."""
+
+    from quendor.scripts.runner import StoryJob, run_story
+
+    # save -> g00; quit
+    story = assemble(bytes((0xBE, 0x00, 0xFF, 0x10, 0xBA)))
+    script = tmp_path / "assembled.in"
+    script.write_text("")
+
+    result = run_story(StoryJob(story, str(script), None, False))
+
+    expect(result.error).to(equal(""))
+    expect(sorted(path.name for path in tmp_path.iterdir())).to(
+        equal(["assembled.in", "assembled.z5"]),
+    )
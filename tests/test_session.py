@@ -0,0 +1,189 @@
+"""Tests for Quendor sessions on an asyncio event loop."""
+
+import asyncio
+import os
+from typing import List, Optional, cast
+
+from expects import be_false, contain, equal, expect
+
+import pytest
+
+from tests.assembly import Assembler, GLOBALS
+from tests.test_text import HELLO
+
+TEXT_BUFFER = 0x100
+
+# storeb 0x100 0 20; print "Hello"
+
+PREPARE = bytes((0xE2, 0x17, 0x01, 0x00, 0x00, 0x14, 0xB2)) + HELLO
+
+# aread 0x100 0 -> g00; loadb 0x100 2 -> g01; quit
+
+READ = bytes(
+    (0xE4, 0x1F, 0x01, 0x00, 0x00, 0x10) + (0xD0, 0x1F, 0x01, 0x00, 0x02, 0x11, 0xBA),
+)
+
+
+def feed(lines: List[Optional[str]]):  # noqa: ANN201
+    """Provide an awaitable source of the given lines."""
+
+    source = iter(lines)
+
+    async def next_line() -> Optional[str]:
+        await asyncio.sleep(0)
+        return next(source)
+
+    return next_line
+
+
+def test_session_suspends_for_input(assemble: Assembler) -> None:
+    """Quendor suspends a session at a read until its input arrives."""
+
+    from quendor.program import Program
+    from quendor.session import Session
+
+    program = Program(assemble(PREPARE + READ))
+    output: List[str] = []
+    session = Session(program, output.append)
+
+    session.processor.run()
+
+    if session.processor.waiting is None:
+        pytest.fail("the session is not waiting for input")
+
+    expect(session.processor.waiting.address).to(equal(0x220 + len(PREPARE)))
+    expect(session.processor.pc).to(equal(0x220 + len(PREPARE)))
+
+    asyncio.run(session.run(feed(["look"])))
+
+    expect(session.processor.waiting).to(equal(None))
+    expect(session.processor.memory.read_word(GLOBALS)).to(equal(13))
+    expect(session.processor.memory.read_word(GLOBALS + 2)).to(equal(ord("l")))
+    expect("".join(output)).to(equal("Hello"))
+
+
+def test_one_loop_drives_many_sessions(assemble: Assembler) -> None:
+    """Quendor runs many waiting sessions of one program on one event loop."""
+
+    from quendor.program import Program
+    from quendor.session import Session
+
+    program = Program(assemble(PREPARE + READ))
+    sessions = [Session(program, lambda text: None) for _ in range(200)]
+
+    async def run_all() -> None:
+        await asyncio.gather(
+            *(
+                session.run(feed([chr(ord("a") + index % 26)]))
+                for index, session in enumerate(sessions)
+            ),
+        )
+
+    asyncio.run(run_all())
+
+    expect(
+        [session.processor.memory.read_word(GLOBALS + 2) for session in sessions[:3]],
+    ).to(equal([ord("a"), ord("b"), ord("c")]))
+
+
+def test_timed_read_calls_routine(assemble: Assembler) -> None:
+    """Quendor calls the routine of a timed read while it awaits input."""
+
+    from quendor.program import Program
+    from quendor.session import Session
+
+    # aread 0x100 0 1 0x90 -> g00; quit
+
+    main = bytes((0xE2, 0x17, 0x01, 0x00, 0x00, 0x14)) + bytes(
+        (0xE4, 0x14, 0x01, 0x00, 0x00, 0x01, 0x00, 0x90, 0x10, 0xBA),
+    )
+
+    # 0 locals; rtrue
+
+    program = Program(assemble(main, bytes((0x00, 0xB0))))
+    session = Session(program, lambda text: None)
+
+    async def never() -> Optional[str]:
+        return await asyncio.get_running_loop().create_future()
+
+    asyncio.run(session.run(never))
+
+    expect(session.processor.memory.read_word(GLOBALS)).to(equal(0))
+    expect(session.processor.frame.stack).to(equal([]))
+
+
+def test_sessions_are_served_over_tcp(assemble: Assembler) -> None:
+    """Quendor serves a session to each connection of a line server."""
+
+    from quendor.program import Program
+    from quendor.session import start_server
+
+    program = Program(assemble(PREPARE + READ))
+
+    async def converse() -> bytes:
+        server = await start_server(program, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"look\r\n")
+            writer.write_eof()
+
+            return await reader.read()
+
+    expect(asyncio.run(converse())).to(contain(b"Hello"))
+
+
+def test_served_sessions_keep_files_apart(assemble: Assembler) -> None:
+    """Quendor keeps the files of each served session in a directory of its own."""
+
+    from quendor.program import Program
+    from quendor.processor import Processor
+    from quendor.session import Session, converse
+
+    program = Program(assemble(PREPARE + READ))
+
+    class Writer:
+        def write(self, data: bytes) -> None:
+            pass
+
+        async def drain(self) -> None:
+            pass
+
+        def close(self) -> None:
+            pass
+
+    async def played() -> Session:
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"look\r\n")
+        reader.feed_eof()
+
+        return await converse(program, reader, cast(asyncio.StreamWriter, Writer()))
+
+    first, second = (asyncio.run(played()).processor for _ in range(2))
+
+    expect(first.save_path).not_to(equal(second.save_path))
+    expect(first.save_path).not_to(equal(Processor(program).save_path))
+    expect(first.streams.transcript_path).to(
+        equal(os.path.splitext(first.save_path)[0] + ".scr"),
+    )
+    expect(os.path.exists(os.path.dirname(first.save_path))).to(be_false)
+
+
+def test_listener_accepts_connections() -> None:
+    """Quendor listens for connections without socket.create_server."""
+
+    import socket
+
+    from quendor.session import listen
+
+    with listen("127.0.0.1", 0) as listener:
+        port = listener.getsockname()[1]
+
+        with socket.create_connection(("127.0.0.1", port)):
+            client, _ = listener.accept()
+            client.close()
+
+        expect(listener.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR)).not_to(
+            equal(0),
+        )
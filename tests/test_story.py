@@ -0,0 +1,97 @@
+"""Tests for running Quendor stories from embedding code."""
+
+import io
+from pathlib import Path
+
+from expects import be_an, be_false, be_true, contain, equal, expect
+
+import pytest
+
+from tests.assembly import Assembler, GLOBALS
+from tests.test_session import PREPARE, READ
+
+
+def test_story_runs_until_input(assemble: Assembler) -> None:
+    """Quendor runs a story from bytes until it reads, then with the line."""
+
+    from quendor.story import Story
+
+    story = Story.load(Path(assemble(PREPARE + READ)).read_bytes())
+
+    expect(story.run()).to(equal("Hello"))
+    expect(story.waiting).to(be_true)
+    expect(story.finished).to(be_false)
+
+    expect(story.run("look")).to(equal(""))
+    expect(story.waiting).to(be_false)
+    expect(story.finished).to(be_true)
+    expect(story.processor.memory.read_word(GLOBALS + 2)).to(equal(ord("l")))
+
+
+def test_story_steps_from_file(assemble: Assembler) -> None:
+    """Quendor steps a story read from an open file one instruction at a time."""
+
+    from quendor.story import Story
+
+    path = assemble(PREPARE + READ)
+
+    with open(path, "rb") as story_file:
+        story = Story.load(story_file)
+
+    expect(story.program.file).to(equal(path))
+    expect(story.step().address).to(equal(0x220))
+    expect(story.step().opcode).to(equal(0xB2))
+    expect(story.take()).to(equal("Hello"))
+
+
+def test_stories_share_a_program(assemble: Assembler) -> None:
+    """Quendor runs many stories of one program loaded from a buffer."""
+
+    from quendor.program import Program
+    from quendor.story import Story
+
+    data = Path(assemble(PREPARE + READ)).read_bytes()
+    program = Program.load(io.BytesIO(data))
+    stories = [Story(program) for _ in range(3)]
+
+    for index, story in enumerate(stories):
+        story.run("abc"[index])
+
+    expect(
+        [story.processor.memory.read_word(GLOBALS + 2) for story in stories],
+    ).to(equal([ord("a"), ord("b"), ord("c")]))
+
+
+def test_stories_keep_files_only_where_placed(
+    tmp_path: Path,
+    assemble: Assembler,
+) -> None:
+    """Quendor keeps the files of a story loaded from bytes only where it is told."""
+
+    from quendor.story import Story
+
+    data = Path(assemble(PREPARE + READ)).read_bytes()
+    unplaced = Story.load(data)
+    base = str(tmp_path / "player")
+    placed = Story.load(data, base=base)
+
+    expect(unplaced.processor.save_path).to(equal(""))
+    expect(unplaced.processor.streams.transcript_path).to(equal(""))
+    expect(unplaced.processor.save(unplaced.processor.save_path, 0)).to(be_false)
+
+    expect(placed.processor.save_path).to(equal(f"{base}.qzl"))
+    expect(placed.processor.streams.commands_path).to(equal(f"{base}.rec"))
+    expect(placed.processor.save(placed.processor.save_path, 0)).to(be_true)
+
+
+def test_problems_are_raised_not_exited() -> None:
+    """Quendor raises a problem with a program instead of exiting."""
+
+    import quendor
+    from quendor.errors import UnknownZCodeProgramFormatError
+
+    with pytest.raises(UnknownZCodeProgramFormatError) as pytest_wrapped_e:
+        quendor.Story.load(b"")
+
+    expect(pytest_wrapped_e.value).to(be_an(quendor.QuendorError))
+    expect(pytest_wrapped_e.value.report()).to(contain("Quendor Problem"))
@@ -0,0 +1,128 @@
+"""Tests for the Quendor table operations."""
+
+from typing import List, TYPE_CHECKING
+
+from expects import be_none, equal, expect
+
+import pytest
+
+from tests.assembly import Assembler, GLOBALS, STATIC
+
+if TYPE_CHECKING:
+    from quendor.memory import Memory
+
+# loop: call_vs 0x90 -> g02; inc_chk g00 9 ?~loop; print_table 0x100 4 2 1; quit
+
+MAIN = bytes(
+    (0xE0, 0x3F, 0x00, 0x90, 0x12)
+    + (0x05, 0x10, 0x09, 0x3F, 0xF8)
+    + (0xFE, 0x15, 0x01, 0x00, 0x04, 0x02, 0x01, 0xBA),
+)
+
+# 0 locals; copy_table 0x100 0x108 8; scan_table 'c' 0x108 8 1 -> g01 ?rtrue; rfalse
+
+ROUTINE = bytes(
+    (0x00, 0xFD, 0x07, 0x01, 0x00, 0x01, 0x08, 0x08)
+    + (0xF7, 0x45, 0x63, 0x01, 0x08, 0x08, 0x01, 0x11, 0xC1, 0xB1),
+)
+
+
+@pytest.fixture(name="memory")
+def fixture_memory(assemble: Assembler) -> "Memory":
+    """Provide the memory of an assembled program with a table at 0x100."""
+
+    from quendor.memory import Memory
+    from quendor.program import Program
+
+    memory = Memory(Program(assemble(MAIN, ROUTINE)))
+    memory.dynamic[0x100:0x108] = b"abcdefgh"
+
+    return memory
+
+
+def test_copy_table_overlaps(memory: "Memory") -> None:
+    """Quendor copies overlapping tables as if through a buffer of their own."""
+
+    from quendor.tables import copy_table
+
+    copy_table(memory, 0x100, 0x102, 6)
+    expect(bytes(memory.dynamic[0x100:0x108])).to(equal(b"ababcdef"))
+
+    copy_table(memory, 0x102, 0x100, 6)
+    expect(bytes(memory.dynamic[0x100:0x108])).to(equal(b"abcdefef"))
+
+
+def test_copy_table_forwards(memory: "Memory") -> None:
+    """Quendor copies forwards for a negative size and zeroes for no target."""
+
+    from quendor.errors import IllegalMemoryAccessError
+    from quendor.tables import copy_table
+
+    changes: List[int] = []
+    memory.watch(0x100, 0x110, lambda address, length: changes.append(address))
+
+    copy_table(memory, 0x100, 0x103, -7)
+    expect(bytes(memory.dynamic[0x100:0x10A])).to(equal(b"abcabcabca"))
+
+    copy_table(memory, 0x104, 0, 4)
+    expect(bytes(memory.dynamic[0x100:0x10A])).to(equal(b"abca\0\0\0\0ca"))
+
+    copy_table(memory, STATIC, 0x100, 2)
+    expect(memory.dynamic[0x100:0x102]).to(equal(memory.read_bytes(STATIC, 2)))
+    expect(changes).to(equal([0x103, 0x104, 0x100]))
+
+    with pytest.raises(IllegalMemoryAccessError):
+        copy_table(memory, 0x100, STATIC - 2, 4)
+
+
+def test_scan_table_forms(memory: "Memory") -> None:
+    """Quendor finds bytes and words in tables with entries of any length."""
+
+    from quendor.tables import scan_table
+
+    expect(scan_table(memory, ord("c"), 0x100, 8, 0x01)).to(equal(0x102))
+    expect(scan_table(memory, ord("e"), 0x100, 4, 0x02)).to(equal(0x104))
+    expect(scan_table(memory, ord("d"), 0x100, 4, 0x02)).to(equal(0))
+    expect(scan_table(memory, 0x6566, 0x100, 4, 0x82)).to(equal(0x104))
+    expect(scan_table(memory, 0x6364, 0x100, 2, 0x84)).to(equal(0))
+    expect(scan_table(memory, 0x6162, 0x100, 0, 0x82)).to(equal(0))
+    expect(scan_table(memory, 0x161, 0x100, 8, 0x01)).to(equal(0))
+
+
+def test_print_table_rows(memory: "Memory") -> None:
+    """Quendor provides the rows of a table of characters as lines of text."""
+
+    from quendor.tables import print_table
+    from quendor.text import TextDecoder
+
+    text = TextDecoder(memory)
+    memory.dynamic[0x104] = 13
+    memory.dynamic[0x107] = 0
+
+    expect(print_table(text, 0x100, 3, 2, 1)).to(equal("abc\n\nfg"))
+    expect(print_table(text, 0x103, 2)).to(equal("d\n"))
+    expect(print_table(text, 0x105, 3)).to(equal("fg"))
+
+
+@pytest.mark.parametrize("threshold", [0, 5])
+def test_table_opcodes(threshold: int, assemble: Assembler) -> None:
+    """Quendor executes the table opcodes, interpreted and compiled alike."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    written: List[str] = []
+    processor = Processor(
+        Program(assemble(MAIN, ROUTINE)),
+        threshold=threshold,
+        output=written.append,
+    )
+    processor.memory.dynamic[0x100:0x108] = b"abcdefgh"
+    processor.run()
+
+    expect(processor.memory.read_word(GLOBALS + 2)).to(equal(0x10A))
+    expect(processor.memory.read_word(GLOBALS + 4)).to(equal(1))
+    expect("".join(written)).to(equal("abcd\nfgha"))
+
+    if threshold:
+        expect(processor.routines[0x240]).not_to(be_none)
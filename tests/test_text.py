@@ -0,0 +1,86 @@
+"""Tests for the Quendor text decoder."""
+
+from typing import List
+
+from expects import be, equal, expect, have_key, have_len
+
+from tests.assembly import Assembler
+from tests.test_memory import zcode_fixture
+
+HELLO = bytes((0x11, 0xAA, 0xC6, 0x34))
+LOWER_HELLO = bytes((0x35, 0x51, 0xC6, 0x85))
+
+
+def test_print_opcodes_write_output(assemble: Assembler) -> None:
+    """Quendor prints inline, packed and numeric text to its output."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # print "Hello"; new_line; print_paddr 0x90; print_num -1; quit
+    main = (
+        bytes((0xB2,))
+        + HELLO
+        + bytes((0xBB, 0x8D, 0x00, 0x90, 0xE6, 0x3F, 0xFF, 0xFF, 0xBA))
+    )
+
+    written: List[str] = []
+    processor = Processor(
+        Program(assemble(main, LOWER_HELLO)),
+        output=written.append,
+    )
+    processor.run()
+
+    expect("".join(written)).to(equal("Hello\nhello-1"))
+
+
+def test_static_strings_are_shared(assemble: Assembler) -> None:
+    """Quendor decodes a string in static memory once for every session."""
+
+    from quendor.memory import Memory
+    from quendor.program import Program
+    from quendor.text import TextDecoder
+
+    program = Program(assemble(b"", LOWER_HELLO))
+
+    first = TextDecoder(Memory(program))
+    second = TextDecoder(Memory(program))
+
+    expect(first.decode(0x240)).to(equal("hello"))
+    expect(program.cache["strings"]).to(have_key(0x240))
+    expect(second.decode(0x240)).to(be(first.decode(0x240)))
+
+
+def test_dynamic_strings_follow_writes(assemble: Assembler) -> None:
+    """Quendor decodes a string in dynamic memory again once it changes."""
+
+    from quendor.memory import Memory
+    from quendor.program import Program
+    from quendor.text import TextDecoder
+
+    memory = Memory(Program(assemble(b"")))
+    memory.dynamic[0x100:0x104] = HELLO
+
+    text = TextDecoder(memory)
+
+    expect(text.decode(0x100)).to(equal("Hello"))
+    expect(text.decode(0x100)).to(equal("Hello"))
+
+    memory.dynamic[0x100:0x104] = LOWER_HELLO
+
+    expect(text.decode(0x100)).to(equal("hello"))
+    expect(text.strings).not_to(have_key(0x100))
+
+
+def test_abbreviations_are_decoded_once() -> None:
+    """Quendor decodes the abbreviations of a program once for every session."""
+
+    from quendor.memory import Memory
+    from quendor.program import Program
+    from quendor.text import TextDecoder
+
+    program = Program(zcode_fixture())
+    text = TextDecoder(Memory(program))
+
+    expect(text.abbreviations).to(have_len(96))
+    expect(TextDecoder(Memory(program)).abbreviations).to(be(text.abbreviations))
@@ -0,0 +1,100 @@
+"""Tests for the Quendor instruction trace."""
+
+from types import MethodType
+
+from expects import contain, equal, expect
+
+import pytest
+
+from tests.assembly import Assembler
+
+
+def test_trace_keeps_last_instructions(assemble: Assembler) -> None:
+    """Quendor keeps the last instructions executed in a ring buffer."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+    from quendor.tracer import Record
+
+    # inc_chk g00 999 ?~loop; quit
+
+    main = bytes((0xC5, 0x4F, 0x10, 0x03, 0xE7, 0x3F, 0xFB, 0xBA))
+
+    processor = Processor(Program(assemble(main)), trace=4)
+    processor.run()
+
+    if processor.trace is None:
+        pytest.fail("the processor keeps no trace")
+
+    records = list(processor.trace.records())
+
+    expect(processor.instructions).to(equal(1001))
+    expect(processor.trace.total).to(equal(1001))
+    expect(len(records)).to(equal(4))
+    expect(records[-2]).to(equal(Record(0x220, 0x05, (0x10, 999), 0)))
+    expect(records[-1]).to(equal(Record(0x227, 0xBA, (), 0)))
+
+
+def test_untraced_processor_runs_plain_loop(assemble: Assembler) -> None:
+    """Quendor only swaps in the traced loop when a trace is asked for."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    processor = Processor(Program(assemble(bytes((0xBA,)))))
+
+    expect(processor.trace).to(equal(None))
+    expect(processor.run).to(equal(MethodType(type(processor).run, processor)))
+
+
+def test_trace_is_dumped_on_crash(
+    capsys: pytest.CaptureFixture,
+    assemble: Assembler,
+) -> None:
+    """Quendor dumps the trace when the program stops with an error."""
+
+    from quendor.errors import UnimplementedOpcodeError
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # push 7; unknown instruction
+
+    main = bytes((0xE8, 0x7F, 0x07, 0xBE, 0x1F))
+
+    processor = Processor(Program(assemble(main)), trace=16)
+
+    with pytest.raises(UnimplementedOpcodeError):
+        processor.run()
+
+    dump = capsys.readouterr().err
+
+    expect(dump).to(contain("last 2 of 2 instructions"))
+    expect(dump).to(contain("00220  push"))
+    expect(dump).to(contain("stack 1"))
+
+
+def test_traced_processor_records_every_routine(assemble: Assembler) -> None:
+    """Quendor interprets hot routines while tracing, so they are recorded."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # loop: call_vs 0x90 -> g01; inc_chk g00 9 ?~loop; quit
+
+    main = bytes(
+        (0xE0, 0x3F, 0x00, 0x90, 0x11) + (0x05, 0x10, 0x09, 0x3F, 0xF8) + (0xBA,),
+    )
+
+    # 0 locals; rtrue
+
+    processor = Processor(Program(assemble(main, bytes((0x00, 0xB0)))), trace=64)
+    processor.run()
+
+    if processor.trace is None:
+        pytest.fail("the processor keeps no trace")
+
+    routine = [record for record in processor.trace.records() if record.pc == 0x241]
+
+    expect(processor.threshold).to(equal(0))
+    expect(processor.routines).to(equal({}))
+    expect(len(routine)).to(equal(10))
@@ -0,0 +1,89 @@
+"""Tests for the Quendor undo history."""
+
+from expects import be, be_empty, be_none, equal, expect
+
+from tests.assembly import Assembler, GLOBALS
+from tests.test_memory import zcode_fixture
+
+
+def test_snapshots_share_unchanged_pages() -> None:
+    """Quendor only copies the pages of memory that a turn has written."""
+
+    from quendor.memory import Memory
+    from quendor.program import Program
+    from quendor.undo import PAGE_SIZE, UndoRing
+
+    memory = Memory(Program(zcode_fixture()))
+    undo = UndoRing(memory)
+
+    memory.write_byte(0x800, 1)
+    undo.save([], 0)
+    memory.write_byte(0x900, 2)
+    undo.save([], 0)
+
+    first, second = undo.snapshots
+
+    expect(first.cost).to(equal(PAGE_SIZE))
+    expect(second.cost).to(equal(PAGE_SIZE))
+    expect(second.pages[0x800 // PAGE_SIZE]).to(be(first.pages[0x800 // PAGE_SIZE]))
+    expect(undo.size).to(equal(2 * PAGE_SIZE))
+
+    memory.write_byte(0x900, 3)
+
+    expect(undo.restore()).to(be(second))
+    expect(memory.read_byte(0x900)).to(equal(2))
+    expect(undo.size).to(equal(PAGE_SIZE))
+
+
+def test_oldest_snapshots_are_evicted() -> None:
+    """Quendor drops the oldest snapshots to stay within its limits."""
+
+    from quendor.memory import Memory
+    from quendor.program import Program
+    from quendor.undo import PAGE_SIZE, UndoRing
+
+    memory = Memory(Program(zcode_fixture()))
+    shallow = UndoRing(memory, depth=2)
+    small = UndoRing(memory, depth=10, limit=3 * PAGE_SIZE)
+
+    for turn in range(1, 6):
+        memory.write_byte(0x800, turn)
+        shallow.save([], turn)
+        small.save([], turn)
+
+    expect([snapshot.pc for snapshot in shallow.snapshots]).to(equal([4, 5]))
+    expect([snapshot.pc for snapshot in small.snapshots]).to(equal([3, 4, 5]))
+    expect(small.size).to(equal(3 * PAGE_SIZE))
+
+    for _ in range(3):
+        small.restore()
+
+    expect(small.restore()).to(be_none)
+    expect(small.size).to(equal(0))
+
+
+def test_restore_undo_continues_from_save_undo(assemble: Assembler) -> None:
+    """Quendor continues from save_undo once the session is undone."""
+
+    from quendor.processor import Processor
+    from quendor.program import Program
+
+    # store g00 5; save_undo -> g01; je g01 2 ?quit; store g00 9;
+    # restore_undo -> g02; quit
+    main = bytes(
+        (
+            0x0D, 0x10, 0x05,
+            0xBE, 0x09, 0xFF, 0x11,
+            0x41, 0x11, 0x02, 0xC9,
+            0x0D, 0x10, 0x09,
+            0xBE, 0x0A, 0xFF, 0x12,
+            0xBA,
+        ),
+    )  # fmt: skip
+
+    processor = Processor(Program(assemble(main)))
+    processor.run()
+
+    expect(processor.memory.read_word(GLOBALS)).to(equal(5))
+    expect(processor.memory.read_word(GLOBALS + 2)).to(equal(2))
+    expect(processor.undo.snapshots).to(be_empty)